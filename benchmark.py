@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Замер времени запуска точек входа
+
+Для каждой команды:
+- время «до первой строки» (python -X importtime): какие модули импортируются
+  и сколько это стоит (кумулятивно, по верхнеуровневым пакетам);
+- общее время выполнения команды.
+
+Запуск:
+    python benchmark.py            # --help и --no-plots
+    python benchmark.py --repeat 5 --top 15
+    python benchmark.py --jira     # загрузка из JIRA (локальная имитация сервера)
+    python benchmark.py --csv      # чтение полной выгрузки: pd.read_csv и read_jira_export
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+
+COMMANDS = {
+    'main.py --help': ['main.py', '--help'],
+    'validation.py --help': ['validation.py', '--help'],
+    'main.py --no-plots': ['main.py', '--no-plots'],
+    'main.py': ['main.py'],
+}
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+HEAVY = ('numpy', 'pandas', 'scipy', 'matplotlib', 'seaborn')
+
+
+def parse_importtime(stderr):
+    """Кумулятивное время импорта (мкс) для модулей верхнего уровня
+    и множество всех импортированных пакетов"""
+
+    cumulative = {}
+    packages = set()
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cum_us, indent, module = match.groups()
+        packages.add(module.split('.')[0])
+        # Модуль верхнего уровня — с минимальным отступом (один пробел)
+        if len(indent) == 1:
+            cumulative[module] = cumulative.get(module, 0) + int(cum_us)
+    return cumulative, packages
+
+
+def _run(command, env):
+    """Запуск команды; при ошибке — исключение с концом stderr (упавшая команда
+    не должна выглядеть как быстрый запуск)"""
+
+    proc = subprocess.run(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Команда {' '.join(command[1:])} завершилась с кодом {proc.returncode}:\n"
+                           f"{proc.stderr[-2000:]}")
+    return proc
+
+
+def run_command(args, repeat=3):
+    """Лучшее время из repeat запусков и разбор -X importtime"""
+
+    env = dict(os.environ, MPLBACKEND='Agg')
+    with tempfile.TemporaryDirectory() as tmp:
+        # Результаты main.py — во временную папку, а не в reports/ репозитория
+        if args[0] == 'main.py':
+            args = args + ['--output-dir', tmp]
+
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _run([sys.executable] + args, env)
+            times.append(time.perf_counter() - start)
+
+        proc = _run([sys.executable, '-X', 'importtime'] + args, env)
+    return (min(times),) + parse_importtime(proc.stderr)
+
+
+def benchmark_jira(n_tickets=20000, latency=0.02, page_size=100, workers=(1, 2, 4, 8, 16)):
+    """Пропускная способность загрузки из JIRA: заявок в секунду при разном
+    числе потоков (имитация сервера с задержкой ответа latency)"""
+
+    sys.path.insert(0, str(ROOT))
+    from src.jira_mock import JiraMockServer
+    from src.jira_fetcher import JiraFetcher
+
+    print(f"\n🌐 Загрузка из JIRA: {n_tickets} заявок, страница {page_size}, задержка {latency * 1000:.0f} мс")
+    with JiraMockServer(n_tickets, latency=latency, max_page_size=page_size) as server:
+        for n_workers in workers:
+            fetcher = JiraFetcher(server.url, page_size=page_size, workers=n_workers)
+            start = time.perf_counter()
+            df = fetcher.fetch()
+            elapsed = time.perf_counter() - start
+            print(f"  потоков {n_workers:>2}: {elapsed:6.2f} с, {len(df) / elapsed:8.0f} заявок/с "
+                  f"({fetcher.stats['requests']} запросов)")
+
+
+def benchmark_csv(path=ROOT / "data" / "jira_full_export.csv", copies=200, repeat=3):
+    """Чтение полной выгрузки (многострочные Description): pd.read_csv всех
+    колонок и read_jira_export без широких текстовых колонок. Файл размножается
+    copies раз, чтобы время и память были заметны."""
+
+    import tempfile
+    import pandas as pd
+
+    sys.path.insert(0, str(ROOT))
+    from src.jira_csv import read_jira_export
+
+    with open(path, encoding='utf-8-sig') as f:
+        header = f.readline()
+        body = f.read()
+    if not body.endswith('\n'):
+        body += '\n'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        big = Path(tmp) / "full_export_x.csv"
+        with open(big, 'w', encoding='utf-8-sig') as f:
+            f.write(header)
+            for _ in range(copies):
+                f.write(body)
+        size_mb = big.stat().st_size / 2 ** 20
+
+        readers = {
+            'pd.read_csv (все колонки)': lambda: pd.read_csv(big, encoding='utf-8-sig'),
+            'read_jira_export': lambda: read_jira_export(big)[0],
+        }
+        print(f"\n📄 Чтение выгрузки: {path.name} x{copies} ({size_mb:.1f} МБ)")
+        for name, read in readers.items():
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                df = read()
+                times.append(time.perf_counter() - start)
+            memory_mb = df.memory_usage(deep=True).sum() / 2 ** 20
+            print(f"  {name:<28} {min(times):6.2f} с, {len(df.columns):>2} колонок, {memory_mb:7.1f} МБ в памяти")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замер времени запуска точек входа')
+    parser.add_argument('--repeat', type=int, default=3, help='Число повторов (берется лучшее время)')
+    parser.add_argument('--top', type=int, default=8, help='Сколько самых дорогих импортов показать')
+    parser.add_argument('--commands', nargs='+', default=list(COMMANDS), choices=list(COMMANDS),
+                        metavar='COMMAND', help='Какие команды замерять')
+    parser.add_argument('--jira', action='store_true',
+                        help='Замерить загрузку из JIRA (вместо времени запуска)')
+    parser.add_argument('--jira-tickets', type=int, default=20000, help='Заявок на имитации JIRA')
+    parser.add_argument('--jira-latency', type=float, default=0.02, help='Задержка ответа имитации, с')
+    parser.add_argument('--csv', action='store_true',
+                        help='Замерить чтение полной выгрузки (вместо времени запуска)')
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        benchmark_csv(repeat=args.repeat)
+        return
+    if args.jira:
+        benchmark_jira(args.jira_tickets, args.jira_latency)
+        return
+
+    print("=" * 70)
+    print(" ЗАМЕР ВРЕМЕНИ ЗАПУСКА")
+    print("=" * 70)
+
+    for name in args.commands:
+        wall, imports, packages = run_command(COMMANDS[name], args.repeat)
+        total_ms = sum(imports.values()) / 1000
+        heavy = [module for module in HEAVY if module in packages]
+
+        print(f"\n⏱ {name}: {wall:.2f} с (импорты: {total_ms:.0f} мс)")
+        print(f"  Тяжелые библиотеки: {', '.join(heavy) if heavy else 'нет'}")
+        for module, us in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {module:<30} {us / 1000:8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
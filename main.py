@@ -4,96 +4,364 @@
 """
 A/B-тестирование эффективности новой инструкции для мультимедийных систем
 Петербургский политехнический университет
+
+Примеры запуска:
+    python main.py                                   # загрузка, анализ, графики
+    python main.py --stages load,analyze             # быстрый запуск без графиков
+    python main.py --data "data/export_*.csv" --chunk-size 50000
+    python main.py --formats png --dpi 150 --run-id auto
+    python main.py --config run.toml                 # параметры из TOML-файла
+    python main.py --infer-categories missing        # категории проблем по тексту заявок
+    python main.py --dedup drop                      # анализ по инцидентам, без повторных заявок
+    python main.py --stages load,analyze,hte,plot    # где инструкция работает: эффект по подгруппам
+    python main.py --stages load,analyze,did,plot --did-post-start 2025-10-15
+                                                     # разность разностей до/после запуска
+    python main.py --ticket-db reports/tickets.db    # выгрузка -> SQLite, агрегаты через SQL
+    python main.py --ticket-db reports/tickets.db --from-db   # анализ по базе без CSV
+    python main.py --ticket-db reports/tickets.db --jira-url https://jira.example.ru
+                                                     # новые заявки из JIRA -> база -> анализ
+    python main.py --golden-save reports/golden.json # эталон результатов для seed 42, 123, 2025
+    python main.py --golden-check reports/golden.json   # сверка с эталоном после оптимизаций
+
+В TOML-файле ключи совпадают с опциями командной строки:
+    data = ["data/export_*.csv"]
+    stages = "load,analyze,validate"
+    workers = 8
+    formats = ["png"]
+    dpi = 150
+    output-dir = "reports/nightly"
+    run-id = "auto"
+Опции командной строки имеют приоритет над файлом.
 """
 
+import os
 import sys
+import argparse
+from datetime import datetime
+from dataclasses import replace
 from pathlib import Path
 
 # Добавляем путь к нашим модулям
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.config import config
-from src.data_loader import JiraDataLoader
-from src.analysis import ABTestAnalyzer
-from src.visualization import ABTestVisualizer
-from src.utils import save_results, print_header, print_success, print_warning, print_error
+from src.pipeline import PipelineRunner, build_ab_test_stages, drop_stages
+from src.utils import print_header, print_success, print_warning, print_error
+
+STAGES = ('load', 'analyze', 'validate', 'bayes', 'survival', 'ratio', 'hte', 'did', 'plot')
+DEFAULT_STAGES = 'load,analyze,plot'
+
+def load_toml(path):
+    """Параметры запуска из TOML-файла (ключи — имена опций)"""
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+
+    with open(path, 'rb') as f:
+        data = tomllib.load(f)
+    return {key.replace('-', '_'): value for key, value in data.items()}
+
+def parse_stages(value):
+    """'load,analyze' или ['load', 'analyze'] -> множество этапов"""
+    items = value.split(',') if isinstance(value, str) else value
+    stages = {item.strip() for item in items if item.strip()}
+    unknown = stages - set(STAGES)
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"неизвестные этапы: {', '.join(sorted(unknown))} (доступны: {', '.join(STAGES)})")
+    return stages
+
+def build_parser():
+    """Аргументы командной строки"""
+    parser = argparse.ArgumentParser(description='A/B-тест эффективности новой инструкции')
+    parser.add_argument('--config', type=str, default=None,
+                        help='TOML-файл с параметрами запуска (ключи как у опций)')
+
+    # Входные данные
+    parser.add_argument('--data', nargs='+', default=None, metavar='PATH',
+                        help='CSV-выгрузки JIRA: пути или glob-шаблоны (по умолчанию: DATA_PATH из config)')
+    parser.add_argument('--daily-data', type=str, default=None, metavar='PATH',
+                        help='CSV с ежедневной статистикой')
+    parser.add_argument('--lessons', type=str, default=None, metavar='PATH',
+                        help='CSV с часами занятий по аудиториям (для метрики заявок на час занятий)')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Читать CSV блоками по N строк')
+    parser.add_argument('--alpha', type=float, default=None,
+                        help='Уровень значимости (по умолчанию: 0.05)')
+    parser.add_argument('--arms', nargs='+', default=None, metavar='LABEL',
+                        help='A/B/n: метки всех групп в выгрузке по порядку, первая — контроль')
+    parser.add_argument('--comparisons', choices=['control', 'pairwise'], default=None,
+                        help='A/B/n: сравнения с контролем или все пары (по умолчанию: control)')
+    parser.add_argument('--correction', choices=['holm', 'dunnett'], default=None,
+                        help='A/B/n: поправка на множественные сравнения (по умолчанию: holm)')
+
+    # Этапы и параллельность
+    parser.add_argument('--stages', type=parse_stages, default=DEFAULT_STAGES,
+                        help=f'Этапы через запятую из {", ".join(STAGES)} (по умолчанию: {DEFAULT_STAGES})')
+    parser.add_argument('--validate', action='store_true',
+                        help='Проверить допущения теста (то же, что добавить validate в --stages)')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='Без графиков: matplotlib и seaborn не импортируются (быстрый запуск)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Число потоков для параллельных этапов (по умолчанию: 4)')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Папка кэша (бутстрап-реплики на диске для повторного использования)')
+
+    # Результаты
+    parser.add_argument('--output-dir', type=str, default=None,
+                        help='Папка для результатов (по умолчанию: reports)')
+    parser.add_argument('--run-id', type=str, default=None,
+                        help='Подпапка запуска внутри --output-dir; "auto" — время и PID процесса')
+    parser.add_argument('--formats', nargs='+', default=None, metavar='FMT',
+                        help='Форматы графиков (по умолчанию: png pdf)')
+    parser.add_argument('--dpi', type=int, default=None,
+                        help='Разрешение графиков (по умолчанию: 300)')
+    parser.add_argument('--store', action='store_true',
+                        help='Дописать запуск в хранилище результатов <output-dir>/store (JSON + .npy)')
+    parser.add_argument('--segment-by', type=str, default=None,
+                        help='Колонка для дашбордов по сегментам (например, "Кафедра")')
+    parser.add_argument('--segment-report', nargs='+', default=None, metavar='COLUMN',
+                        help='Многостраничный PDF с мини-графиками по сегментам (например, "Кафедра" "Component/s")')
+    parser.add_argument('--html', action='store_true',
+                        help='Интерактивный HTML-отчет <output-dir>/ab_test_report.html (с --segment-by — по сегментам)')
+    parser.add_argument('--infer-categories', choices=['missing', 'always'], default=None,
+                        help='Категории проблем по тексту заявок: missing — только пустые, always — все')
+    parser.add_argument('--dedup', choices=['report', 'drop'], default=None,
+                        help='Повторные заявки: report — посчитать, drop — анализ по одной заявке на инцидент')
+    parser.add_argument('--dedup-window', type=float, default=None, metavar='HOURS',
+                        help='Окно поиска повторов в часах (по умолчанию: 24)')
+    parser.add_argument('--did-post-start', type=str, default=None, metavar='DATE',
+                        help='Этап did: дата начала пост-периода, например 2025-10-15 (по умолчанию: середина периода)')
+    parser.add_argument('--ticket-db', type=str, default=None,
+                        help='База заявок SQLite: выгрузка дописывается (upsert), агрегаты считаются запросами')
+    parser.add_argument('--from-db', action='store_true',
+                        help='Анализ только по базе --ticket-db, без чтения CSV-выгрузок')
+    parser.add_argument('--jira-url', type=str, default=None,
+                        help='Загрузить новые и измененные заявки из JIRA REST API в --ticket-db '
+                             'и анализировать базу (токен — в переменной окружения JIRA_TOKEN)')
+    parser.add_argument('--jira-jql', type=str, default=None,
+                        help='JQL-запрос заявок эксперимента (по умолчанию: "project = MMC")')
+    parser.add_argument('--manifest', type=str, default=None,
+                        help='JSON-манифест с несколькими экспериментами (запуск в отдельных процессах)')
+    golden = parser.add_mutually_exclusive_group()
+    golden.add_argument('--golden-save', type=str, default=None, metavar='PATH',
+                        help='Сохранить эталон: все результаты анализа синтетических выгрузок в JSON')
+    golden.add_argument('--golden-check', type=str, default=None, metavar='PATH',
+                        help='Повторить анализ и сравнить с эталоном (код возврата 1 при расхождениях)')
+    parser.add_argument('--golden-seeds', type=int, nargs='+', default=None, metavar='SEED',
+                        help='Seed генератора для эталона (по умолчанию: 42 123 2025)')
+    parser.add_argument('--golden-tickets', type=int, default=None,
+                        help='Заявок в каждой синтетической выгрузке эталона (по умолчанию: 300)')
+    parser.add_argument('--golden-rtol', type=float, default=None,
+                        help='Относительный допуск сравнения с эталоном (по умолчанию: 1e-9)')
+    parser.add_argument('--golden-atol', type=float, default=None,
+                        help='Абсолютный допуск сравнения с эталоном (по умолчанию: 1e-12)')
+    parser.add_argument('--golden-tolerance', nargs=2, action='append', default=None, metavar=('PATTERN', 'RTOL'),
+                        help='Свой относительный допуск для путей по шаблону, например "analysis.bayesian.*" 1e-3')
+    return parser
+
+def parse_args(argv=None):
+    """Аргументы: значения по умолчанию <- TOML-файл <- командная строка"""
+    parser = build_parser()
+
+    pre, _ = parser.parse_known_args(argv)
+    if pre.config:
+        options = load_toml(pre.config)
+        unknown = set(options) - set(vars(pre))
+        if unknown:
+            parser.error(f"{pre.config}: неизвестные параметры: {', '.join(sorted(unknown))}")
+        if 'stages' in options:
+            options['stages'] = parse_stages(options['stages'])
+        parser.set_defaults(**options)
+
+    args = parser.parse_args(argv)
+    if isinstance(args.stages, str):
+        args.stages = parse_stages(args.stages)
+    if args.validate:
+        args.stages.add('validate')
+    if args.no_plots:
+        args.stages.discard('plot')
+    if args.jira_url:
+        args.from_db = True
+    if args.from_db and not args.ticket_db:
+        parser.error("--from-db и --jira-url требуют --ticket-db")
+    if isinstance(args.data, str):
+        args.data = [args.data]
+    if isinstance(args.formats, str):
+        args.formats = [args.formats]
+    if isinstance(args.arms, str):
+        args.arms = [args.arms]
+    return args
+
+def make_run_config(args):
+    """Копия настроек с учетом аргументов; отдельная папка для каждого запуска"""
+    overrides = {}
+    if args.data:
+        overrides['DATA_PATHS'] = tuple(args.data)
+    if args.daily_data is not None:
+        overrides['DAILY_DATA_PATH'] = args.daily_data
+    if args.lessons is not None:
+        overrides['LESSONS_PATH'] = args.lessons
+    if args.chunk_size is not None:
+        overrides['CHUNK_SIZE'] = args.chunk_size
+    if args.alpha is not None:
+        overrides['ALPHA'] = args.alpha
+    if args.arms:
+        overrides['ARM_LABELS'] = tuple(args.arms)
+    if args.comparisons:
+        overrides['MULTIARM_COMPARISONS'] = args.comparisons
+    if args.correction:
+        overrides['MULTIARM_CORRECTION'] = args.correction
+    if args.formats:
+        overrides['FIGURE_FORMATS'] = tuple(args.formats)
+    if args.dpi is not None:
+        overrides['FIGURE_DPI'] = args.dpi
+    if args.infer_categories:
+        overrides['INFER_CATEGORIES'] = args.infer_categories
+    if args.dedup:
+        overrides['DEDUP_MODE'] = args.dedup
+    if args.dedup_window is not None:
+        overrides['DEDUP_WINDOW_HOURS'] = args.dedup_window
+    if args.did_post_start:
+        overrides['DID_POST_START'] = args.did_post_start
+    if args.jira_url:
+        overrides['JIRA_URL'] = args.jira_url
+    if args.jira_jql:
+        overrides['JIRA_JQL'] = args.jira_jql
+
+    output_dir = Path(args.output_dir or config.OUTPUT_DIR)
+    if args.run_id:
+        run_id = f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}" if args.run_id == 'auto' else args.run_id
+        output_dir = output_dir / run_id
+    overrides['OUTPUT_DIR'] = str(output_dir)
+
+    return replace(config, **overrides)
 
-def main():
+def main(argv=None):
     """Запуск анализа A/B-теста"""
     
+    args = parse_args(argv)
+    run_config = make_run_config(args)
+    
     print_header("A/B-TEST: Анализ эффективности новой инструкции")
     print("Петербургский политехнический университет\n")
     
-    # ===== ШАГ 1: ЗАГРУЗКА ДАННЫХ =====
-    print("📁 ШАГ 1: Загрузка данных...")
-    loader = JiraDataLoader(config)
+    # ===== РЕЖИМ МАНИФЕСТА: несколько экспериментов =====
+    if args.manifest:
+        from src.experiments import load_manifest, run_manifest
+        specs = load_manifest(args.manifest)
+        summary = run_manifest(specs, run_config, workers=args.workers,
+                               validate='validate' in args.stages,
+                               plots='plot' in args.stages)
+        print("\n📋 Сводная таблица экспериментов:")
+        print(summary.to_string(index=False))
+        return
+    
+    # ===== РЕЖИМ ЭТАЛОНА: снимок результатов и проверка повторного запуска =====
+    if args.golden_save or args.golden_check:
+        from src import golden
+        if args.golden_save:
+            runner = golden.GoldenRunner(run_config, seeds=args.golden_seeds or golden.DEFAULT_SEEDS,
+                                         n_tickets=args.golden_tickets or golden.DEFAULT_TICKETS,
+                                         workers=args.workers)
+            runner.save(args.golden_save)
+            return
+        runner = golden.GoldenRunner.from_file(run_config, args.golden_check, workers=args.workers)
+        atol = args.golden_atol if args.golden_atol is not None else golden.DEFAULT_ATOL
+        tolerances = {pattern: (float(rtol), atol) for pattern, rtol in args.golden_tolerance or []}
+        matched = runner.check(rtol=args.golden_rtol if args.golden_rtol is not None else golden.DEFAULT_RTOL,
+                               atol=atol, tolerances=tolerances)
+        runner.print_summary()
+        if not matched:
+            sys.exit(1)
+        return
+    
+    # ===== ШАГИ 1-6: ЗАГРУЗКА, АНАЛИЗ, ГРАФИКИ, СОХРАНЕНИЕ =====
+    # Независимые этапы (например, ежедневная статистика и основной CSV,
+    # графики и сохранение JSON) выполняются параллельно
+    analyze = 'analyze' in args.stages
+    plots = 'plot' in args.stages
+    if 'validate' in args.stages and not analyze:
+        print_warning("Этап validate требует analyze — пропускаем проверку допущений")
+    for stage in ('bayes', 'survival', 'ratio', 'hte', 'did'):
+        if stage in args.stages and not analyze:
+            print_warning(f"Этап {stage} требует analyze — пропускаем его")
+    
+    # Хранилище общее для всех запусков, поэтому лежит вне папки --run-id
+    store_dir = str(Path(args.output_dir or config.OUTPUT_DIR) / "store") if args.store else None
+    stages, loader, analyzer = build_ab_test_stages(run_config, validate='validate' in args.stages,
+                                                    plots=plots,
+                                                    store_dir=store_dir, cache_dir=args.cache_dir,
+                                                    segment_by=args.segment_by,
+                                                    segment_report=args.segment_report,
+                                                    html=args.html,
+                                                    bayes='bayes' in args.stages,
+                                                    survival='survival' in args.stages,
+                                                    ratio='ratio' in args.stages,
+                                                    hte='hte' in args.stages,
+                                                    did='did' in args.stages,
+                                                    ticket_db=args.ticket_db, from_db=args.from_db,
+                                                    jira_workers=args.workers)
+    if not analyze:
+        stages = drop_stages(stages, ['analyze'])
+    runner = PipelineRunner(stages, max_workers=args.workers)
     
     try:
-        df = loader.load_data()
+        results = runner.run()
     except FileNotFoundError as e:
         print_error(f"Файл не найден: {e}")
         print("\nСкопируйте ваши CSV файлы в папку 'data':")
         print("  - jira_simple_export.csv")
         print("  - jira_daily_stats.csv (если есть)")
         return
-    
-    # Загружаем ежедневную статистику
-    df_daily = loader.load_daily_data()
-    
-    # ===== ШАГ 2: ОЧИСТКА ДАННЫХ =====
-    print("\n🧹 ШАГ 2: Очистка данных...")
-    df_clean = loader.clean_data()
-    
-    # ===== ШАГ 3: ПОДГОТОВКА К АНАЛИЗУ =====
-    print("\n📊 ШАГ 3: Подготовка данных для анализа...")
-    classroom_stats, category_stats = loader.prepare_for_analysis()
-    
-    # Проверяем, что данные загружены
-    if len(loader.group_a_tickets) == 0 or len(loader.group_b_tickets) == 0:
-        print_error("Не удалось получить данные по группам!")
+    except (ValueError, ConnectionError) as e:
+        print_error(str(e))
         return
     
     print_success(f"Группа A: {len(loader.group_a_tickets)} аудиторий")
     print_success(f"Группа B: {len(loader.group_b_tickets)} аудиторий")
-    
-    # ===== ШАГ 4: СТАТИСТИЧЕСКИЙ АНАЛИЗ =====
-    print("\n🔬 ШАГ 4: Статистический анализ...")
-    analyzer = ABTestAnalyzer(config)
-    results = analyzer.run_full_analysis(
-        loader.group_a_tickets,
-        loader.group_b_tickets,
-        category_stats
-    )
-    
-    # ===== ШАГ 5: ВИЗУАЛИЗАЦИЯ =====
-    print("\n🎨 ШАГ 5: Создание графиков...")
-    visualizer = ABTestVisualizer(config)
-    
-    # Создаем все графики
-    visualizer.plot_ticket_comparison(loader.group_a_tickets, loader.group_b_tickets)
-    visualizer.plot_category_heatmap(category_stats)
-    
-    if loader.df_daily is not None:
-        visualizer.plot_daily_trends(loader.df_daily)
-    
-    visualizer.plot_effect_size(results)
-    visualizer.create_dashboard(loader, analyzer)
-    
-    # ===== ШАГ 6: СОХРАНЕНИЕ РЕЗУЛЬТАТОВ =====
-    print("\n💾 ШАГ 6: Сохранение результатов...")
-    save_results(results, "ab_test_results.json")
+    runner.print_timings()
     
     # ===== ШАГ 7: ВЫВОД РЕЗУЛЬТАТОВ =====
-    print("\n📋 ШАГ 7: Результаты анализа:")
-    analyzer.print_summary()
+    output_dir = Path(run_config.OUTPUT_DIR)
+    validator = results.get('validate')
+    if analyze:
+        print("\n📋 ШАГ 7: Результаты анализа:")
+        analyzer.print_summary()
+        if validator is not None:
+            validator.print_summary()
+        if 'bayes' in results:
+            results['bayes'].print_summary()
+        if 'survival' in results:
+            results['survival'].print_summary()
+        if 'ratio' in results:
+            results['ratio'].print_summary()
+        if 'hte' in results:
+            results['hte'].print_summary()
+        if 'did' in results:
+            results['did'].print_summary()
     
     print("\n" + "="*70)
     print("✅ ПРОЕКТ УСПЕШНО ЗАВЕРШЕН!")
     print("="*70)
     print("\n📁 Созданные файлы:")
-    print("  • reports/figures/ - все графики")
-    print("  • reports/ab_test_results.json - результаты в JSON")
-    print("\n👉 Откройте папку reports/figures/ чтобы увидеть визуализации!")
+    if plots:
+        print(f"  • {output_dir / 'figures'}/ - все графики")
+    if analyze:
+        print(f"  • {output_dir / 'ab_test_results.json'} - результаты в JSON")
+    if validator is not None:
+        print(f"  • {output_dir / 'validation'}/ - проверка допущений")
+    if 'survival' in results and plots:
+        print(f"  • {output_dir / 'figures' / '08_survival.png'} - время до решения (Каплан-Мейер)")
+    if 'bayes' in results:
+        print(f"  • {output_dir / 'bayesian.csv'} - байесовский анализ (P(B лучше A), ожидаемые потери)")
+    if 'hte' in results:
+        print(f"  • {output_dir / 'hte.csv'} - эффект по подгруппам (p и q-значения)")
+    if 'did' in results:
+        print(f"  • {output_dir / 'did_event_study.csv'} - event study: эффект по периодам до/после запуска")
+    if plots:
+        print(f"\n👉 Откройте папку {output_dir / 'figures'}/ чтобы увидеть визуализации!")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
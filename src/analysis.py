@@ -9,6 +9,191 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def holm_adjust(p_values):
+    """Поправка Холма на множественные сравнения (векторно, без цикла)"""
+    
+    p_values = np.asarray(p_values, dtype=float)
+    m = len(p_values)
+    order = np.argsort(p_values)
+    adjusted_sorted = np.maximum.accumulate((m - np.arange(m)) * p_values[order])
+    adjusted = np.empty(m)
+    adjusted[order] = np.minimum(adjusted_sorted, 1.0)
+    return adjusted
+
+def bh_adjust(p_values):
+    """Поправка Бенджамини-Хохберга (контроль FDR): q-значения, векторно"""
+    
+    p_values = np.asarray(p_values, dtype=float)
+    m = len(p_values)
+    order = np.argsort(p_values)
+    # q_(i) = min по j >= i от m·p_(j) / j — накопленный минимум с конца
+    scaled = p_values[order] * m / np.arange(1, m + 1)
+    adjusted_sorted = np.minimum.accumulate(scaled[::-1])[::-1]
+    adjusted = np.empty(m)
+    adjusted[order] = np.minimum(adjusted_sorted, 1.0)
+    return adjusted
+
+def pad_groups(groups):
+    """Выборки разной длины -> матрица (выборки x max n), недостающее — NaN
+    
+    Робастные оценки ниже принимают такие матрицы и считают все строки сразу.
+    """
+    
+    groups = [np.asarray(g, dtype=float) for g in groups]
+    out = np.full((len(groups), max((len(g) for g in groups), default=0)), np.nan)
+    for i, g in enumerate(groups):
+        out[i, :len(g)] = g
+    return out
+
+def _winsor_bounds(x, trim, axis=-1):
+    """Размер, число отсекаемых с каждой стороны и границы винзоризации по оси
+    
+    Порядковые статистики — np.partition (O(n), без полной сортировки). NaN
+    уходят в конец, поэтому у строки с n значениями позиции 0..n-1 — ее значения;
+    все нужные позиции всех строк передаются в partition одним вызовом.
+    """
+    
+    x = np.moveaxis(np.asarray(x, dtype=float), axis, -1)
+    n = np.sum(~np.isnan(x), axis=-1)
+    g = np.floor(trim * n).astype(int)
+    lo_idx, hi_idx = g, np.maximum(n - g - 1, 0)
+    
+    if not x.shape[-1]:
+        part = x
+    elif np.all(n == x.shape[-1]):
+        # Одинаковый размер строк: два partition с одной позицией быстрее одного с двумя;
+        # второй — только по значениям правее нижней границы
+        lo, hi = int(lo_idx.flat[0]), int(hi_idx.flat[0])
+        part = np.partition(x, lo, axis=-1)
+        if hi > lo:
+            part[..., lo + 1:] = np.partition(part[..., lo + 1:], hi - lo - 1, axis=-1)
+    else:
+        kth = np.unique(np.concatenate([lo_idx.ravel(), hi_idx.ravel()]))
+        part = np.partition(x, kth, axis=-1)
+    low = np.take_along_axis(part, lo_idx[..., None], axis=-1)[..., 0] if x.shape[-1] else np.full(n.shape, np.nan)
+    high = np.take_along_axis(part, hi_idx[..., None], axis=-1)[..., 0] if x.shape[-1] else np.full(n.shape, np.nan)
+    return part, n, g, low, high
+
+def winsorize(x, trim=0.2, axis=-1):
+    """Винзоризация: g = floor(trim·n) крайних значений с каждой стороны
+    заменяются ближайшими оставшимися (NaN сохраняются)"""
+    
+    _, n, g, low, high = _winsor_bounds(x, trim, axis)
+    x = np.moveaxis(np.asarray(x, dtype=float), axis, -1)
+    return np.moveaxis(np.clip(x, low[..., None], high[..., None]), -1, axis)
+
+def _clipped_sum(part, n, low, high):
+    """Сумма винзоризованных значений (порядок внутри строки не важен)"""
+    
+    clipped = np.clip(part, low[..., None], high[..., None])
+    if np.all(n == part.shape[-1]):
+        return clipped, clipped.sum(axis=-1)
+    clipped = np.where(np.isnan(part), 0.0, clipped)
+    return clipped, clipped.sum(axis=-1)
+
+def _trimmed_stats(x, trim, axis=-1, need_var=True):
+    """Размер, число отсеченных, усеченное среднее и винзоризованная дисперсия за один partition
+    
+    Сумма оставшихся после усечения = сумма винзоризованных - g·(нижняя + верхняя граница),
+    поэтому хватает двух порядковых статистик (совпадения значений учитываются верно).
+    """
+    
+    part, n, g, low, high = _winsor_bounds(x, trim, axis)
+    clipped, total = _clipped_sum(part, n, low, high)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (total - g * (low + high)) / (n - 2 * g)
+        if not need_var:
+            return n, g, mean, None
+        squares = (clipped - (total / n)[..., None]) ** 2
+        if not np.all(n == part.shape[-1]):
+            squares = np.where(np.isnan(part), 0.0, squares)
+        return n, g, mean, squares.sum(axis=-1) / (n - 1)
+
+def trimmed_mean(x, trim=0.2, axis=-1):
+    """Усеченное среднее: без g = floor(trim·n) наименьших и наибольших значений"""
+    
+    return _trimmed_stats(x, trim, axis, need_var=False)[2]
+
+def winsorized_var(x, trim=0.2, axis=-1):
+    """Винзоризованная дисперсия (ddof=1)"""
+    
+    return _trimmed_stats(x, trim, axis)[3]
+
+def yuen_test(group_a, group_b, trim=0.2, alpha=0.05, axis=-1):
+    """t-тест Юэна (Уэлча для усеченных средних) сразу для всех строк
+    
+    Знак t как у stats.ttest_ind(A, B, trim=trim), разница — B минус A.
+    """
+    
+    def moments(x):
+        n, g, mean, var = _trimmed_stats(x, trim, axis)
+        h = n - 2 * g
+        with np.errstate(invalid='ignore', divide='ignore'):
+            d = (n - 1) * var / (h * (h - 1))
+        return mean, d, h
+    
+    mean_a, d_a, h_a = moments(group_a)
+    mean_b, d_b, h_b = moments(group_b)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        se = np.sqrt(d_a + d_b)
+        df = (d_a + d_b) ** 2 / (d_a ** 2 / (h_a - 1) + d_b ** 2 / (h_b - 1))
+        diff = mean_b - mean_a
+        t_stat = -diff / se
+    p_value = 2 * stats.t.sf(np.abs(t_stat), df)
+    margin = stats.t.ppf(1 - alpha / 2, df) * se
+    
+    return {
+        'trimmed_mean_a': mean_a,
+        'trimmed_mean_b': mean_b,
+        'mean_diff': diff,
+        't_statistic': t_stat,
+        'df': df,
+        'p_value': p_value,
+        'ci_lower': diff - margin,
+        'ci_upper': diff + margin
+    }
+
+def huber_location(x, c=1.345, axis=-1, tol=1e-8, max_iter=100):
+    """M-оценка положения Хьюбера и ее асимптотическая ошибка для всех строк сразу
+    
+    Масштаб — нормированное MAD (медиана через np.nanmedian — тоже partition),
+    положение — итеративно перевзвешенное среднее с весами min(1, c / |r|).
+    """
+    
+    x = np.moveaxis(np.asarray(x, dtype=float), axis, -1)
+    valid = ~np.isnan(x)
+    n = valid.sum(axis=-1)
+    full = bool(valid.all())
+    median = np.median if full else np.nanmedian
+    mu = median(x, axis=-1)
+    scale = 1.4826 * median(np.abs(x - mu[..., None]), axis=-1)
+    # Без разброса по MAD (больше половины значений совпадают) — обычное стандартное отклонение
+    scale = np.where(scale > 0, scale, np.nanstd(x, axis=-1, ddof=1))
+    scale = np.where(scale > 0, scale, 1.0)
+    if not full:
+        x = np.where(valid, x, 0.0)
+    
+    for _ in range(max_iter):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            w = np.minimum(1.0, c * scale[..., None] / np.abs(x - mu[..., None]))
+        if not full:
+            w *= valid
+        new_mu = (w * x).sum(axis=-1) / w.sum(axis=-1)
+        done = np.all(np.abs(new_mu - mu) <= tol * scale)
+        mu = new_mu
+        if done:
+            break
+    
+    r = (x - mu[..., None]) / scale[..., None]
+    psi_sq = np.minimum(r ** 2, c ** 2)
+    inside = (np.abs(r) <= c).astype(float)
+    if not full:
+        psi_sq *= valid
+        inside *= valid
+    with np.errstate(invalid='ignore', divide='ignore'):
+        se = scale * np.sqrt(psi_sq.sum(axis=-1) / n / (inside.sum(axis=-1) / n) ** 2 / n)
+    return mu, se
+
 class ABTestAnalyzer:
     """Класс для проведения A/B-тестирования"""
     
@@ -86,6 +271,54 @@ class ABTestAnalyzer:
         
         return results
     
+    def run_robust_tests(self, group_a, group_b, axis=-1):
+        """Робастное сравнение: усеченные средние (тест Юэна), винзоризованное
+        стандартное отклонение и M-оценка Хьюбера
+        
+        group_a, group_b — выборки или матрицы (строки — метрики/сегменты,
+        недостающее — NaN, см. pad_groups); все строки считаются сразу.
+        Одна «шумная» аудитория сдвигает эти оценки не больше, чем на
+        ограниченную величину, в отличие от среднего.
+        """
+        
+        trim, c = self.config.ROBUST_TRIM, self.config.HUBER_C
+        yuen = yuen_test(group_a, group_b, trim, self.config.ALPHA, axis)
+        
+        huber_a, se_a = huber_location(group_a, c, axis)
+        huber_b, se_b = huber_location(group_b, c, axis)
+        huber_diff = huber_b - huber_a
+        huber_se = np.sqrt(se_a ** 2 + se_b ** 2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            huber_z = -huber_diff / huber_se
+        huber_p = 2 * stats.norm.sf(np.abs(huber_z))
+        z = stats.norm.ppf(1 - self.config.ALPHA / 2)
+        
+        return {
+            'trim': trim,
+            'yuen': {
+                'trimmed_mean_a': yuen['trimmed_mean_a'],
+                'trimmed_mean_b': yuen['trimmed_mean_b'],
+                'winsorized_std_a': np.sqrt(winsorized_var(group_a, trim, axis)),
+                'winsorized_std_b': np.sqrt(winsorized_var(group_b, trim, axis)),
+                'mean_diff': yuen['mean_diff'],
+                't_statistic': yuen['t_statistic'],
+                'df': yuen['df'],
+                'p_value': yuen['p_value'],
+                'significant': yuen['p_value'] < self.config.ALPHA,
+                'confidence_interval': (yuen['ci_lower'], yuen['ci_upper'])
+            },
+            'huber': {
+                'c': c,
+                'location_a': huber_a,
+                'location_b': huber_b,
+                'mean_diff': huber_diff,
+                'z_statistic': huber_z,
+                'p_value': huber_p,
+                'significant': huber_p < self.config.ALPHA,
+                'confidence_interval': (huber_diff - z * huber_se, huber_diff + z * huber_se)
+            }
+        }
+    
     def run_full_analysis(self, group_a, group_b, category_stats):
         """ШАГ 3: Полный анализ"""
         
@@ -101,21 +334,174 @@ class ABTestAnalyzer:
         print(f"   p-значение: {ttest['p_value']:.4f}")
         print(f"   Статистически значимо: {ttest['significant']}")
         
-        # 3. Собираем результаты
+        # 3. Робастные оценки: выбросы отдельных аудиторий не решают исход
+        robust = self.run_robust_tests(np.asarray(group_a, dtype=float), np.asarray(group_b, dtype=float))
+        print(f"   Юэн ({robust['trim']:.0%} усечение): p = {robust['yuen']['p_value']:.4f}, "
+              f"Хьюбер: p = {robust['huber']['p_value']:.4f}")
+        
+        # 4. Собираем результаты
         self.results = {
             'descriptive_stats': descriptive,
             'ttest': ttest,
+            'robust': robust,
             'sample_sizes': {
                 'group_a': len(group_a),
                 'group_b': len(group_b)
             }
         }
         
-        # 4. Генерируем вывод
+        # 5. Генерируем вывод
         self.results['conclusion'] = self._generate_conclusion()
         
         return self.results
     
+    def analyze_segments(self, segments):
+        """Описательная статистика и t-тест по каждому сегменту (без вывода в консоль)
+        
+        Сегменты, где в одной из групп меньше двух аудиторий, пропускаются.
+        """
+        
+        segment_results = {}
+        for name, data in segments.items():
+            group_a, group_b = data['group_a'], data['group_b']
+            if len(group_a) < 2 or len(group_b) < 2:
+                continue
+            segment_results[name] = {
+                'descriptive_stats': self.calculate_descriptive_stats(group_a, group_b),
+                'ttest': self.run_ttest(group_a, group_b),
+                'sample_sizes': {'group_a': len(group_a), 'group_b': len(group_b)}
+            }
+        
+        # Робастные тесты — для всех сегментов одним вызовом (строки матрицы)
+        if segment_results:
+            names = list(segment_results)
+            robust = self.run_robust_tests(pad_groups([segments[name]['group_a'] for name in names]),
+                                           pad_groups([segments[name]['group_b'] for name in names]))
+            for i, name in enumerate(names):
+                segment_results[name]['robust'] = self._robust_row(robust, i)
+        
+        return segment_results
+    
+    @staticmethod
+    def _robust_row(robust, i):
+        """i-я строка пакетного результата run_robust_tests"""
+        
+        def pick(value):
+            if isinstance(value, tuple):
+                return tuple(pick(item) for item in value)
+            return value[i] if isinstance(value, np.ndarray) else value
+        
+        row = {'trim': robust['trim']}
+        for method in ('yuen', 'huber'):
+            row[method] = {key: pick(value) for key, value in robust[method].items()}
+        return row
+    
+    def calculate_arm_moments(self, arm_tickets):
+        """Размер, среднее и дисперсия всех групп за один проход (np.bincount)"""
+        
+        arms = list(arm_tickets)
+        values = np.concatenate([np.asarray(arm_tickets[arm], dtype=float) for arm in arms])
+        codes = np.repeat(np.arange(len(arms)), [len(arm_tickets[arm]) for arm in arms])
+        
+        n = np.bincount(codes, minlength=len(arms)).astype(float)
+        sums = np.bincount(codes, weights=values, minlength=len(arms))
+        sums_sq = np.bincount(codes, weights=values ** 2, minlength=len(arms))
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums / n
+            var = (sums_sq - n * mean ** 2) / (n - 1)
+        
+        return arms, n, mean, np.maximum(var, 0)
+    
+    def run_multiarm_tests(self, arms, n, mean, var, pairs):
+        """t-тесты Уэлча для всех пар сразу (массивы вместо цикла)
+        
+        pairs — индексы (контроль, вариант). Знак t как у stats.ttest_ind(контроль, вариант),
+        разница средних — вариант минус контроль.
+        """
+        
+        i, j = np.asarray(pairs).T
+        var_i, var_j = var[i] / n[i], var[j] / n[j]
+        se = np.sqrt(var_i + var_j)
+        df = (var_i + var_j) ** 2 / (var_i ** 2 / (n[i] - 1) + var_j ** 2 / (n[j] - 1))
+        diff = mean[j] - mean[i]
+        t_stat = -diff / se
+        p_value = 2 * stats.t.sf(np.abs(t_stat), df)
+        margin = stats.t.ppf(1 - self.config.ALPHA / 2, df) * se
+        
+        return {
+            'arm': [arms[k] for k in j],
+            'vs': [arms[k] for k in i],
+            'mean_diff': diff,
+            'relative_diff': diff / mean[i] * 100,
+            't_statistic': t_stat,
+            'df': df,
+            'p_value': p_value,
+            'ci_lower': diff - margin,
+            'ci_upper': diff + margin
+        }
+    
+    def run_multiarm_analysis(self, arm_tickets, control=None, comparisons=None, correction=None):
+        """A/B/n: сравнение всех групп с контролем (или всех пар) с поправкой Холма или Даннета"""
+        
+        control = control or self.config.CONTROL_ARM
+        comparisons = comparisons or self.config.MULTIARM_COMPARISONS
+        correction = correction or self.config.MULTIARM_CORRECTION
+        
+        arm_tickets = {arm: values for arm, values in arm_tickets.items() if len(values) >= 2}
+        if control not in arm_tickets:
+            raise ValueError(f"В контрольной группе {control} меньше двух аудиторий")
+        if correction == 'dunnett' and comparisons != 'control':
+            raise ValueError("Поправка Даннета применяется только к сравнениям с контролем")
+        
+        print(f"\n🔬 Сравнение {len(arm_tickets)} групп ({comparisons}, поправка: {correction})...")
+        
+        arms, n, mean, var = self.calculate_arm_moments(arm_tickets)
+        c = arms.index(control)
+        if comparisons == 'control':
+            pairs = [(c, k) for k in range(len(arms)) if k != c]
+        else:
+            pairs = [(a, b) for a in range(len(arms)) for b in range(a + 1, len(arms))]
+        
+        tests = self.run_multiarm_tests(arms, n, mean, var, pairs)
+        
+        if correction == 'dunnett':
+            # Даннет учитывает корреляцию сравнений с общим контролем (равные дисперсии)
+            others = [arm_tickets[arms[k]] for _, k in pairs]
+            dunnett = stats.dunnett(*others, control=arm_tickets[control], random_state=42)
+            p_adjusted = dunnett.pvalue
+        else:
+            p_adjusted = holm_adjust(tests['p_value'])
+        
+        comparison_rows = []
+        for k in range(len(pairs)):
+            row = {key: values[k] for key, values in tests.items()}
+            row['confidence_interval'] = (row.pop('ci_lower'), row.pop('ci_upper'))
+            row['p_adjusted'] = p_adjusted[k]
+            row['significant'] = p_adjusted[k] < self.config.ALPHA
+            comparison_rows.append(row)
+        
+        results = {
+            'arms': arms,
+            'control': control,
+            'comparisons_mode': comparisons,
+            'correction': correction,
+            'moments': {
+                arm: {'size': int(n[k]), 'mean': mean[k], 'std': np.sqrt(var[k]),
+                      'sem': np.sqrt(var[k] / n[k])}
+                for k, arm in enumerate(arms)
+            },
+            'comparisons': comparison_rows
+        }
+        
+        for row in comparison_rows:
+            mark = "✓" if row['significant'] else "·"
+            print(f"   {mark} {row['arm']} vs {row['vs']}: {row['relative_diff']:+.1f}%, "
+                  f"p = {row['p_value']:.4f}, p({correction}) = {row['p_adjusted']:.4f}")
+        
+        self.results['multiarm'] = results
+        return results
+    
     def _generate_conclusion(self):
         """ШАГ 4: Формируем текстовый вывод"""
         
@@ -151,4 +537,26 @@ class ABTestAnalyzer:
         if 'conclusion' in self.results:
             print(self.results['conclusion'])
         else:
-            print("Сначала выполните run_full_analysis()")
\ No newline at end of file
+            print("Сначала выполните run_full_analysis()")
+        
+        robust = self.results.get('robust')
+        if robust:
+            yuen, huber = robust['yuen'], robust['huber']
+            print("\n🛡 РОБАСТНЫЕ ОЦЕНКИ (устойчивы к выбросам отдельных аудиторий):")
+            print(f"   Усеченные средние ({robust['trim']:.0%} с каждой стороны): "
+                  f"A {yuen['trimmed_mean_a']:.2f}, B {yuen['trimmed_mean_b']:.2f}")
+            for title, row in (("Тест Юэна", yuen), (f"Хьюбер (c = {huber['c']})", huber)):
+                mark = "✅" if row['significant'] else "❌"
+                low, high = row['confidence_interval']
+                print(f"   {mark} {title}: разница {row['mean_diff']:+.2f} [{low:+.2f}; {high:+.2f}], "
+                      f"p = {row['p_value']:.4f}")
+        
+        multiarm = self.results.get('multiarm')
+        if multiarm:
+            print(f"\n📊 ВСЕ ГРУППЫ (поправка: {multiarm['correction']}):")
+            for arm, moments in multiarm['moments'].items():
+                print(f"   Группа {arm}: {moments['mean']:.1f} ± {moments['std']:.1f} заявок (n={moments['size']})")
+            for row in multiarm['comparisons']:
+                mark = "✅" if row['significant'] else "❌"
+                print(f"   {mark} {row['arm']} vs {row['vs']}: {row['relative_diff']:+.1f}%, "
+                      f"p = {row['p_adjusted']:.4f}")
\ No newline at end of file
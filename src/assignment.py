@@ -0,0 +1,255 @@
+"""
+Распределение аудиторий по группам для следующего запуска эксперимента
+
+В пилоте группы совпали с этажами (101–115 — A, 201–215 — B), и эффект
+инструкции нельзя отделить от этажа. Здесь аудитории распределяются
+случайно, но с контролем баланса:
+- стратификация: внутри каждой страты (например, кафедры) группы
+  чередуются блоками, поэтому размеры групп в страте отличаются не больше чем на 1;
+- перерандомизация: генерируются десятки тысяч вариантов сразу (матрица
+  варианты x аудитории), для каждого считается расстояние Махаланобиса между
+  средними ковариат групп, и выбирается самый сбалансированный вариант.
+
+Запуск:
+    python -m src.assignment --from-export data/jira_simple_export.csv
+    python -m src.assignment --inventory data/classrooms.csv --strata Кафедра --candidates 50000
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Максимум чисел в одном блоке (варианты x аудитории)
+MAX_BLOCK = 4_000_000
+
+
+def inventory_from_tickets(df, room_col='Аудитория', department_col='Кафедра', date_col='Created'):
+    """Список аудиторий по выгрузке: заявок в месяц, основная кафедра, корпус и этаж"""
+
+    created = pd.to_datetime(df[date_col], format='%d/%m/%Y %H:%M', errors='coerce')
+    months = max((created.max() - created.min()).days / 30.44, 1.0) if created.notna().any() else 1.0
+
+    inventory = df.groupby(room_col).size().rename('Заявок в месяц').div(months).round(2).to_frame()
+    if department_col in df.columns:
+        inventory[department_col] = df.groupby(room_col)[department_col].agg(lambda values: values.mode().iat[0])
+    inventory = inventory.reset_index()
+
+    # «Гл-108» -> корпус «Гл», этаж 1
+    parts = inventory[room_col].astype(str).str.extract(r'^(?P<building>\D*?)[-\s]*(?P<number>\d+)$')
+    inventory['Корпус'] = parts['building'].fillna('')
+    inventory['Этаж'] = parts['number'].str[:-2].replace('', '0').fillna('0')
+    return inventory
+
+
+def design_matrix(inventory, columns):
+    """Ковариаты: числовые как есть, категориальные — one-hot;
+    затем «отбеливание», чтобы евклидово расстояние стало расстоянием Махаланобиса"""
+
+    parts = []
+    for col in columns:
+        values = inventory[col]
+        if pd.api.types.is_numeric_dtype(values):
+            parts.append(values.to_numpy(dtype=float)[:, None])
+        else:
+            parts.append(pd.get_dummies(values.astype(str)).to_numpy(dtype=float))
+    x = np.hstack(parts) if parts else np.zeros((len(inventory), 0))
+    x = x - x.mean(axis=0)
+
+    # S^(-1/2) через собственные числа: one-hot колонки линейно зависимы, поэтому псевдообратная
+    cov = np.atleast_2d(np.cov(x, rowvar=False)) if x.shape[1] else np.zeros((0, 0))
+    eigval, eigvec = np.linalg.eigh(cov) if x.shape[1] else (np.zeros(0), np.zeros((0, 0)))
+    keep = eigval > 1e-10 * max(eigval.max(initial=0.0), 1e-300)
+    whitening = eigvec[:, keep] / np.sqrt(eigval[keep])
+    return x @ whitening
+
+
+def random_assignments(strata, n_arms, n_candidates, rng):
+    """Матрица (варианты x аудитории) с номерами групп 0..n_arms-1
+
+    Внутри страты аудитории случайно упорядочиваются и группы назначаются
+    по кругу со случайным сдвигом (блочная рандомизация): в каждой страте
+    размеры групп отличаются не больше чем на 1.
+    """
+
+    n = len(strata)
+    codes, _ = pd.factorize(pd.Series(strata))
+    n_strata = codes.max() + 1
+
+    # Сортировка по «номер страты + случайное число из [0, 1)» группирует страты
+    keys = codes[None, :] + rng.random((n_candidates, n))
+    order = np.argsort(keys, axis=1)
+
+    starts = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n_strata))[:-1]])
+    sorted_strata = np.sort(codes)
+    rank = np.arange(n) - starts[sorted_strata]
+    offset = rng.integers(0, n_arms, (n_candidates, n_strata))
+    arms_sorted = (rank[None, :] + offset[:, sorted_strata]) % n_arms
+
+    arms = np.empty_like(arms_sorted)
+    np.put_along_axis(arms, order, arms_sorted, axis=1)
+    return arms
+
+
+def balance_distance(arms, z, n_arms):
+    """Дисбаланс каждого варианта: Σ_k n_k·||z̄_k - z̄||² в отбеленных ковариатах
+
+    Для двух групп это расстояние Махаланобиса между средними групп
+    (n_A·n_B/n)·(x̄_A - x̄_B)'S⁻¹(x̄_A - x̄_B). Средние по группам для всех
+    вариантов — одним матричным умножением.
+    """
+
+    distance = np.zeros(arms.shape[0])
+    for arm in range(n_arms):
+        member = (arms == arm).astype(float)
+        counts = member.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = (member @ z) / counts[:, None]
+        # z центрированы, поэтому общее среднее — ноль
+        distance += counts * np.nansum(means ** 2, axis=1)
+    return distance
+
+
+class ClassroomAssigner:
+    """Стратифицированная перерандомизация аудиторий по группам"""
+
+    def __init__(self, config, n_candidates=50000, seed=42):
+        self.config = config
+        self.n_candidates = n_candidates
+        self.seed = seed
+        self.labels = list(config.ARM_LABELS or (config.GROUP_A_LABEL, config.GROUP_B_LABEL))
+        self.result = {}
+
+    def assign(self, inventory, balance_cols, strata_col=None, accept=0.0):
+        """Лучший по балансу из n_candidates вариантов
+
+        accept > 0 — вместо лучшего варианта берется случайный из доли accept
+        самых сбалансированных (перерандомизация по Моргану и Рубину: так
+        сохраняется корректность рандомизационного вывода).
+        """
+
+        print(f"\n🎲 Распределяем {len(inventory)} аудиторий: {self.n_candidates} вариантов"
+              f"{f', страты: {strata_col}' if strata_col else ''}, баланс: {', '.join(balance_cols)}")
+
+        rng = np.random.default_rng(self.seed)
+        n_arms = len(self.labels)
+        z = design_matrix(inventory, balance_cols)
+        strata = inventory[strata_col].astype(str).to_numpy() if strata_col else np.zeros(len(inventory))
+
+        block = max(MAX_BLOCK // max(len(inventory), 1), 1)
+        distances, candidates = [], []
+        for start in range(0, self.n_candidates, block):
+            arms = random_assignments(strata, n_arms, min(block, self.n_candidates - start), rng)
+            dist = balance_distance(arms, z, n_arms)
+            # Из блока храним только лучшие варианты, чтобы не держать всю матрицу
+            top = np.argsort(dist)[:max(int(np.ceil(accept * len(dist))), 1)]
+            distances.append(dist)
+            candidates.append((dist[top], arms[top]))
+
+        distances = np.concatenate(distances)
+        best_dist = np.concatenate([dist for dist, _ in candidates])
+        best_arms = np.concatenate([arms for _, arms in candidates])
+        if accept > 0:
+            threshold = np.quantile(distances, accept)
+            pool = np.nonzero(best_dist <= threshold)[0]
+            chosen = rng.choice(pool)
+        else:
+            chosen = int(np.argmin(best_dist))
+
+        assigned = inventory.copy()
+        assigned[self.config.COLUMN_GROUP] = np.array(self.labels)[best_arms[chosen]]
+
+        self.result = {
+            'distance': float(best_dist[chosen]),
+            'median_distance': float(np.median(distances)),
+            'candidates': int(len(distances)),
+            'balance': self.balance_table(assigned, balance_cols),
+        }
+        print(f"✓ Дисбаланс выбранного варианта: {self.result['distance']:.3f} "
+              f"(медиана по вариантам {self.result['median_distance']:.3f})")
+        return assigned
+
+    def balance_table(self, assigned, balance_cols):
+        """Стандартизованная разница средних (SMD) ковариат между группами и контролем"""
+
+        group_col = self.config.COLUMN_GROUP
+        control = self.labels[0]
+        rows = []
+        for col in balance_cols:
+            values = assigned[col]
+            if pd.api.types.is_numeric_dtype(values):
+                frame = values.to_frame(col)
+            else:
+                frame = pd.get_dummies(values.astype(str), prefix=col, prefix_sep=': ').astype(float)
+            sd = frame.std(ddof=1).replace(0, np.nan)
+            means = frame.groupby(assigned[group_col]).mean()
+            for arm in self.labels[1:]:
+                smd = (means.loc[arm] - means.loc[control]) / sd
+                rows += [{'covariate': name, 'arm': arm, 'mean_control': means.loc[control, name],
+                          'mean_arm': means.loc[arm, name], 'smd': smd[name]} for name in frame.columns]
+        return pd.DataFrame(rows)
+
+    def print_summary(self):
+        """Печать баланса в консоль"""
+
+        if not self.result:
+            print("Сначала выполните assign()")
+            return
+
+        table = self.result['balance']
+        print("\n" + "=" * 60)
+        print("БАЛАНС КОВАРИАТ (стандартизованная разница средних)")
+        print("=" * 60)
+        for _, row in table.iterrows():
+            mark = "✅" if abs(row['smd']) < 0.1 or np.isnan(row['smd']) else "⚠"
+            print(f"   {mark} {row['covariate']:<40} {row['arm']} vs контроль: {row['smd']:+.3f}")
+        print(f"\n   Максимум |SMD|: {table['smd'].abs().max():.3f}")
+        print("=" * 60)
+
+
+def main(argv=None):
+    from src.config import config
+    from src.jira_csv import read_jira_export
+
+    parser = argparse.ArgumentParser(description='Распределение аудиторий по группам A/B-теста')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--inventory', type=str, help='CSV со списком аудиторий и ковариатами')
+    source.add_argument('--from-export', type=str, help='Построить список аудиторий по выгрузке JIRA')
+    parser.add_argument('--balance', nargs='+', default=None, metavar='COLUMN',
+                        help='Ковариаты для баланса (по умолчанию: заявки в месяц, кафедра, корпус, этаж)')
+    parser.add_argument('--strata', type=str, default=None, help='Колонка для стратификации (например, Этаж)')
+    parser.add_argument('--candidates', type=int, default=50000, help='Число вариантов (по умолчанию: 50000)')
+    parser.add_argument('--accept', type=float, default=0.0,
+                        help='Случайный вариант из доли самых сбалансированных (0 — лучший)')
+    parser.add_argument('--arms', nargs='+', default=None, metavar='LABEL', help='Метки групп (по умолчанию: A B)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=None,
+                        help='Куда сохранить распределение (по умолчанию: <OUTPUT_DIR>/assignment.csv)')
+    args = parser.parse_args(argv)
+
+    if args.arms:
+        from dataclasses import replace
+        config = replace(config, ARM_LABELS=tuple(args.arms))
+
+    if args.inventory:
+        inventory = pd.read_csv(args.inventory, encoding='utf-8-sig', sep=None, engine='python')
+    else:
+        tickets, _ = read_jira_export(args.from_export)
+        inventory = inventory_from_tickets(tickets)
+
+    balance = args.balance or [col for col in ('Заявок в месяц', 'Кафедра', 'Корпус', 'Этаж')
+                               if col in inventory.columns and inventory[col].nunique() > 1]
+
+    assigner = ClassroomAssigner(config, n_candidates=args.candidates, seed=args.seed)
+    assigned = assigner.assign(inventory, balance, strata_col=args.strata, accept=args.accept)
+    assigner.print_summary()
+
+    output = Path(args.output or Path(config.OUTPUT_DIR) / "assignment.csv")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    assigned.to_csv(output, index=False, encoding='utf-8-sig')
+    print(f"\n✓ Распределение сохранено в {output}")
+
+
+if __name__ == "__main__":
+    main()
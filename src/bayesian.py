@@ -0,0 +1,230 @@
+"""
+Байесовский анализ A/B-теста: сопряженные апостериорные распределения
+
+Модели (все считаются по достаточным статистикам):
+- заявки на аудиторию:  Пуассон + Гамма-априорное  -> Gamma(a0 + Σx, b0 + n)
+- доля решенных заявок: Биномиальное + Бета         -> Beta(a0 + k, b0 + n - k)
+- время решения:        Нормальное + Normal-Inverse-Gamma -> маргинально t-распределение
+
+Для сравнения групп берутся выборки из апостериорных распределений сразу для
+всех ячеек (метрика x сегмент) одной матрицей; P(B лучше A) для счетчиков
+считается точно через неполную бета-функцию.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+# Почти неинформативные априорные распределения
+GAMMA_PRIOR = (0.5, 1e-3)
+BETA_PRIOR = (1.0, 1.0)
+NIG_PRIOR = (0.0, 1e-3, 1e-3, 1e-3)  # mu0, kappa0, alpha0, beta0
+
+METRICS = {
+    # метрика: (модель, меньше — лучше, описание)
+    'tickets': ('gamma_poisson', True, 'Заявки на аудиторию'),
+    'resolution_rate': ('beta_binomial', False, 'Доля решенных заявок'),
+    'resolution_time': ('normal_nig', True, 'Время решения (часы)'),
+}
+
+OVERALL = 'Все аудитории'
+
+# Максимум чисел в одном блоке выборок (ячейки x выборки), чтобы не раздувать память
+MAX_BLOCK = 2_000_000
+
+
+def gamma_poisson_posterior(n, total, prior=GAMMA_PRIOR):
+    """Апостериорное Gamma(shape, rate) интенсивности по n аудиториям и сумме заявок"""
+    a0, b0 = prior
+    return a0 + np.asarray(total, dtype=float), b0 + np.asarray(n, dtype=float)
+
+
+def beta_binomial_posterior(successes, trials, prior=BETA_PRIOR):
+    """Апостериорное Beta(a, b) доли успехов"""
+    a0, b0 = prior
+    successes = np.asarray(successes, dtype=float)
+    return a0 + successes, b0 + np.asarray(trials, dtype=float) - successes
+
+
+def nig_posterior(n, mean, ss, prior=NIG_PRIOR):
+    """Апостериорные параметры Normal-Inverse-Gamma по n, среднему и сумме квадратов отклонений"""
+    mu0, kappa0, alpha0, beta0 = prior
+    n = np.asarray(n, dtype=float)
+    mean = np.nan_to_num(np.asarray(mean, dtype=float))
+    ss = np.nan_to_num(np.asarray(ss, dtype=float))
+
+    kappa = kappa0 + n
+    mu = (kappa0 * mu0 + n * mean) / kappa
+    alpha = alpha0 + n / 2
+    beta = beta0 + ss / 2 + kappa0 * n * (mean - mu0) ** 2 / (2 * kappa)
+    return mu, kappa, alpha, beta
+
+
+def gamma_prob_less(shape_b, rate_b, shape_a, rate_a):
+    """Точная P(λ_B < λ_A) для независимых гамма-распределений
+
+    W = b_B·λ_B / (b_A·λ_A + b_B·λ_B) ~ Beta(a_B, a_A), и λ_B < λ_A ⇔ W < b_B / (b_A + b_B).
+    """
+    return special.betainc(shape_b, shape_a, rate_b / (rate_a + rate_b))
+
+
+class BayesianABTest:
+    """Байесовское сравнение групп по нескольким метрикам и сегментам"""
+
+    def __init__(self, config, n_samples=20000, seed=42, credible=0.95):
+        self.config = config
+        self.n_samples = n_samples
+        self.seed = seed
+        self.credible = credible
+        self.results = None
+
+    # ===== Достаточные статистики =====
+
+    @staticmethod
+    def sufficient_stats(df_clean, segment_col=None):
+        """Достаточные статистики по (сегмент, группа) одним groupby
+
+        Заявки: число аудиторий и сумма заявок; решенные: число решенных и всего;
+        время: n, среднее и сумма квадратов отклонений.
+        """
+
+        from src.data_loader import JiraDataLoader
+
+        group_col = JiraDataLoader._find_column(df_clean, 'групп')
+        audience_col = JiraDataLoader._find_column(df_clean, 'аудитор')
+
+        df = df_clean[df_clean[group_col].isin(['A', 'B'])]
+        if segment_col is None:
+            df = df.assign(_segment=OVERALL)
+            segment_col = '_segment'
+
+        table = df.groupby([segment_col, group_col]).agg(
+            rooms=(audience_col, 'nunique'),
+            tickets=(audience_col, 'size'),
+            resolved=('is_resolved', 'sum'),
+            time_n=('time_resolution_hours', 'count'),
+            time_mean=('time_resolution_hours', 'mean'),
+            time_var=('time_resolution_hours', 'var'),
+        )
+        table['time_ss'] = table['time_var'].fillna(0) * (table['time_n'] - 1).clip(lower=0)
+        table = table.drop(columns='time_var')
+
+        # Ячейки: строки — сегменты, колонки — (статистика, группа)
+        wide = table.unstack(group_col, fill_value=0)
+        for stat in wide.columns.get_level_values(0).unique():
+            for arm in ('A', 'B'):
+                if (stat, arm) not in wide.columns:
+                    wide[(stat, arm)] = 0
+        wide.index.name = 'segment'
+        return wide
+
+    # ===== Выборки из апостериорных распределений =====
+
+    def _sample(self, model, stats, arm, size, rng):
+        """Матрица выборок (ячейки x size) для одной группы"""
+
+        if model == 'gamma_poisson':
+            shape, rate = gamma_poisson_posterior(stats[('rooms', arm)], stats[('tickets', arm)])
+            return rng.standard_gamma(shape[:, None], (len(shape), size)) / rate[:, None]
+
+        if model == 'beta_binomial':
+            a, b = beta_binomial_posterior(stats[('resolved', arm)], stats[('tickets', arm)])
+            return rng.beta(a[:, None], b[:, None], (len(a), size))
+
+        mu, kappa, alpha, beta = nig_posterior(stats[('time_n', arm)], stats[('time_mean', arm)],
+                                               stats[('time_ss', arm)])
+        # Маргинальное апостериорное среднего — t с 2α степенями свободы
+        scale = np.sqrt(beta / (alpha * kappa))
+        return mu[:, None] + scale[:, None] * rng.standard_t(2 * alpha[:, None], (len(mu), size))
+
+    def compare(self, model, stats, lower_is_better=True):
+        """P(B лучше A), ожидаемые потери и интервал разницы для всех ячеек сразу"""
+
+        stats = {key: np.asarray(values, dtype=float) for key, values in stats.items()}
+        n_cells = len(next(iter(stats.values())))
+        rng = np.random.default_rng(self.seed)
+        tail = (1 - self.credible) / 2
+
+        out = {name: np.empty(n_cells) for name in
+               ('mean_a', 'mean_b', 'prob_b_better', 'expected_loss_a', 'expected_loss_b',
+                'diff_low', 'diff_high')}
+
+        block = max(MAX_BLOCK // self.n_samples, 1)
+        for start in range(0, n_cells, block):
+            cells = slice(start, min(start + block, n_cells))
+            block_stats = {key: values[cells] for key, values in stats.items()}
+            theta_a = self._sample(model, block_stats, 'A', self.n_samples, rng)
+            theta_b = self._sample(model, block_stats, 'B', self.n_samples, rng)
+
+            diff = theta_b - theta_a
+            # Потери при выборе варианта: насколько он в среднем хуже другого
+            worse_b = np.maximum(diff, 0) if lower_is_better else np.maximum(-diff, 0)
+            worse_a = np.maximum(-diff, 0) if lower_is_better else np.maximum(diff, 0)
+
+            out['mean_a'][cells] = theta_a.mean(axis=1)
+            out['mean_b'][cells] = theta_b.mean(axis=1)
+            out['prob_b_better'][cells] = (diff < 0).mean(axis=1) if lower_is_better else (diff > 0).mean(axis=1)
+            out['expected_loss_a'][cells] = worse_a.mean(axis=1)
+            out['expected_loss_b'][cells] = worse_b.mean(axis=1)
+            out['diff_low'][cells], out['diff_high'][cells] = np.quantile(diff, [tail, 1 - tail], axis=1)
+
+        # Для счетчиков вероятность известна точно — заменяем оценку Монте-Карло
+        if model == 'gamma_poisson':
+            shape_a, rate_a = gamma_poisson_posterior(stats[('rooms', 'A')], stats[('tickets', 'A')])
+            shape_b, rate_b = gamma_poisson_posterior(stats[('rooms', 'B')], stats[('tickets', 'B')])
+            prob_less = gamma_prob_less(shape_b, rate_b, shape_a, rate_a)
+            out['prob_b_better'] = prob_less if lower_is_better else 1 - prob_less
+
+        return out
+
+    # ===== Полный анализ =====
+
+    def analyze(self, df_clean, segment_col=None, metrics=None):
+        """Таблица: метрика x сегмент -> апостериорные средние, P(B лучше A), потери
+
+        Первая строка каждой метрики — все аудитории, затем сегменты segment_col.
+        """
+
+        wide = self.sufficient_stats(df_clean)
+        if segment_col:
+            wide = pd.concat([wide, self.sufficient_stats(df_clean, segment_col)])
+        stats = {col: wide[col].to_numpy() for col in wide.columns}
+        # Ячейки без данных в одной из групп не оцениваются
+        empty = (stats[('rooms', 'A')] == 0) | (stats[('rooms', 'B')] == 0)
+
+        tables = []
+        for metric in metrics or METRICS:
+            model, lower_is_better, _ = METRICS[metric]
+            table = pd.DataFrame(self.compare(model, stats, lower_is_better), index=wide.index)
+            table[empty] = np.nan
+            table.insert(0, 'metric', metric)
+            tables.append(table.reset_index())
+
+        self.results = pd.concat(tables, ignore_index=True)
+        return self.results
+
+    def summary(self):
+        """Итог по всем аудиториям для JSON: {метрика: {...}}"""
+
+        overall = self.results[self.results['segment'] == OVERALL]
+        return {row['metric']: {key: row[key] for key in overall.columns if key not in ('metric', 'segment')}
+                for _, row in overall.iterrows()}
+
+    def print_summary(self):
+        """Печать результатов в консоль"""
+
+        if self.results is None:
+            print("Сначала выполните analyze()")
+            return
+
+        print("\n" + "=" * 60)
+        print("БАЙЕСОВСКИЙ АНАЛИЗ")
+        print("=" * 60)
+        for metric, row in self.summary().items():
+            _, _, title = METRICS[metric]
+            print(f"\n📐 {title}:")
+            print(f"   A: {row['mean_a']:.3f}   B: {row['mean_b']:.3f}")
+            print(f"   P(B лучше A) = {row['prob_b_better']:.3f}")
+            print(f"   Ожидаемые потери: выбрать A — {row['expected_loss_a']:.4f}, выбрать B — {row['expected_loss_b']:.4f}")
+            print(f"   {self.credible:.0%} интервал разницы B - A: [{row['diff_low']:.3f}, {row['diff_high']:.3f}]")
+        print("=" * 60)
@@ -0,0 +1,111 @@
+"""
+Бутстрап-реплики на диске: memory map с ключом по данным и seed
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Размер блока влияет на последовательность случайных чисел, поэтому он фиксирован:
+# реплики в памяти и в кэше совпадают один в один
+BOOTSTRAP_CHUNK = 1000
+
+
+def bootstrap_mean_diffs(group_a, group_b, n_resamples, seed, out=None):
+    """Разницы средних (B - A) по бутстрап-выборкам, блоками по BOOTSTRAP_CHUNK
+
+    out — куда писать реплики (обычный массив или np.memmap).
+    """
+
+    a = np.asarray(group_a, dtype=float)
+    b = np.asarray(group_b, dtype=float)
+    rng = np.random.default_rng(seed)
+
+    if out is None:
+        out = np.empty(n_resamples)
+
+    for start in range(0, n_resamples, BOOTSTRAP_CHUNK):
+        size = min(BOOTSTRAP_CHUNK, n_resamples - start)
+        idx_a = rng.integers(0, len(a), size=(size, len(a)))
+        idx_b = rng.integers(0, len(b), size=(size, len(b)))
+        out[start:start + size] = b[idx_b].mean(axis=1) - a[idx_a].mean(axis=1)
+
+    return out
+
+
+class BootstrapCache:
+    """Кэш бутстрап-реплик в .npy файлах, открываемых через memory map"""
+
+    def __init__(self, cache_dir="reports/cache/bootstrap"):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def make_key(group_a, group_b, n_resamples, seed, statistic='mean_diff'):
+        """Ключ: хэш данных групп + параметры бутстрапа"""
+
+        h = hashlib.sha1()
+        for values in (group_a, group_b):
+            array = np.ascontiguousarray(values, dtype=np.float64)
+            h.update(str(array.shape).encode())
+            h.update(array.tobytes())
+        h.update(f"{statistic}|{n_resamples}|{seed}|{BOOTSTRAP_CHUNK}".encode())
+        return h.hexdigest()[:20]
+
+    def path(self, key):
+        return self.cache_dir / f"{key}.npy"
+
+    def get(self, key):
+        """Готовые реплики (read-only memmap) или None"""
+
+        path = self.path(key)
+        meta_path = path.with_suffix('.json')
+        if not path.exists() or not meta_path.exists():
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def get_or_compute(self, group_a, group_b, n_resamples, seed):
+        """Реплики из кэша; если их нет — считаем блоками прямо в файл на диске"""
+
+        key = self.make_key(group_a, group_b, n_resamples, seed)
+        cached = self.get(key)
+        if cached is not None:
+            print(f"  ✓ Бутстрап из кэша: {self.path(key)}")
+            return cached
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+
+        # Уникальное имя временного файла: параллельные запуски с общим
+        # --cache-dir не перезаписывают реплики друг друга
+        tmp_path = self._temp_path(key, '.npy')
+        replicates = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float64, shape=(n_resamples,))
+        bootstrap_mean_diffs(group_a, group_b, n_resamples, seed, out=replicates)
+        replicates.flush()
+        del replicates
+
+        tmp_meta = self._temp_path(key, '.json')
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({
+                'statistic': 'mean_diff',
+                'n_resamples': n_resamples,
+                'seed': seed,
+                'n_a': len(group_a),
+                'n_b': len(group_b)
+            }, f)
+
+        # Файлы становятся видимыми только после полной записи; get() ждет оба,
+        # поэтому метаданные — последними
+        tmp_path.replace(path)
+        tmp_meta.replace(path.with_suffix('.json'))
+
+        print(f"  ✓ Бутстрап записан в кэш: {path}")
+        return np.load(path, mmap_mode='r')
+
+    def _temp_path(self, key, suffix):
+        fd, name = tempfile.mkstemp(prefix=f"{key}.", suffix=f".tmp{suffix}", dir=self.cache_dir)
+        os.close(fd)
+        return Path(name)
@@ -0,0 +1,148 @@
+"""
+Категории проблем по тексту заявки (Summary, при необходимости Description)
+
+Правила для всех категорий собраны в одно регулярное выражение с
+именованной группой на категорию: текст проходится один раз, побеждает
+самое раннее упоминание проблемы. Заголовки заявок в основном шаблонные,
+поэтому классифицируются только уникальные тексты (pd.factorize), а
+результаты запоминаются между пачками.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+OTHER = 'Другая проблема'
+
+# Категория -> регулярное выражение по нормализованному тексту
+# (нижний регистр, ё -> е); внутри только незахватывающие группы (?:...)
+CATEGORY_PATTERNS = {
+    'Не могу включить проектор':
+        r'не\s+(?:могу\s+|удается\s+)?включ\w*\s+проектор|проектор\w*\s+не\s+включ',
+    'Нет изображения на экране':
+        r'нет\s+изображени|изображени\w*\s+(?:нет|отсутству|пропал)|черный\s+экран|экран\w*\s+не\s+показ',
+    'Нет звука в аудиосистеме':
+        r'нет\s+звука|звук\w*\s+(?:нет|отсутству|пропал)|не\s+работа\w*\s+(?:аудиосистем|колонк|динамик)',
+    'Не подключается ноутбук через HDMI':
+        r'hdmi|vga|не\s+подключа\w*\s+ноутбук|ноутбук\w*\s+не\s+подключ',
+    'Не запускается мультимедийное ПО':
+        r'не\s+запуска\w*\s+(?:мультимедийн\w*\s+)?(?:по\b|программ)|(?:по|программ\w*)\s+не\s+запуска',
+    'Требуется инструкция по использованию':
+        r'инструкци|как\s+(?:включить|пользоват|подключить|работать)',
+    'Сложность с настройкой источников':
+        r'настро\w*\s+(?:\w+\s+)?источник|выбор\w*\s+источник',
+    'Проблема с переключением режимов':
+        r'переключ\w*\s+(?:\w+\s+)?режим|режим\w*\s+не\s+переключ',
+}
+
+
+class TicketCategorizer:
+    """Определение категории проблемы по тексту заявки"""
+
+    def __init__(self, config=None, patterns=None, other=OTHER, cache_size=1_000_000):
+        self.config = config
+        self.patterns = patterns or CATEGORY_PATTERNS
+        self.labels = np.array(list(self.patterns) + [other], dtype=object)
+        self.other_code = len(self.patterns)
+        self.regex = re.compile('|'.join(f'(?P<c{i}>{pattern})'
+                                         for i, pattern in enumerate(self.patterns.values())))
+        self._group_codes = {f'c{i}': i for i in range(len(self.patterns))}
+        self.cache_size = cache_size
+        self._cache = {}
+        self.stats = {}
+
+    @staticmethod
+    def normalize(texts):
+        return texts.str.lower().str.replace('ё', 'е', regex=False)
+
+    def _classify_unique(self, texts):
+        """Коды категорий для уникальных текстов: одно регулярное выражение,
+        первое совпадение в тексте"""
+
+        normalized = self.normalize(pd.Series(texts, dtype=object))
+        # Имя сработавшей группы (lastgroup) и есть категория
+        return np.fromiter(
+            (self._group_codes[match.lastgroup] if match else self.other_code
+             for match in map(self.regex.search, normalized)),
+            dtype=np.int64, count=len(normalized))
+
+    def classify_codes(self, texts, batch_size=100_000):
+        """Коды категорий для каждого текста (другая проблема — other_code)"""
+
+        texts = pd.Series(texts, dtype=object).fillna('')
+        codes, uniques = pd.factorize(texts)
+
+        unseen = [text for text in uniques if text not in self._cache]
+        if len(self._cache) + len(unseen) > self.cache_size:
+            self._cache.clear()
+            unseen = list(uniques)
+        for start in range(0, len(unseen), batch_size):
+            batch = unseen[start:start + batch_size]
+            self._cache.update(zip(batch, self._classify_unique(batch).tolist()))
+
+        self.stats = {'texts': len(texts), 'unique': len(uniques), 'classified': len(unseen)}
+        unique_codes = np.fromiter((self._cache[text] for text in uniques), dtype=np.int64, count=len(uniques))
+        return unique_codes[codes]
+
+    def classify(self, texts, batch_size=100_000):
+        """Категории (строки) для каждого текста"""
+
+        return self.labels[self.classify_codes(texts, batch_size)]
+
+    def categorize(self, df, summary_col, description_col=None):
+        """Категория по заголовку; если он ничего не говорит — по описанию"""
+
+        codes = self.classify_codes(df[summary_col])
+        summary_stats = self.stats
+
+        if description_col is not None and description_col in df.columns:
+            unknown = codes == self.other_code
+            if unknown.any():
+                codes[unknown] = self.classify_codes(df[description_col].to_numpy()[unknown])
+
+        self.stats = summary_stats
+        return pd.Series(self.labels[codes], index=df.index)
+
+    def apply(self, df_clean, mode='missing'):
+        """Категории в очищенной таблице JiraDataLoader
+
+        mode='missing' — заполнить только пустые категории,
+        mode='always' — заменить все категории выведенными из текста.
+        Выведенная категория сохраняется и в колонке category_inferred.
+        """
+
+        from src.data_loader import JiraDataLoader
+
+        if mode not in ('missing', 'always'):
+            raise ValueError(f"Неизвестный режим определения категорий: {mode} (доступны: missing, always)")
+
+        print("\n🏷 Определяем категории проблем по тексту заявок...")
+
+        summary_col = JiraDataLoader._find_column(df_clean, 'summary', 'заголов', 'тема')
+        if summary_col is None:
+            raise ValueError("Нет колонки с заголовком заявки (Summary) для определения категорий")
+        description_col = JiraDataLoader._find_column(df_clean, 'description', 'описани')
+        category_col = JiraDataLoader._find_column(df_clean, 'категор', 'проблем')
+        if category_col is None:
+            category_col = self.config.COLUMN_CATEGORY if self.config else 'Категория проблемы'
+
+        inferred = self.categorize(df_clean, summary_col, description_col)
+        df_clean['category_inferred'] = inferred
+
+        print(f"  • Заявок: {self.stats['texts']}, уникальных заголовков: {self.stats['unique']}")
+
+        if category_col in df_clean.columns:
+            existing = df_clean[category_col]
+            labelled = existing.notna() & (existing.astype(str).str.strip() != '')
+            if labelled.any():
+                agreement = (inferred[labelled] == existing[labelled]).mean()
+                print(f"  • Совпадение с категориями из выгрузки: {agreement:.1%} ({int(labelled.sum())} заявок)")
+            fill = ~labelled if mode == 'missing' else pd.Series(True, index=df_clean.index)
+            df_clean.loc[fill, category_col] = inferred[fill]
+        else:
+            fill = pd.Series(True, index=df_clean.index)
+            df_clean[category_col] = inferred
+
+        print(f"✓ Категория определена по тексту для {int(fill.sum())} заявок")
+        return df_clean
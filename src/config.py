@@ -3,6 +3,7 @@
 """
 
 from dataclasses import dataclass
+from typing import Tuple
 
 @dataclass
 class ABTestConfig:
@@ -12,15 +13,78 @@ class ABTestConfig:
     DATA_PATH: str = "data/jira_simple_export.csv"
     DAILY_DATA_PATH: str = "data/jira_daily_stats.csv"
     
+    # Расписание: часы занятий по аудиториям (CSV с колонками "Аудитория" и
+    # "Часы занятий") — знаменатель для метрики «заявок на час занятий»
+    LESSONS_PATH: str = ""
+    
+    # Несколько выгрузок сразу: пути или glob-шаблоны (если пусто — DATA_PATH)
+    DATA_PATHS: Tuple[str, ...] = ()
+    
+    # Чтение CSV блоками по CHUNK_SIZE строк (0 — файл целиком)
+    CHUNK_SIZE: int = 0
+    
     # Названия групп
     GROUP_A_NAME: str = "Контрольная (старая инструкция)"
     GROUP_B_NAME: str = "Тестовая (новая инструкция)"
     GROUP_A_LABEL: str = "A"
     GROUP_B_LABEL: str = "B"
     
+    # Несколько вариантов инструкции (A/B/n): метки групп в выгрузке по порядку.
+    # Пусто — две группы GROUP_A_LABEL и GROUP_B_LABEL. Внутри проекта
+    # группы называются A, B, C, ...
+    ARM_LABELS: Tuple[str, ...] = ()
+    CONTROL_ARM: str = "A"
+    MULTIARM_COMPARISONS: str = "control"  # control — каждая группа с контролем, pairwise — все пары
+    MULTIARM_CORRECTION: str = "holm"  # holm или dunnett (только для сравнений с контролем)
+    
+    # Папка для результатов (графики, JSON, валидация)
+    OUTPUT_DIR: str = "reports"
+    
+    # Форматы и разрешение графиков
+    FIGURE_FORMATS: Tuple[str, ...] = ("png", "pdf")
+    FIGURE_DPI: int = 300
+    
+    # Динамика: окно и метод сглаживания (mean, median, ewma),
+    # максимум точек на ряд на графике (длинные ряды прореживаются)
+    TREND_WINDOW: int = 7
+    TREND_METHOD: str = "mean"
+    TREND_MAX_POINTS: int = 2000
+    
+    # Момент выгрузки из JIRA (например, "2025-10-31 18:00"); открытые заявки
+    # цензурируются в этот момент. Пусто — последнее время, известное по данным
+    EXPORT_TIME: str = ""
+    
+    # Разность разностей: дата начала пост-периода (пусто — середина периода),
+    # ширина периода event study в днях и число периодов до/после начала
+    DID_POST_START: str = ""
+    DID_BIN_DAYS: int = 7
+    DID_EVENT_WINDOW: int = 4
+    
+    # Категории проблем по тексту заявки: "" — не определять,
+    # "missing" — только для заявок без категории, "always" — для всех
+    INFER_CATEGORIES: str = ""
+    
+    # Повторные заявки (одна неисправность — несколько заявок): "" — не искать,
+    # "report" — отметить и посчитать, "drop" — анализ по одной заявке на инцидент.
+    # Повтор — та же аудитория, не позже окна и сходство заголовков не ниже порога
+    DEDUP_MODE: str = ""
+    DEDUP_WINDOW_HOURS: float = 24.0
+    DEDUP_THRESHOLD: float = 0.5
+    
+    # JIRA REST API: адрес сервера, запрос и размер страницы
+    # (токен берется из переменной окружения JIRA_TOKEN)
+    JIRA_URL: str = ""
+    JIRA_JQL: str = "project = MMC"
+    JIRA_PAGE_SIZE: int = 100
+    
     # Статистические параметры
     ALPHA: float = 0.05  # Уровень значимости (5%)
     
+    # Робастные оценки: доля усечения с каждой стороны (тест Юэна)
+    # и порог функции Хьюбера в единицах масштаба (MAD)
+    ROBUST_TRIM: float = 0.2
+    HUBER_C: float = 1.345
+    
     # Цвета для графиков
     COLOR_A: str = "#FF6B6B"  # Красный
     COLOR_B: str = "#4ECDC4"  # Бирюзовый
@@ -2,6 +2,7 @@
 Загрузка данных из JIRA
 """
 
+import glob
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -23,52 +24,98 @@ class JiraDataLoader:
         self.category_stats = None
         self.group_a_tickets = []
         self.group_b_tickets = []
+        self.arm_tickets = {}
+    
+    def arm_names(self):
+        """Внутренние имена групп: A, B, C, ... (по числу меток в настройках)"""
+        labels = self.config.ARM_LABELS or (self.config.GROUP_A_LABEL, self.config.GROUP_B_LABEL)
+        return [chr(ord('A') + i) for i in range(len(labels))]
+    
+    def _group_label_map(self):
+        """Метки групп из настроек -> внутренние метки A, B, C, ..."""
+        labels = self.config.ARM_LABELS or (self.config.GROUP_A_LABEL, self.config.GROUP_B_LABEL)
+        return dict(zip(labels, self.arm_names()))
+    
+    @staticmethod
+    def _find_column(df, *keywords):
+        """Первая колонка, в названии которой есть одно из ключевых слов"""
+        for col in df.columns:
+            if any(keyword in col.lower() for keyword in keywords):
+                return col
+        return None
+    
+    @staticmethod
+    def _add_change_columns(category_stats):
+        """Изменение B относительно A по категориям"""
+        if 'B' in category_stats.columns:
+            category_stats['change'] = category_stats['B'] - category_stats['A']
+            category_stats['change_percent'] = ((category_stats['B'] - category_stats['A']) / 
+                                               category_stats['A'] * 100).round(1)
+        return category_stats
     
     def load_data(self):
         """ШАГ 1: Загружаем основной файл с заявками"""
         
-        file_path = Path(self.config.DATA_PATH)
+        files = self._input_files()
         
-        if not file_path.exists():
-            print(f"❌ Файл {file_path} не найден!")
-            print("📁 Скопируйте файлы в папку data/")
-            raise FileNotFoundError(f"Файл не найден: {file_path}")
+        for file_path in files:
+            if not file_path.exists():
+                print(f"❌ Файл {file_path} не найден!")
+                print("📁 Скопируйте файлы в папку data/")
+                raise FileNotFoundError(f"Файл не найден: {file_path}")
         
-        print(f"📂 Загружаем файл: {file_path.name}")
-        
-        # Пробуем разные разделители
-        try:
-            self.df = pd.read_csv(file_path, encoding='utf-8-sig', sep=',')
-            print("✓ Разделитель: запятая (,)")
-        except:
-            try:
-                self.df = pd.read_csv(file_path, encoding='utf-8-sig', sep=';')
-                print("✓ Разделитель: точка с запятой (;)")
-            except:
-                self.df = pd.read_csv(file_path, encoding='utf-8-sig')
-                print("✓ Разделитель: автоопределение")
-        
-        # Проверяем, не слиплись ли колонки
-        if len(self.df.columns) == 1:
-            print("  ⚠ Исправляем слипшиеся колонки...")
-            first_col = self.df.columns[0]
-            splitted = self.df[first_col].str.split(',', expand=True)
-            headers = splitted.iloc[0].tolist()
-            data = splitted.iloc[1:]
-            self.df = pd.DataFrame(data.values, columns=headers)
-            print(f"  ✓ Исправлено! {len(self.df.columns)} колонок")
+        frames = [self._load_file(file_path) for file_path in files]
+        self.df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
         
+        if len(files) > 1:
+            print(f"✓ Объединено файлов: {len(files)}")
         print(f"✓ Загружено строк: {len(self.df)}")
         print(f"✓ Колонок: {len(self.df.columns)}")
         
         return self.df
     
+    def _input_files(self):
+        """Входные файлы: DATA_PATHS (пути или glob-шаблоны) или DATA_PATH"""
+        
+        files = []
+        for pattern in self.config.DATA_PATHS or (self.config.DATA_PATH,):
+            if glob.has_magic(pattern):
+                matches = sorted(glob.glob(pattern))
+                if not matches:
+                    raise FileNotFoundError(f"По шаблону нет файлов: {pattern}")
+                files += [Path(match) for match in matches]
+            else:
+                files.append(Path(pattern))
+        return files
+    
+    def _load_file(self, file_path):
+        """Один CSV-файл выгрузки (многострочные поля в кавычках, без широких текстовых колонок)"""
+        
+        from src.jira_csv import WIDE_COLUMNS, read_jira_export
+        
+        print(f"📂 Загружаем файл: {file_path.name}")
+        
+        skip = WIDE_COLUMNS
+        if self.config.INFER_CATEGORIES:
+            # Если заголовок ничего не говорит, категория ищется в описании
+            skip = tuple(col for col in skip if col != 'Description')
+        df, info = read_jira_export(file_path, skip=skip, chunksize=self.config.CHUNK_SIZE)
+        
+        names = {',': 'запятая (,)', ';': 'точка с запятой (;)', '\t': 'табуляция'}
+        print(f"✓ Разделитель: {names[info['sep']]}")
+        if info['wrapped']:
+            print("  ✓ Строки были целиком в кавычках — разобраны как CSV")
+        if len(df.columns) < info['columns_total']:
+            print(f"  ✓ Прочитано колонок: {len(df.columns)} из {info['columns_total']}")
+        
+        return df
+    
     def load_daily_data(self):
         """ШАГ 2: Загружаем ежедневную статистику"""
         
         file_path = Path(self.config.DAILY_DATA_PATH)
         
-        if not file_path.exists():
+        if not self.config.DAILY_DATA_PATH or not file_path.exists():
             print("⚠ Файл с ежедневной статистикой не найден")
             return None
         
@@ -84,17 +131,24 @@ class JiraDataLoader:
             except:
                 print("⚠ Не удалось загрузить ежедневную статистику")
         
+        if self.df_daily is not None:
+            self.df_daily = self.df_daily.rename(columns=self._group_label_map())
+        
         return self.df_daily
     
-    def clean_data(self):
-        """ШАГ 3: Очищаем и готовим данные"""
+    def clean_data(self, verbose=True):
+        """ШАГ 3: Очищаем и готовим данные
+        
+        verbose=False — без сообщений (очистка выгрузки по частям, например из JIRA API)
+        """
         
-        print("\n🧹 Очищаем данные...")
+        log = print if verbose else (lambda *args: None)
+        log("\n🧹 Очищаем данные...")
         
         df = self.df.copy()
         
         # 1. ВРЕМЯ РЕШЕНИЯ
-        print("  • Обрабатываем время решения...")
+        log("  • Обрабатываем время решения...")
         
         # Ищем колонку с временем
         time_col = None
@@ -113,7 +167,7 @@ class JiraDataLoader:
             df['time_resolution_hours'] = np.nan
         
         # 2. ДАТЫ
-        print("  • Обрабатываем даты...")
+        log("  • Обрабатываем даты...")
         try:
             date_col = None
             for col in df.columns:
@@ -125,10 +179,10 @@ class JiraDataLoader:
                 df['created_datetime'] = pd.to_datetime(df[date_col], format='%d/%m/%Y %H:%M', errors='coerce')
                 df['created_date'] = df['created_datetime'].dt.date
         except Exception as e:
-            print(f"  ⚠ Ошибка обработки дат: {e}")
+            log(f"  ⚠ Ошибка обработки дат: {e}")
         
         # 3. ГРУППЫ
-        print("  • Определяем группы...")
+        log("  • Определяем группы...")
         group_col = None
         for col in df.columns:
             if 'групп' in col.lower():
@@ -136,7 +190,9 @@ class JiraDataLoader:
                 break
         
         if group_col:
-            df['group_numeric'] = df[group_col].map({'A': 0, 'B': 1})
+            # Приводим метки групп из настроек к внутренним A/B
+            df[group_col] = df[group_col].replace(self._group_label_map())
+            df['group_numeric'] = df[group_col].map({arm: i for i, arm in enumerate(self.arm_names())})
             self.config.COLUMN_GROUP = group_col
         
         # 4. КРИТИЧНЫЕ ЗАЯВКИ
@@ -160,7 +216,7 @@ class JiraDataLoader:
             df['is_resolved'] = df[status_col].isin(['Решена', 'Закрыта']).astype(int)
         
         self.df_clean = df
-        print("✓ Данные очищены!")
+        log("✓ Данные очищены!")
         
         return df
     
@@ -204,22 +260,254 @@ class JiraDataLoader:
                 'is_resolved': 'resolution_rate'
             }).reset_index()
             
+            # Числитель доли решенных — для ratio-метрик нужны суммы, а не средние
+            classroom_stats['resolved_tickets'] = (
+                df.groupby([audience_col, group_col])['is_resolved'].sum().to_numpy()
+            )
+            classroom_stats = self._add_lessons(classroom_stats, audience_col)
+            
             self.classroom_stats = classroom_stats
-            self.group_a_tickets = classroom_stats[classroom_stats[group_col] == 'A']['ticket_count'].tolist()
-            self.group_b_tickets = classroom_stats[classroom_stats[group_col] == 'B']['ticket_count'].tolist()
+            counts = classroom_stats.groupby(group_col)['ticket_count']
+            self.arm_tickets = {
+                arm: counts.get_group(arm).tolist() if arm in counts.groups else []
+                for arm in self.arm_names()
+            }
+            self.group_a_tickets = self.arm_tickets['A']
+            self.group_b_tickets = self.arm_tickets['B']
         
         # 3. Статистика по категориям
         if category_col and group_col:
             category_stats = df.groupby([category_col, group_col]).size().unstack(fill_value=0)
-            
-            if 'B' in category_stats.columns:
-                category_stats['change'] = category_stats['B'] - category_stats['A']
-                category_stats['change_percent'] = ((category_stats['B'] - category_stats['A']) / 
-                                                   category_stats['A'] * 100).round(1)
+            category_stats = self._add_change_columns(category_stats)
             
             self.category_stats = category_stats
         
-        print(f"✓ Аудиторий в группе A: {len(self.group_a_tickets)}")
-        print(f"✓ Аудиторий в группе B: {len(self.group_b_tickets)}")
+        for arm in self.arm_names():
+            print(f"✓ Аудиторий в группе {arm}: {len(self.arm_tickets.get(arm, []))}")
+        
+        return self.classroom_stats, self.category_stats
+    
+    def save_to_store(self, store):
+        """Очищенные заявки -> база заявок (TicketStore), upsert по Issue Key"""
+        
+        return store.upsert(self.df_clean)
+    
+    def prepare_from_store(self, store):
+        """ШАГ 4 по базе заявок: агрегаты считает SQLite (GROUP BY)
+        
+        В pandas попадают только маленькие таблицы: аудитории, категории и дни.
+        Результат тот же, что у prepare_for_analysis() по очищенной таблице.
+        """
+        
+        print(f"\n📊 Готовим данные для анализа (база {store.path})...")
+        
+        group_col = self.config.COLUMN_GROUP
+        audience_col = 'Аудитория'
+        
+        classroom_stats = store.classroom_stats(audience_col, group_col)
+        if classroom_stats.empty:
+            raise ValueError(f"В базе заявок {store.path} нет данных")
+        classroom_stats = self._add_lessons(classroom_stats, audience_col)
+        
+        self.classroom_stats = classroom_stats
+        counts = classroom_stats.groupby(group_col)['ticket_count']
+        self.arm_tickets = {
+            arm: counts.get_group(arm).tolist() if arm in counts.groups else []
+            for arm in self.arm_names()
+        }
+        self.group_a_tickets = self.arm_tickets['A']
+        self.group_b_tickets = self.arm_tickets['B']
+        
+        self.category_stats = self._add_change_columns(
+            store.category_stats(self.config.COLUMN_CATEGORY, group_col))
+        
+        for arm in self.arm_names():
+            print(f"✓ Аудиторий в группе {arm}: {len(self.arm_tickets.get(arm, []))}")
+        
+        return self.classroom_stats, self.category_stats
+    
+    def load_daily_from_store(self, store):
+        """Ежедневная статистика: файл config.DAILY_DATA_PATH, а если его нет — GROUP BY по базе"""
         
-        return self.classroom_stats, self.category_stats
\ No newline at end of file
+        if self.config.DAILY_DATA_PATH and Path(self.config.DAILY_DATA_PATH).exists():
+            return self.load_daily_data()
+        
+        self.df_daily = store.daily_stats()
+        print(f"✓ Ежедневная статистика из базы: {len(self.df_daily)} дней")
+        return self.df_daily
+    
+    def _add_lessons(self, classroom_stats, audience_col):
+        """Часы занятий по аудиториям из config.LESSONS_PATH (если задан)"""
+        
+        if not self.config.LESSONS_PATH:
+            return classroom_stats
+        
+        lessons = pd.read_csv(self.config.LESSONS_PATH, encoding='utf-8-sig', sep=None, engine='python')
+        room_col = self._find_column(lessons, 'аудитор')
+        hours_col = self._find_column(lessons, 'час', 'hours')
+        if room_col is None or hours_col is None:
+            raise ValueError(f"В {self.config.LESSONS_PATH} нужны колонки аудитории и часов занятий")
+        
+        hours = pd.to_numeric(lessons[hours_col].astype(str).str.replace(',', '.'), errors='coerce')
+        hours = hours.groupby(lessons[room_col]).sum()
+        classroom_stats['lesson_hours'] = classroom_stats[audience_col].map(hours)
+        
+        missing = classroom_stats['lesson_hours'].isna().sum()
+        print(f"✓ Часы занятий: {len(hours)} аудиторий" +
+              (f" (нет данных для {missing})" if missing else ""))
+        return classroom_stats
+    
+    def prepare_survival(self, export_time=None):
+        """Данные для анализа выживаемости: время до решения или до выгрузки
+        
+        Решенные заявки (Решена, Закрыта) — событие, время из колонки времени решения.
+        Открытые (Открыта, В работе) — цензурированы: время от создания до выгрузки.
+        Отклоненные заявки не учитываются.
+        """
+        
+        df = self.df_clean
+        group_col = self._find_column(df, 'групп')
+        status_col = self._find_column(df, 'status', 'статус')
+        
+        df = df[df[group_col].isin(self.arm_names())]
+        resolved = df['is_resolved'] == 1
+        is_open = df[status_col].isin(['Открыта', 'В работе'])
+        
+        export_time = export_time or self.config.EXPORT_TIME
+        if export_time:
+            export_time = pd.Timestamp(export_time)
+        else:
+            # Последний известный момент: создание заявки или ее решение
+            resolved_at = df['created_datetime'] + pd.to_timedelta(df['time_resolution_hours'], unit='h')
+            export_time = max(df['created_datetime'].max(), resolved_at.max())
+        
+        open_hours = (export_time - df['created_datetime']).dt.total_seconds() / 3600
+        
+        survival = pd.DataFrame({
+            'group': df[group_col],
+            'duration_hours': np.where(resolved, df['time_resolution_hours'], open_hours),
+            'event': resolved.astype(int)
+        }, index=df.index)
+        survival = survival[resolved | is_open]
+        
+        print(f"✓ Заявок для анализа выживаемости: {len(survival)} "
+              f"(решено {int(survival['event'].sum())}, открыто {int((survival['event'] == 0).sum())}, "
+              f"выгрузка {export_time:%d.%m.%Y %H:%M})")
+        
+        return survival
+    
+    def prepare_panel(self):
+        """Панель аудитория x день: число заявок, включая дни без заявок (нули)
+        
+        Каждая аудитория — на всех днях от первой до последней заявки выгрузки,
+        поэтому панель сбалансирована. Счетчики — один bincount по коду
+        (аудитория, день).
+        """
+        
+        df = self.df_clean
+        group_col = self._find_column(df, 'групп')
+        audience_col = self._find_column(df, 'аудитор')
+        
+        # Заявки без аудитории не попадают в панель: у pd.factorize их код -1
+        df = df[df[group_col].isin(self.arm_names()) & df['created_datetime'].notna()
+                & df[audience_col].notna()]
+        rooms, room_index = pd.factorize(df[audience_col])
+        days = df['created_datetime'].dt.normalize()
+        first_day = days.min()
+        day_codes = ((days - first_day) // pd.Timedelta(days=1)).to_numpy()
+        n_days = int(day_codes.max()) + 1
+        
+        counts = np.bincount(rooms * n_days + day_codes, minlength=len(room_index) * n_days)
+        room_groups = df[group_col].groupby(rooms).first().to_numpy()
+        
+        panel = pd.DataFrame({
+            'room': np.repeat(np.arange(len(room_index)), n_days),
+            'day': np.tile(np.arange(n_days), len(room_index)),
+            'group': np.repeat(room_groups, n_days),
+            'tickets': counts
+        })
+        panel['date'] = first_day + pd.to_timedelta(panel['day'], unit='D')
+        panel.attrs['rooms'] = list(room_index)
+        
+        print(f"✓ Панель для разности разностей: {len(room_index)} аудиторий x {n_days} дней")
+        return panel
+    
+    def prepare_segments(self, segment_col):
+        """ШАГ 5: Данные по сегментам (кафедрам, компонентам, ...)
+        
+        Все сегменты считаются тремя groupby по очищенной таблице:
+        заявки по аудиториям, по категориям и по дням.
+        """
+        
+        df = self.df_clean
+        
+        if segment_col not in df.columns:
+            raise ValueError(f"Колонка для сегментов не найдена: {segment_col}")
+        
+        group_col = self._find_column(df, 'групп')
+        audience_col = self._find_column(df, 'аудитор')
+        category_col = self._find_column(df, 'категор', 'проблем')
+        
+        df = df[df[group_col].isin(['A', 'B'])]
+        
+        counts = df.groupby([segment_col, group_col, audience_col]).size()
+        categories = df.groupby([segment_col, category_col, group_col]).size().unstack(fill_value=0)
+        daily = df.groupby([segment_col, 'created_date', group_col]).size().unstack(fill_value=0)
+        
+        for frame in (categories, daily):
+            for label in ('A', 'B'):
+                if label not in frame.columns:
+                    frame[label] = 0
+        
+        segments = {}
+        for segment in counts.index.get_level_values(0).unique():
+            seg_counts = counts.loc[segment]
+            groups = seg_counts.index.get_level_values(0)
+            
+            if segment in daily.index.get_level_values(0):
+                seg_daily = daily.loc[segment][['A', 'B']].reset_index().rename(columns={'created_date': 'Дата'})
+                seg_daily['Дата'] = pd.to_datetime(seg_daily['Дата'])
+            else:
+                seg_daily = None
+            
+            segments[segment] = {
+                'group_a': seg_counts.loc['A'].tolist() if 'A' in groups else [],
+                'group_b': seg_counts.loc['B'].tolist() if 'B' in groups else [],
+                'category_stats': self._add_change_columns(categories.loc[segment][['A', 'B']].copy()),
+                'daily': seg_daily
+            }
+        
+        print(f"✓ Сегментов ({segment_col}): {len(segments)}")
+        
+        return segments
+    
+    def segment_category_table(self, segment_cols):
+        """Сводная таблица для отчета по сегментам
+        
+        Одна длинная таблица: тип сегмента, сегмент, категория, заявки A и B.
+        Строится одним groupby на каждую колонку сегментов.
+        """
+        
+        df = self.df_clean
+        group_col = self._find_column(df, 'групп')
+        category_col = self._find_column(df, 'категор', 'проблем')
+        df = df[df[group_col].isin(['A', 'B'])]
+        
+        tables = []
+        for segment_col in segment_cols:
+            if segment_col not in df.columns:
+                print(f"  ⚠ Колонка для сегментов не найдена: {segment_col}")
+                continue
+            table = df.groupby([segment_col, category_col, group_col]).size().unstack(fill_value=0)
+            for label in ('A', 'B'):
+                if label not in table.columns:
+                    table[label] = 0
+            table = table[['A', 'B']].reset_index()
+            table.columns = ['segment', 'category', 'A', 'B']
+            table.insert(0, 'segment_type', segment_col)
+            tables.append(table)
+        
+        if not tables:
+            return pd.DataFrame(columns=['segment_type', 'segment', 'category', 'A', 'B'])
+        
+        return pd.concat(tables, ignore_index=True)
\ No newline at end of file
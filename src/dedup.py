@@ -0,0 +1,205 @@
+"""
+Повторные заявки: одна неисправность — несколько заявок
+
+Повтор — заявка из той же аудитории в пределах окна по времени с похожим
+заголовком. Кандидаты берутся из индекса, отсортированного по (аудитория,
+время создания): каждая заявка сравнивается только с соседями в окне,
+поэтому время почти линейное. Похожесть заголовков оценивается по
+MinHash-подписям символьных шинглов (подписи считаются один раз на
+уникальный заголовок). Связанные заявки объединяются в инциденты.
+"""
+
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Слова шаблонов заголовков, не несущие смысла проблемы
+STOPWORDS = frozenset({
+    'в', 'на', 'аудитория', 'аудитории', 'ауд', 'проблема', 'неисправность',
+    'оборудования', 'заявка', 'просьба', 'срочно',
+})
+
+# Простое число Мерсенна 2^31 - 1 для универсального хеширования
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def shingles(text, k=4):
+    """Символьные k-граммы нормализованного текста"""
+
+    text = ' '.join(word for word in re.findall(r'\w+', text.lower().replace('ё', 'е'))
+                    if word not in STOPWORDS)
+    if not text:
+        return set()
+    return {text[i:i + k] for i in range(max(len(text) - k + 1, 1))}
+
+
+class MinHasher:
+    """MinHash-подписи: доля совпавших позиций двух подписей — оценка
+    коэффициента Жаккара множеств шинглов"""
+
+    def __init__(self, num_perm=64, k=4, seed=42):
+        rng = np.random.default_rng(seed)
+        self.k = k
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        """Подпись текста; у пустого текста — None"""
+
+        grams = shingles(text, self.k)
+        if not grams:
+            return None
+        hashes = np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams),
+                             dtype=np.uint64, count=len(grams))
+        # (a·h + b) mod p для всех перестановок и шинглов сразу; a < 2^31, h < 2^32 — без переполнения
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def signatures(self, texts):
+        """Матрица подписей (тексты x перестановки) и маска пустых текстов"""
+
+        sigs = np.zeros((len(texts), len(self.a)), dtype=np.uint64)
+        empty = np.zeros(len(texts), dtype=bool)
+        for i, text in enumerate(texts):
+            sig = self.signature(text)
+            if sig is None:
+                empty[i] = True
+            else:
+                sigs[i] = sig
+        return sigs, empty
+
+
+def candidate_pairs(rooms, times, window, max_lag=1000):
+    """Пары (позже, раньше) в одной аудитории не дальше window друг от друга
+
+    rooms, times — отсортированы по (аудитория, время). Пары строятся по
+    сдвигу lag = 1, 2, ...: если при каком-то сдвиге пар нет, при больших
+    сдвигах их тоже нет. Итого O(n * число заявок в окне).
+    """
+
+    later, earlier = [], []
+    for lag in range(1, min(max_lag, len(rooms) - 1) + 1):
+        ok = (rooms[lag:] == rooms[:-lag]) & (times[lag:] - times[:-lag] <= window)
+        if not ok.any():
+            break
+        idx = np.nonzero(ok)[0]
+        later.append(idx + lag)
+        earlier.append(idx)
+    if not later:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(later), np.concatenate(earlier)
+
+
+class TicketDeduplicator:
+    """Поиск повторных заявок и подсчет заявок с повторами и без"""
+
+    def __init__(self, config, window_hours=None, threshold=None, num_perm=64):
+        self.config = config
+        self.window_hours = window_hours if window_hours is not None else config.DEDUP_WINDOW_HOURS
+        self.threshold = threshold if threshold is not None else config.DEDUP_THRESHOLD
+        self.hasher = MinHasher(num_perm)
+        self.report = {}
+
+    def find_incidents(self, df, room_col, summary_col, time_col='created_datetime'):
+        """Номер инцидента и признак повтора для каждой заявки (в порядке df)"""
+
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        n = len(df)
+        times = df[time_col].to_numpy(dtype='datetime64[m]').astype(np.int64)
+        rooms, _ = pd.factorize(df[room_col])
+        # Номер аудитории в заголовке не должен влиять на похожесть. Разделитель —
+        # \x1f: хеш-таблица pandas обрезает строки по символу \x00
+        keys = df[summary_col].fillna('').astype(str) + '\x1f' + df[room_col].fillna('').astype(str)
+        text_codes, unique_keys = pd.factorize(keys)
+
+        order = np.lexsort((times, rooms))
+        valid = (rooms[order] >= 0) & (times[order] != np.iinfo(np.int64).min)
+        order = order[valid]
+        later, earlier = candidate_pairs(rooms[order], times[order], int(self.window_hours * 60))
+        later, earlier = order[later], order[earlier]
+
+        # Подписи только для заголовков, попавших в пары кандидатов
+        codes_i, codes_j = text_codes[later], text_codes[earlier]
+        needed = np.unique(np.concatenate([codes_i, codes_j]))
+        texts = [self._strip_room(*key.split('\x1f')) for key in unique_keys[needed]]
+        # Без номера аудитории шаблонные заголовки совпадают — подпись на уникальный текст
+        stripped_codes, stripped = pd.factorize(pd.Series(texts, dtype=object))
+        sigs, empty = self.hasher.signatures(list(stripped))
+        sigs, empty = sigs[stripped_codes], empty[stripped_codes]
+        position = np.full(len(unique_keys), -1)
+        position[needed] = np.arange(len(needed))
+
+        pos_i, pos_j = position[codes_i], position[codes_j]
+        similarity = np.where(codes_i == codes_j, 1.0,
+                              (sigs[pos_i] == sigs[pos_j]).mean(axis=1) if len(pos_i) else np.array([]))
+        similar = (similarity >= self.threshold) & ~empty[pos_i] & ~empty[pos_j]
+
+        graph = coo_matrix((np.ones(similar.sum()), (later[similar], earlier[similar])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+
+        # Первая по времени заявка инцидента — исходная, остальные — повторы
+        by_time = np.argsort(times, kind='stable')
+        first = np.zeros(n, dtype=bool)
+        first[by_time[~pd.Series(labels[by_time]).duplicated().to_numpy()]] = True
+
+        self.pairs_checked = int(len(later))
+        return labels, ~first
+
+    @staticmethod
+    def _strip_room(summary, room):
+        return summary.replace(room, ' ') if room else summary
+
+    def apply(self, df_clean, mode='report'):
+        """Колонки incident_id и is_repeat; mode='drop' — оставить по одной заявке на инцидент"""
+
+        from src.data_loader import JiraDataLoader
+
+        if mode not in ('report', 'drop'):
+            raise ValueError(f"Неизвестный режим поиска повторов: {mode} (доступны: report, drop)")
+
+        print(f"\n🔁 Ищем повторные заявки (окно {self.window_hours:g} ч, порог сходства {self.threshold:g})...")
+
+        room_col = JiraDataLoader._find_column(df_clean, 'аудитор')
+        summary_col = JiraDataLoader._find_column(df_clean, 'summary', 'заголов', 'тема')
+        group_col = JiraDataLoader._find_column(df_clean, 'групп')
+        if room_col is None or summary_col is None or 'created_datetime' not in df_clean.columns:
+            raise ValueError("Для поиска повторов нужны аудитория, заголовок и дата создания заявки")
+
+        labels, repeat = self.find_incidents(df_clean, room_col, summary_col)
+        df_clean['incident_id'] = labels
+        df_clean['is_repeat'] = repeat.astype(int)
+
+        self.report = self._summarize(df_clean, group_col, room_col)
+        for arm, row in self.report['groups'].items():
+            print(f"   Группа {arm}: заявок {row['tickets']}, инцидентов {row['incidents']}, "
+                  f"повторов {row['repeats']} ({row['repeat_share']:.1%})")
+        print(f"✓ Проверено пар-кандидатов: {self.pairs_checked}")
+
+        if mode == 'drop':
+            df_clean = df_clean[df_clean['is_repeat'] == 0].copy()
+            print(f"✓ Анализ по инцидентам: оставлено {len(df_clean)} заявок")
+        return df_clean
+
+    @staticmethod
+    def _summarize(df, group_col, room_col):
+        """Заявки и инциденты по группам и в среднем на аудиторию"""
+
+        per_room = df.assign(_first=1 - df['is_repeat']).groupby([group_col, room_col]).agg(
+            tickets=('_first', 'size'),
+            incidents=('_first', 'sum'),
+        )
+        groups = {}
+        for arm, part in per_room.groupby(level=0):
+            tickets, incidents = int(part['tickets'].sum()), int(part['incidents'].sum())
+            groups[arm] = {
+                'tickets': tickets,
+                'incidents': incidents,
+                'repeats': tickets - incidents,
+                'repeat_share': (tickets - incidents) / tickets if tickets else 0.0,
+                'mean_tickets_per_room': float(part['tickets'].mean()),
+                'mean_incidents_per_room': float(part['incidents'].mean()),
+            }
+        return {'groups': groups}
@@ -0,0 +1,196 @@
+"""
+Разность разностей (DiD) по панели аудитория x день
+
+Модель: заявки_it = α_i + γ_t + β·(вариант_i · после_t) + ε_it, где α_i —
+эффект аудитории, γ_t — эффект дня. Фиксированные эффекты не оцениваются
+явно, а исключаются внутригрупповым преобразованием: из всех переменных
+попеременно вычитаются средние по аудиториям и по дням (bincount), пока
+средние не станут нулевыми. Для сбалансированной панели хватает одного
+прохода; память — O(наблюдения x регрессоры), без матриц дамми-переменных.
+Стандартные ошибки кластеризованы по аудиториям (группы назначались
+аудиториям целиком).
+
+Вариант «event study» вместо одного β оценивает эффект по периодам
+относительно начала пост-периода (базовый — последний период до начала);
+коэффициенты до начала проверяют параллельность трендов.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def demean(columns, fixed_effects, tol=1e-10, max_iter=1000):
+    """Остатки после вычитания фиксированных эффектов (метод попеременных проекций)
+
+    columns — матрица (наблюдения x переменные), fixed_effects — коды групп
+    для каждого эффекта (например, аудитории и дни).
+    """
+
+    x = np.array(columns, dtype=float)
+    if x.ndim == 1:
+        x = x[:, None]
+    counts = [np.bincount(codes).astype(float) for codes in fixed_effects]
+    scale = max(np.abs(x).max(initial=0.0), 1.0)
+
+    for _ in range(max_iter):
+        largest = 0.0
+        for codes, n in zip(fixed_effects, counts):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = np.column_stack([np.bincount(codes, weights=x[:, j], minlength=len(n))
+                                         for j in range(x.shape[1])]) / n[:, None]
+            means = np.nan_to_num(means)
+            x -= means[codes]
+            largest = max(largest, np.abs(means).max(initial=0.0))
+        if largest <= tol * scale:
+            break
+    return x
+
+
+def clustered_ols(y, x, clusters):
+    """МНК с кластеризованными стандартными ошибками (поправка G/(G-1)·(N-1)/(N-K))
+
+    Возвращает (коэффициенты, ковариационная матрица, число кластеров).
+    """
+
+    n, k = x.shape
+    xtx_inv = np.linalg.pinv(x.T @ x)
+    beta = xtx_inv @ (x.T @ y)
+    residuals = y - x @ beta
+
+    n_clusters = int(clusters.max()) + 1
+    scores = np.column_stack([np.bincount(clusters, weights=x[:, j] * residuals, minlength=n_clusters)
+                              for j in range(k)])
+    correction = n_clusters / (n_clusters - 1) * (n - 1) / (n - k)
+    cov = correction * xtx_inv @ (scores.T @ scores) @ xtx_inv
+    return beta, cov, n_clusters
+
+
+class DiDAnalyzer:
+    """Разность разностей и event study по панели JiraDataLoader.prepare_panel()"""
+
+    def __init__(self, config, post_start=None, bin_days=None, window=None):
+        self.config = config
+        self.post_start = post_start or config.DID_POST_START
+        self.bin_days = bin_days or config.DID_BIN_DAYS
+        self.window = window or config.DID_EVENT_WINDOW
+        self.results = {}
+        self.event_study = None
+
+    def _post_start(self, panel):
+        if self.post_start:
+            return pd.Timestamp(self.post_start)
+        # Без даты начала — середина периода (проверка на «плацебо»)
+        start, end = panel['date'].min(), panel['date'].max()
+        middle = start + (end - start) / 2
+        print(f"⚠ Начало пост-периода не задано (DID_POST_START) — берем середину периода: {middle:%d.%m.%Y}")
+        return middle.normalize()
+
+    def _relative_periods(self, panel, post_start):
+        """Номер периода относительно начала (0 — первый период после начала);
+        крайние периоды окна объединяют все, что дальше"""
+
+        offset = (panel['date'] - post_start) // pd.Timedelta(days=self.bin_days)
+        return offset.clip(-self.window, self.window - 1).to_numpy()
+
+    def run(self, panel):
+        """Оценка β, event study и проверка параллельности трендов"""
+
+        print("\n📐 Разность разностей (аудитория x день)...")
+
+        post_start = self._post_start(panel)
+        control = self.config.CONTROL_ARM
+        treated = (panel['group'] != control).to_numpy(dtype=float)
+        post = (panel['date'] >= post_start).to_numpy(dtype=float)
+        if not post.any() or post.all():
+            raise ValueError(f"Нет наблюдений до или после начала пост-периода {post_start:%d.%m.%Y}")
+
+        rooms = panel['room'].to_numpy()
+        days = panel['day'].to_numpy()
+        fixed_effects = (rooms, days)
+        y = demean(panel['tickets'].to_numpy(dtype=float), fixed_effects)[:, 0]
+
+        # ===== Один коэффициент: вариант x после =====
+        x = demean(treated * post, fixed_effects)
+        beta, cov, n_clusters = clustered_ols(y, x, rooms)
+        se = float(np.sqrt(cov[0, 0]))
+        t_stat = beta[0] / se
+        dof = n_clusters - 1
+        p_value = float(2 * stats.t.sf(abs(t_stat), dof))
+        margin = stats.t.ppf(1 - self.config.ALPHA / 2, dof) * se
+
+        # Уровень для относительного эффекта: контроль после начала
+        control_post = panel['tickets'][(treated == 0) & (post == 1)].mean()
+
+        # ===== Event study: вариант x период, базовый период -1 =====
+        periods = self._relative_periods(panel, post_start)
+        levels = [k for k in range(-self.window, self.window) if k != -1 and (periods == k).any()]
+        dummies = np.column_stack([treated * (periods == k) for k in levels])
+        x_event = demean(dummies, fixed_effects)
+        beta_event, cov_event, _ = clustered_ols(y, x_event, rooms)
+        se_event = np.sqrt(np.diag(cov_event))
+        margin_event = stats.t.ppf(1 - self.config.ALPHA / 2, dof) * se_event
+
+        self.event_study = pd.DataFrame({
+            'period': levels,
+            'start': [post_start + pd.Timedelta(days=self.bin_days * k) for k in levels],
+            'estimate': beta_event,
+            'se': se_event,
+            'ci_lower': beta_event - margin_event,
+            'ci_upper': beta_event + margin_event,
+            'p_value': 2 * stats.t.sf(np.abs(beta_event / se_event), dof),
+        })
+
+        # Совместный тест: все коэффициенты до начала равны нулю (F по Вальду)
+        pre = np.array([k < -1 for k in levels])
+        pretrend = None
+        if pre.any():
+            b, v = beta_event[pre], cov_event[np.ix_(pre, pre)]
+            f_stat = float(b @ np.linalg.pinv(v) @ b) / pre.sum()
+            pretrend = {'f_statistic': f_stat, 'df': int(pre.sum()),
+                        'p_value': float(stats.f.sf(f_stat, pre.sum(), dof))}
+
+        self.results = {
+            'post_start': f"{post_start:%Y-%m-%d}",
+            'estimate': float(beta[0]),
+            'se': se,
+            't_statistic': float(t_stat),
+            'p_value': p_value,
+            'confidence_interval': (float(beta[0] - margin), float(beta[0] + margin)),
+            'relative_effect': float(beta[0] / control_post * 100) if control_post else np.nan,
+            'significant': p_value < self.config.ALPHA,
+            'rooms': int(n_clusters),
+            'days': int(days.max()) + 1,
+            'observations': int(len(panel)),
+            'pretrend': pretrend,
+        }
+
+        print(f"   Начало пост-периода: {post_start:%d.%m.%Y}, {n_clusters} аудиторий x {self.results['days']} дней")
+        print(f"   DiD: {beta[0]:+.4f} заявок на аудиторию в день (SE {se:.4f}), p = {self.results['p_value']:.4f}")
+        if pretrend:
+            print(f"   Параллельность трендов: F = {pretrend['f_statistic']:.3f}, p = {pretrend['p_value']:.4f}")
+
+        return self.results
+
+    def print_summary(self):
+        """Печать результатов в консоль"""
+
+        if not self.results:
+            print("Сначала выполните run()")
+            return
+
+        res = self.results
+        low, high = res['confidence_interval']
+        print("\n" + "=" * 60)
+        print("РАЗНОСТЬ РАЗНОСТЕЙ (до/после, ошибки кластеризованы по аудиториям)")
+        print("=" * 60)
+        mark = "✅" if res['significant'] else "❌"
+        print(f"   {mark} Эффект: {res['estimate']:+.4f} заявок на аудиторию в день "
+              f"({res['relative_effect']:+.1f}%), 95% ДИ [{low:+.4f}; {high:+.4f}], p = {res['p_value']:.4f}")
+        print(f"   Начало пост-периода: {res['post_start']}, аудиторий {res['rooms']}, дней {res['days']}")
+        if res['pretrend']:
+            pretrend = res['pretrend']
+            mark = "✅" if pretrend['p_value'] >= self.config.ALPHA else "⚠"
+            print(f"   {mark} Параллельность трендов до начала: F({pretrend['df']}) = {pretrend['f_statistic']:.3f}, "
+                  f"p = {pretrend['p_value']:.4f}")
+        print("=" * 60)
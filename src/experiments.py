@@ -0,0 +1,161 @@
+"""
+Несколько A/B-тестов за один запуск (манифест экспериментов)
+
+Пример манифеста (JSON):
+{
+  "experiments": [
+    {"name": "main_building_autumn", "data_path": "data/main_autumn.csv",
+     "daily_data_path": "data/main_autumn_daily.csv", "alpha": 0.05},
+    {"name": "lab_building_spring", "data_path": "data/lab_spring.csv",
+     "group_a_label": "control", "group_b_label": "new", "output_dir": "reports/lab"}
+  ]
+}
+"""
+
+import os
+import json
+import time
+import contextlib
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+@dataclass
+class ExperimentSpec:
+    """Описание одного эксперимента из манифеста"""
+    name: str
+    data_path: str
+    daily_data_path: str = ""
+    group_a_label: str = "A"
+    group_b_label: str = "B"
+    alpha: float = 0.05
+    output_dir: str = ""
+
+    def to_config(self, base_config):
+        """Отдельная копия настроек для эксперимента"""
+        return replace(
+            base_config,
+            DATA_PATH=self.data_path,
+            # Несколько выгрузок из --data/TOML не должны подменять файл эксперимента
+            DATA_PATHS=(),
+            DAILY_DATA_PATH=self.daily_data_path,
+            GROUP_A_LABEL=self.group_a_label,
+            GROUP_B_LABEL=self.group_b_label,
+            ALPHA=self.alpha,
+            OUTPUT_DIR=self.output_dir or str(Path(base_config.OUTPUT_DIR) / "experiments" / self.name)
+        )
+
+
+def load_manifest(path) -> List[ExperimentSpec]:
+    """Чтение манифеста: список экспериментов или {"experiments": [...]}"""
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        data = data.get('experiments', [])
+
+    specs = [ExperimentSpec(**item) for item in data]
+
+    names = [spec.name for spec in specs]
+    if len(names) != len(set(names)):
+        raise ValueError("Имена экспериментов в манифесте должны быть уникальными")
+
+    return specs
+
+
+def _init_worker(plots=True):
+    """Инициализация процесса: тяжелые модули импортируются один раз на процесс
+
+    Без графиков matplotlib и seaborn в процесс не загружаются.
+    """
+
+    import src.analysis  # noqa: F401
+    import src.data_loader  # noqa: F401
+
+    if plots:
+        import matplotlib
+        matplotlib.use('Agg')
+        import src.visualization  # noqa: F401
+
+
+def run_experiment(spec: ExperimentSpec, base_config, validate=False, plots=True, stage_workers=2):
+    """Полный анализ одного эксперимента; возвращает строку сводной таблицы"""
+
+    from src.pipeline import PipelineRunner, build_ab_test_stages
+
+    exp_config = spec.to_config(base_config)
+    output_dir = Path(exp_config.OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    row = {'experiment': spec.name, 'output_dir': str(output_dir), 'status': 'ok'}
+    start = time.perf_counter()
+
+    # Вывод каждого эксперимента пишем в свой лог, чтобы процессы не смешивали консоль
+    with open(output_dir / "run.log", 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        try:
+            stages, loader, analyzer = build_ab_test_stages(exp_config, validate=validate, plots=plots)
+            results = PipelineRunner(stages, max_workers=stage_workers).run()['analyze']
+        except Exception as e:
+            print(f"❌ {type(e).__name__}: {e}")
+            row.update(status=f"error: {e}", elapsed_sec=time.perf_counter() - start)
+            return row
+
+    desc = results['descriptive_stats']
+    ttest = results['ttest']
+    ci_lower, ci_upper = ttest['confidence_interval']
+
+    row.update({
+        'n_a': desc['group_a']['size'],
+        'n_b': desc['group_b']['size'],
+        'mean_a': desc['group_a']['mean'],
+        'mean_b': desc['group_b']['mean'],
+        'relative_diff': desc['effect']['relative_diff'],
+        'cohens_d': desc['effect']['cohens_d'],
+        't_statistic': ttest['t_statistic'],
+        'p_value': ttest['p_value'],
+        'ci_lower': ci_lower,
+        'ci_upper': ci_upper,
+        'alpha': exp_config.ALPHA,
+        'significant': bool(ttest['significant']),
+        'elapsed_sec': time.perf_counter() - start
+    })
+    return row
+
+
+def run_manifest(specs, base_config, workers=None, validate=False, plots=True):
+    """Запуск всех экспериментов в отдельных процессах и сводная таблица"""
+
+    import pandas as pd
+
+    workers = workers or min(len(specs), os.cpu_count() or 1)
+    rows = []
+
+    print(f"🧪 Экспериментов: {len(specs)}, процессов: {workers}")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(plots,)) as pool:
+        futures = {
+            pool.submit(run_experiment, spec, base_config, validate, plots): spec
+            for spec in specs
+        }
+        for future in as_completed(futures):
+            row = future.result()
+            mark = "✓" if row['status'] == 'ok' else "❌"
+            print(f"  {mark} {row['experiment']}: {row['status']} ({row['elapsed_sec']:.1f} с)")
+            rows.append(row)
+
+    order = {spec.name: i for i, spec in enumerate(specs)}
+    summary = pd.DataFrame(rows)
+    summary = summary.sort_values('experiment', key=lambda s: s.map(order)).reset_index(drop=True)
+
+    summary_path = Path(base_config.OUTPUT_DIR) / "experiments_summary.csv"
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(summary_path, index=False, encoding='utf-8-sig')
+    print(f"✓ Сводная таблица сохранена в {summary_path}")
+
+    return summary
+
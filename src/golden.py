@@ -0,0 +1,258 @@
+"""
+Эталонные результаты (golden outputs) для проверки ускоренных реализаций
+
+Для заданных seed генератора создается синтетическая выгрузка, по ней
+выполняется весь анализ (t-тест, валидация, байесовский анализ,
+выживаемость, ratio-метрики, подгруппы, DiD) и собираются все результаты
+и агрегированные таблицы. Вложенные словари, списки и таблицы
+разворачиваются в плоский словарь «путь -> значение» и сохраняются в JSON.
+
+При проверке анализ повторяется и каждое число сравнивается с эталоном
+с допуском |текущее - эталон| <= atol + rtol·|эталон|; строки и флаги —
+точно. Допуск можно ослабить для отдельных путей (шаблоны fnmatch),
+например для оценок Монте-Карло после смены порядка выборок.
+
+Запуск:
+    python main.py --golden-save reports/golden.json --golden-seeds 42 123 2025
+    python main.py --golden-check reports/golden.json
+"""
+
+import io
+import json
+import math
+import time
+import tempfile
+import contextlib
+from datetime import date, datetime
+from dataclasses import replace
+from fnmatch import fnmatch
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SEEDS = (42, 123, 2025)
+DEFAULT_TICKETS = 300
+DEFAULT_RTOL = 1e-9
+DEFAULT_ATOL = 1e-12
+
+
+def _scalar(value):
+    """Значение для JSON: bool, float, строка или None"""
+
+    if value is None or isinstance(value, (bool, np.bool_)):
+        return None if value is None else bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if value is pd.NaT:
+        return None
+    return str(value)
+
+
+def flatten(obj, prefix=''):
+    """Плоский словарь «путь -> значение»: a.b[3].c
+
+    Таблицы разворачиваются по колонкам (индекс — отдельной колонкой),
+    массивы и списки — поэлементно.
+    """
+
+    flat = {}
+
+    def walk(value, path):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(item, f"{path}.{key}" if path else str(key))
+        elif isinstance(value, pd.Series):
+            walk(value.to_frame(), path)
+        elif isinstance(value, pd.DataFrame):
+            frame = value.reset_index()
+            for col in frame.columns:
+                walk(frame[col].to_numpy(), f"{path}.{col}")
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            for i, item in enumerate(value):
+                walk(item, f"{path}[{i}]")
+        else:
+            flat[path] = _scalar(value)
+
+    walk(obj, prefix)
+    return flat
+
+
+def compare(reference, current, rtol=DEFAULT_RTOL, atol=DEFAULT_ATOL, tolerances=None):
+    """Расхождения текущих результатов с эталоном (таблица, пустая — все совпало)
+
+    tolerances — {шаблон пути: (rtol, atol)}; применяется первый подходящий шаблон.
+    Числа сравниваются одной векторной операцией, NaN равен NaN.
+    """
+
+    tolerances = tolerances or {}
+    rows = []
+    for path in sorted(reference.keys() - current.keys()):
+        rows.append({'path': path, 'kind': 'missing', 'reference': reference[path], 'current': None})
+    for path in sorted(current.keys() - reference.keys()):
+        rows.append({'path': path, 'kind': 'extra', 'reference': None, 'current': current[path]})
+
+    common = sorted(reference.keys() & current.keys())
+    numeric = [path for path in common
+               if isinstance(reference[path], float) and isinstance(current[path], float)]
+    numeric_set = set(numeric)
+
+    for path in common:
+        if path not in numeric_set and reference[path] != current[path]:
+            rows.append({'path': path, 'kind': 'value', 'reference': reference[path], 'current': current[path]})
+
+    if numeric:
+        ref = np.array([reference[path] for path in numeric])
+        cur = np.array([current[path] for path in numeric])
+        limits = np.array([next((tol for pattern, tol in tolerances.items() if fnmatch(path, pattern)),
+                                (rtol, atol)) for path in numeric])
+        with np.errstate(invalid='ignore'):
+            close = np.isclose(cur, ref, rtol=limits[:, 0], atol=limits[:, 1], equal_nan=True)
+        for k in np.nonzero(~close)[0]:
+            rows.append({'path': numeric[k], 'kind': 'numeric', 'reference': ref[k], 'current': cur[k]})
+
+    report = pd.DataFrame(rows, columns=['path', 'kind', 'reference', 'current'])
+    numeric_rows = report['kind'] == 'numeric'
+    report['abs_diff'] = np.nan
+    report.loc[numeric_rows, 'abs_diff'] = (report.loc[numeric_rows, 'current'].astype(float)
+                                           - report.loc[numeric_rows, 'reference'].astype(float)).abs()
+    return report
+
+
+def _short(value, start=0, width=60):
+    """Значение для печати: у длинных строк — фрагмент с позиции start"""
+
+    if not isinstance(value, str):
+        return str(value)
+    text = repr(value[start:start + width])
+    return text if start == 0 else '…' + text
+
+
+class GoldenRunner:
+    """Снимок всех результатов анализа для набора seed и проверка повторного запуска"""
+
+    def __init__(self, config, seeds=DEFAULT_SEEDS, n_tickets=DEFAULT_TICKETS, workers=4):
+        self.config = config
+        self.seeds = tuple(seeds)
+        self.n_tickets = n_tickets
+        self.workers = workers
+        self.golden = None
+        self.report = None
+
+    def run_seed(self, seed):
+        """Все результаты анализа одной синтетической выгрузки (плоский словарь)"""
+
+        from generate_jira_data import JiraDataGenerator
+        from src.pipeline import PipelineRunner, build_ab_test_stages
+
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            generator = JiraDataGenerator(seed=seed)
+            files = generator.export_formats(generator.generate_dataset(self.n_tickets), tmp)
+
+            run_config = replace(self.config, DATA_PATH=files['full'], DATA_PATHS=(),
+                                 DAILY_DATA_PATH=files['daily'], OUTPUT_DIR=str(Path(tmp) / "reports"))
+            stages, loader, _ = build_ab_test_stages(run_config, validate=True, plots=False, bayes=True,
+                                                     survival=True, ratio=True, hte=True, did=True)
+            results = PipelineRunner(stages, max_workers=self.workers).run()
+
+            outputs = {
+                'analysis': results['analyze'],
+                'tables': {
+                    'classroom_stats': loader.classroom_stats,
+                    'category_stats': loader.category_stats,
+                    'daily': loader.df_daily,
+                },
+            }
+            return flatten(outputs)
+
+    def snapshot(self):
+        """{seed: плоский словарь} для всех seed"""
+
+        snapshots = {}
+        for seed in self.seeds:
+            start = time.perf_counter()
+            snapshots[str(seed)] = self.run_seed(seed)
+            print(f"   seed {seed}: {len(snapshots[str(seed)])} значений ({time.perf_counter() - start:.1f} с)")
+        return snapshots
+
+    def save(self, path):
+        """Записать эталон в JSON"""
+
+        print(f"\n📸 Эталонные результаты: seed {', '.join(map(str, self.seeds))}, {self.n_tickets} заявок...")
+        golden = {
+            'meta': {
+                'seeds': list(self.seeds),
+                'n_tickets': self.n_tickets,
+                'created': f"{datetime.now():%Y-%m-%d %H:%M:%S}",
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+            },
+            'seeds': self.snapshot(),
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(golden, f, ensure_ascii=False, indent=1)
+        print(f"✓ Эталон сохранен в {path}")
+        return path
+
+    @classmethod
+    def from_file(cls, config, path, workers=4):
+        """Загрузчик для проверки: seed и размер выгрузки — из эталона"""
+
+        with open(path, encoding='utf-8') as f:
+            golden = json.load(f)
+        runner = cls(config, seeds=golden['meta']['seeds'], n_tickets=golden['meta']['n_tickets'], workers=workers)
+        runner.golden = golden
+        return runner
+
+    def check(self, rtol=DEFAULT_RTOL, atol=DEFAULT_ATOL, tolerances=None):
+        """Повторить анализ и сравнить с эталоном; True — все совпало"""
+
+        if self.golden is None:
+            raise ValueError("Эталон не загружен: создайте GoldenRunner.from_file(config, path)")
+
+        print(f"\n🔁 Сравнение с эталоном от {self.golden['meta']['created']} "
+              f"(rtol={rtol:g}, atol={atol:g})...")
+        current = self.snapshot()
+
+        reports = []
+        for seed, reference in self.golden['seeds'].items():
+            report = compare(reference, current.get(seed, {}), rtol, atol, tolerances)
+            report.insert(0, 'seed', int(seed))
+            reports.append(report)
+        self.report = pd.concat(reports, ignore_index=True)
+        self.compared = sum(len(reference) for reference in self.golden['seeds'].values())
+        return self.report.empty
+
+    def print_summary(self, top=20):
+        """Печать результатов в консоль"""
+
+        if self.report is None:
+            print("Сначала выполните check()")
+            return
+
+        print("\n" + "=" * 60)
+        print("СРАВНЕНИЕ С ЭТАЛОНОМ")
+        print("=" * 60)
+        if self.report.empty:
+            print(f"   ✅ Все {self.compared} значений совпадают с эталоном")
+        else:
+            counts = self.report['kind'].value_counts()
+            print(f"   ❌ Расхождений: {len(self.report)} из {self.compared} "
+                  f"({', '.join(f'{kind}: {n}' for kind, n in counts.items())})")
+            for _, row in self.report.head(top).iterrows():
+                # У строк — фрагмент с первого различающегося символа
+                start = 0
+                if isinstance(row['reference'], str) and isinstance(row['current'], str):
+                    start = next((i for i, (a, b) in enumerate(zip(row['reference'], row['current'])) if a != b),
+                                 min(len(row['reference']), len(row['current'])))
+                    start = max(start - 20, 0)
+                diff = f", |Δ| = {row['abs_diff']:.3g}" if not math.isnan(row['abs_diff']) else ""
+                print(f"   seed {row['seed']} {row['path']}: {_short(row['reference'], start)} -> "
+                      f"{_short(row['current'], start)}{diff}")
+            if len(self.report) > top:
+                print(f"   ... и еще {len(self.report) - top}")
+        print("=" * 60)
@@ -0,0 +1,172 @@
+"""
+Неоднородность эффекта: где новая инструкция работает
+
+Для каждого значения атрибута заявки (кафедра, категория, приоритет,
+источник, тип вмешательства, ...) и каждой пары атрибутов сравнивается
+число таких заявок на аудиторию в группах. Все подгруппы считаются одной
+разреженной матрицей подгруппа x аудитория (один bincount по всем
+атрибутам сразу), t-тесты Уэлча — одним векторным вызовом, поправка на
+множественность — Бенджамини-Хохберг (контроль доли ложных открытий).
+"""
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+# Атрибуты заявки для поиска подгрупп (берутся те, что есть в выгрузке)
+HTE_COLUMNS = (
+    'Кафедра', 'Категория проблемы', 'Priority', 'Источник заявки',
+    'Тип вмешательства', 'Component/s', 'Влияние на процесс',
+)
+
+OVERALL = 'Все заявки'
+MISSING = '—'
+
+
+class HeterogeneityScanner:
+    """Эффект по подгруппам: значения атрибутов и их попарные сочетания"""
+
+    def __init__(self, config, columns=None, pairs=True, min_tickets=10):
+        self.config = config
+        self.columns = columns or HTE_COLUMNS
+        self.pairs = pairs
+        self.min_tickets = min_tickets
+        self.overall = []
+        self.results = None
+        self.skipped = 0
+
+    def subgroup_counts(self, df_clean):
+        """Подгруппы и матрица (подгруппа x аудитория) с числом заявок
+
+        Первая подгруппа — все заявки. Возвращает (таблица подгрупп,
+        scipy.sparse.csr_matrix, группа каждой аудитории).
+        """
+
+        from scipy.sparse import coo_matrix
+        from src.data_loader import JiraDataLoader
+
+        group_col = JiraDataLoader._find_column(df_clean, 'групп')
+        audience_col = JiraDataLoader._find_column(df_clean, 'аудитор')
+        if group_col is None or audience_col is None:
+            raise ValueError("Для поиска подгрупп нужны колонки группы и аудитории")
+
+        df = df_clean[df_clean[group_col].notna() & df_clean[audience_col].notna()]
+        room_codes, _ = pd.factorize(df[audience_col])
+        # Аудитория целиком в одной группе — берем группу первой заявки
+        room_arms = df[group_col].groupby(room_codes).first().to_numpy()
+
+        columns = [col for col in self.columns if col in df.columns]
+        codes = {col: pd.factorize(df[col].fillna(MISSING).astype(str)) for col in columns}
+        specs = [(col,) for col in columns] + (list(combinations(columns, 2)) if self.pairs else [])
+
+        # Номер подгруппы каждой заявки по каждому атрибуту (и паре) подряд
+        sub_ids = [np.zeros(len(df), dtype=np.int64)]
+        labels = [(OVERALL, OVERALL, 0)]
+        offset = 1
+        for spec in specs:
+            if len(spec) == 1:
+                key, uniques = codes[spec[0]]
+                values = list(uniques)
+            else:
+                (a, uniques_a), (b, uniques_b) = codes[spec[0]], codes[spec[1]]
+                key, combined = pd.factorize(a * len(uniques_b) + b)
+                values = [f"{uniques_a[k // len(uniques_b)]} × {uniques_b[k % len(uniques_b)]}" for k in combined]
+            sub_ids.append(key + offset)
+            labels += [(' × '.join(spec), value, len(spec)) for value in values]
+            offset += len(values)
+
+        rows = np.concatenate(sub_ids)
+        cols = np.tile(room_codes, len(sub_ids))
+        # Повторяющиеся пары (подгруппа, аудитория) суммируются при переходе в CSR
+        counts = coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(offset, len(room_arms))).tocsr()
+        subgroups = pd.DataFrame(labels, columns=['attribute', 'value', 'level'])
+        return subgroups, counts, room_arms
+
+    def scan(self, df_clean):
+        """Ранжированная таблица подгрупп: эффект, интервал, p и q (BH)"""
+
+        from src.analysis import ABTestAnalyzer, bh_adjust
+
+        print("\n🔎 Ищем подгруппы с разным эффектом инструкции...")
+
+        subgroups, counts, room_arms = self.subgroup_counts(df_clean)
+        arms = sorted(pd.unique(room_arms))
+        control = self.config.CONTROL_ARM if self.config.CONTROL_ARM in arms else arms[0]
+        arms.remove(control)
+        arms.insert(0, control)
+
+        # Суммы и суммы квадратов по группам — умножение на матрицу индикаторов групп
+        indicator = (room_arms[:, None] == np.array(arms)[None, :]).astype(float)
+        n = indicator.sum(axis=0)
+        sums = np.asarray(counts @ indicator)
+        sums_sq = np.asarray(counts.multiply(counts) @ indicator)
+        mean = sums / n
+        var = np.maximum((sums_sq - n * mean ** 2) / (n - 1), 0)
+
+        n_arms = len(arms)
+        tickets = sums.sum(axis=1)
+        testable = (tickets >= self.min_tickets) & (var[:, 0] + var[:, 1:].max(axis=1) > 0)
+        testable[0] = True
+        cells = np.nonzero(testable)[0]
+
+        pairs = [(s * n_arms, s * n_arms + k) for s in cells for k in range(1, n_arms)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tests = ABTestAnalyzer(self.config).run_multiarm_tests(
+                arms * len(subgroups), np.tile(n, len(subgroups)), mean.ravel(), var.ravel(), pairs)
+
+        rows = np.repeat(cells, n_arms - 1)
+        table = subgroups.iloc[rows].reset_index(drop=True)
+        table['tickets'] = tickets[rows].astype(int)
+        table['arm'] = tests['arm']
+        table['vs'] = tests['vs']
+        table['mean_control'] = mean[rows, 0]
+        table['mean_arm'] = mean[rows, [arms.index(arm) for arm in tests['arm']]]
+        for key in ('mean_diff', 'relative_diff', 'ci_lower', 'ci_upper', 't_statistic', 'p_value'):
+            table[key] = tests[key]
+
+        overall = table['attribute'] == OVERALL
+        self.overall = table[overall].drop(columns=['attribute', 'value', 'level']).to_dict('records')
+        table = table[~overall].copy()
+        table['q_value'] = bh_adjust(table['p_value'].to_numpy()) if len(table) else []
+        table['significant'] = table['q_value'] < self.config.ALPHA
+
+        table['_abs'] = -table['mean_diff'].abs()
+        self.results = (table.sort_values(['p_value', '_abs'], kind='stable')
+                        .drop(columns='_abs').reset_index(drop=True))
+        self.skipped = int(len(subgroups) - len(cells))
+
+        print(f"   Подгрупп: {len(subgroups) - 1}, проверено {len(cells) - 1} "
+              f"(меньше {self.min_tickets} заявок или без разброса — {self.skipped})")
+        print(f"✓ Значимо после поправки BH (q < {self.config.ALPHA}): {int(self.results['significant'].sum())}")
+        return self.results
+
+    def summary(self, top=10):
+        """Итог для JSON: общий эффект и лучшие подгруппы"""
+
+        return {
+            'overall': self.overall,
+            'tested': int(len(self.results)),
+            'significant': int(self.results['significant'].sum()),
+            'top': self.results.head(top).to_dict('records'),
+        }
+
+    def print_summary(self, top=10):
+        """Печать результатов в консоль"""
+
+        if self.results is None:
+            print("Сначала выполните scan()")
+            return
+
+        print("\n" + "=" * 60)
+        print("ЭФФЕКТ ПО ПОДГРУППАМ (поправка Бенджамини-Хохберга)")
+        print("=" * 60)
+        for row in self.overall:
+            print(f"   Все заявки, {row['arm']} vs {row['vs']}: {row['mean_diff']:+.2f} заявок на аудиторию, "
+                  f"p = {row['p_value']:.4f}")
+        for _, row in self.results.head(top).iterrows():
+            mark = "✅" if row['significant'] else "·"
+            print(f"   {mark} {row['attribute']} = {row['value']}: {row['arm']} vs {row['vs']} "
+                  f"{row['mean_diff']:+.2f} [{row['ci_lower']:+.2f}; {row['ci_upper']:+.2f}], "
+                  f"p = {row['p_value']:.4f}, q = {row['q_value']:.4f} (заявок {row['tickets']})")
+        print("=" * 60)
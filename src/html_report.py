@@ -0,0 +1,251 @@
+"""
+Интерактивный HTML-отчет: один файл, данные в JSON, графики в SVG
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from src.utils import convert_numpy
+
+
+def _finite(obj):
+    """NaN и ±inf -> None (JSON.parse в браузере их не принимает)"""
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_finite(v) for v in obj]
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    return obj
+
+
+def _view(title, group_a, group_b, results, category_stats=None, df_daily=None):
+    """Данные одного представления (вся выборка или сегмент) для отчета"""
+
+    desc = results['descriptive_stats']
+    ttest = results['ttest']
+
+    categories = []
+    if category_stats is not None:
+        for name, row in category_stats.iterrows():
+            categories.append({'name': str(name), 'A': int(row.get('A', 0)), 'B': int(row.get('B', 0))})
+
+    daily = []
+    if df_daily is not None:
+        for date, a, b in zip(df_daily['Дата'], df_daily['A'], df_daily['B']):
+            daily.append({'date': str(date)[:10], 'A': int(a), 'B': int(b)})
+
+    return {
+        'title': title,
+        'group_a': [float(x) for x in group_a],
+        'group_b': [float(x) for x in group_b],
+        'mean_a': desc['group_a']['mean'],
+        'mean_b': desc['group_b']['mean'],
+        'sem_a': desc['group_a']['sem'],
+        'sem_b': desc['group_b']['sem'],
+        'relative_diff': desc['effect']['relative_diff'],
+        'p_value': ttest['p_value'],
+        'mean_diff': ttest['mean_diff'],
+        'ci': list(ttest['confidence_interval']),
+        'significant': bool(ttest['significant']),
+        'categories': categories,
+        'daily': daily
+    }
+
+
+class HTMLReportWriter:
+    """HTML-отчет без внешних зависимостей
+
+    Данные встраиваются в страницу компактным JSON, а небольшой скрипт
+    рисует графики в SVG прямо в браузере. Переключение сегментов
+    и подсказки по дням не требуют перерисовки на стороне Python.
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    def build_payload(self, loader, results, segments=None, segment_results=None):
+        """Данные для отчета: вся выборка + сегменты (если посчитаны)"""
+
+        payload = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'alpha': self.config.ALPHA,
+            'names': {'A': self.config.GROUP_A_NAME, 'B': self.config.GROUP_B_NAME},
+            'colors': {'A': self.config.COLOR_A, 'B': self.config.COLOR_B},
+            'views': {
+                'Все аудитории': _view('Все аудитории', loader.group_a_tickets, loader.group_b_tickets,
+                                       results, loader.category_stats, loader.df_daily)
+            }
+        }
+
+        for name, seg_results in (segment_results or {}).items():
+            data = segments[name]
+            payload['views'][str(name)] = _view(str(name), data['group_a'], data['group_b'], seg_results,
+                                                data['category_stats'], data['daily'])
+
+        return convert_numpy(payload)
+
+    def write(self, payload, path):
+        """Записать отчет в один HTML-файл"""
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        data = json.dumps(_finite(payload), ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+        data = data.replace('</', '<\\/')
+
+        html = _TEMPLATE.replace('/*DATA*/', data)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+        print(f"  ✓ Сохранено: {path} ({path.stat().st_size / 1024:.0f} КБ)")
+        return path
+
+
+_TEMPLATE = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>A/B-тест: отчет</title>
+<style>
+body { font-family: 'DejaVu Sans', Arial, sans-serif; margin: 24px; color: #222; background: #fafafa; }
+h1 { font-size: 22px; margin: 0 0 12px; }
+.grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(420px, 1fr)); gap: 16px; }
+.card { background: #fff; border: 1px solid #ddd; border-radius: 8px; padding: 12px 16px; }
+.card h2 { font-size: 15px; margin: 0 0 8px; }
+.wide { grid-column: 1 / -1; }
+table { border-collapse: collapse; width: 100%; font-size: 13px; }
+td, th { border: 1px solid #ccc; padding: 4px 8px; text-align: center; }
+th { background: #4472C4; color: #fff; }
+.ok { background: #C6EFCE; color: #006100; font-weight: bold; }
+.fail { background: #FFC7CE; color: #9C0006; font-weight: bold; }
+svg text { font-size: 11px; }
+</style>
+</head>
+<body>
+<h1>A/B-тест: эффективность новой инструкции</h1>
+<p>Срез: <select id="view"></select> <span id="generated"></span></p>
+<div class="grid">
+  <div class="card"><h2>Ключевые метрики</h2><div id="metrics"></div></div>
+  <div class="card"><h2>Среднее заявок на аудиторию (± SEM)</h2><svg id="means" width="420" height="240"></svg></div>
+  <div class="card"><h2>Разница средних (B − A) и 95% ДИ</h2><svg id="effect" width="420" height="120"></svg></div>
+  <div class="card"><h2>Заявки по аудиториям</h2><svg id="points" width="420" height="240"></svg></div>
+  <div class="card wide"><h2>Категории проблем</h2><svg id="categories" width="900" height="300"></svg></div>
+  <div class="card wide"><h2>Динамика по дням (наведите на точку)</h2><svg id="daily" width="900" height="260"></svg></div>
+</div>
+<script id="data" type="application/json">/*DATA*/</script>
+<script>
+const D = JSON.parse(document.getElementById('data').textContent);
+const NS = 'http://www.w3.org/2000/svg';
+
+function el(parent, tag, attrs, text) {
+  const node = document.createElementNS(NS, tag);
+  for (const k in attrs) node.setAttribute(k, attrs[k]);
+  if (text !== undefined) node.textContent = text;
+  parent.appendChild(node);
+  return node;
+}
+function clear(svg) { while (svg.firstChild) svg.removeChild(svg.firstChild); return svg; }
+function scale(d0, d1, r0, r1) { return v => r0 + (v - d0) / ((d1 - d0) || 1) * (r1 - r0); }
+function fmt(v, n) { return v === null ? '—' : Number(v).toFixed(n); }
+
+function metrics(v) {
+  const sumA = v.group_a.reduce((s, x) => s + x, 0), sumB = v.group_b.reduce((s, x) => s + x, 0);
+  const rows = [
+    ['Кол-во аудиторий', v.group_a.length, v.group_b.length, '—'],
+    ['Всего заявок', sumA, sumB, fmt((sumB - sumA) / sumA * 100, 1) + '%'],
+    ['Среднее заявок', fmt(v.mean_a, 2), fmt(v.mean_b, 2), fmt(v.relative_diff, 1) + '%'],
+    ['p-значение', '—', '—', fmt(v.p_value, 4)]
+  ];
+  let html = '<table><tr><th>Метрика</th><th>Группа A</th><th>Группа B</th><th>Изменение</th></tr>';
+  for (const r of rows) html += '<tr>' + r.map(c => '<td>' + c + '</td>').join('') + '</tr>';
+  html += '<tr><td>Статус</td><td>—</td><td>—</td><td class="' + (v.significant ? 'ok">ЗНАЧИМО' : 'fail">НЕ ЗНАЧИМО') + '</td></tr></table>';
+  document.getElementById('metrics').innerHTML = html;
+}
+
+function means(v) {
+  const svg = clear(document.getElementById('means'));
+  const top = Math.max(v.mean_a + (v.sem_a || 0), v.mean_b + (v.sem_b || 0)) * 1.25 || 1;
+  const y = scale(0, top, 210, 20);
+  [['A', v.mean_a, v.sem_a, 80], ['B', v.mean_b, v.sem_b, 260]].forEach(([g, m, e, x]) => {
+    el(svg, 'rect', {x: x, y: y(m), width: 90, height: 210 - y(m), fill: D.colors[g], stroke: '#000'});
+    el(svg, 'line', {x1: x + 45, x2: x + 45, y1: y(m - (e || 0)), y2: y(m + (e || 0)), stroke: '#000', 'stroke-width': 2});
+    el(svg, 'text', {x: x + 45, y: y(m + (e || 0)) - 6, 'text-anchor': 'middle', 'font-weight': 'bold'}, fmt(m, 1) + ' ± ' + fmt(e, 1));
+    el(svg, 'text', {x: x + 45, y: 228, 'text-anchor': 'middle'}, 'Группа ' + g);
+  });
+}
+
+function effect(v) {
+  const svg = clear(document.getElementById('effect'));
+  const lo = Math.min(v.ci[0], 0), hi = Math.max(v.ci[1], 0), pad = (hi - lo) * 0.15 || 1;
+  const x = scale(lo - pad, hi + pad, 20, 400);
+  el(svg, 'rect', {x: x(v.ci[0]), y: 20, width: x(v.ci[1]) - x(v.ci[0]), height: 60, fill: 'lightblue', opacity: 0.4});
+  el(svg, 'line', {x1: x(0), x2: x(0), y1: 10, y2: 90, stroke: 'red', 'stroke-dasharray': '5,4', 'stroke-width': 2});
+  el(svg, 'line', {x1: x(v.ci[0]), x2: x(v.ci[1]), y1: 50, y2: 50, stroke: 'darkblue', 'stroke-width': 3});
+  el(svg, 'circle', {cx: x(v.mean_diff), cy: 50, r: 8, fill: 'darkblue', stroke: '#fff', 'stroke-width': 2});
+  el(svg, 'text', {x: 210, y: 110, 'text-anchor': 'middle', 'font-weight': 'bold'},
+     'Эффект: ' + fmt(v.mean_diff, 2) + '  95% ДИ: [' + fmt(v.ci[0], 2) + ', ' + fmt(v.ci[1], 2) + ']');
+}
+
+function points(v) {
+  const svg = clear(document.getElementById('points'));
+  const top = Math.max(...v.group_a, ...v.group_b, 1) * 1.1;
+  const y = scale(0, top, 210, 15);
+  [['A', v.group_a, 125], ['B', v.group_b, 305]].forEach(([g, values, cx]) => {
+    values.forEach((val, i) => {
+      const c = el(svg, 'circle', {cx: cx + ((i * 37) % 60) - 30, cy: y(val), r: 5, fill: D.colors[g], opacity: 0.75});
+      el(c, 'title', {}, 'Группа ' + g + ': ' + val + ' заявок');
+    });
+    el(svg, 'text', {x: cx, y: 228, 'text-anchor': 'middle'}, 'Группа ' + g);
+  });
+}
+
+function categories(v) {
+  const svg = clear(document.getElementById('categories'));
+  const cats = v.categories.slice().sort((p, q) => (q.A + q.B) - (p.A + p.B));
+  const top = Math.max(1, ...cats.map(c => Math.max(c.A, c.B)));
+  const x = scale(0, top, 0, 560), rowH = Math.min(30, 280 / Math.max(cats.length, 1));
+  cats.forEach((c, i) => {
+    const y0 = 10 + i * rowH;
+    el(svg, 'text', {x: 290, y: y0 + rowH * 0.6, 'text-anchor': 'end'}, c.name.length > 45 ? c.name.slice(0, 44) + '…' : c.name);
+    ['A', 'B'].forEach((g, k) => {
+      const r = el(svg, 'rect', {x: 300, y: y0 + k * rowH * 0.4, width: x(c[g]), height: rowH * 0.38, fill: D.colors[g]});
+      el(r, 'title', {}, c.name + ' — группа ' + g + ': ' + c[g]);
+    });
+  });
+}
+
+function daily(v) {
+  const svg = clear(document.getElementById('daily'));
+  if (!v.daily.length) { el(svg, 'text', {x: 20, y: 30}, 'Нет данных по дням'); return; }
+  const n = v.daily.length, top = Math.max(1, ...v.daily.map(d => Math.max(d.A, d.B))) * 1.15;
+  const x = scale(0, n - 1, 40, 880), y = scale(0, top, 230, 10);
+  el(svg, 'line', {x1: 40, x2: 880, y1: 230, y2: 230, stroke: '#999'});
+  ['A', 'B'].forEach(g => {
+    el(svg, 'polyline', {points: v.daily.map((d, i) => x(i) + ',' + y(d[g])).join(' '), fill: 'none', stroke: D.colors[g], 'stroke-width': 2});
+    v.daily.forEach((d, i) => {
+      const c = el(svg, 'circle', {cx: x(i), cy: y(d[g]), r: 4, fill: D.colors[g]});
+      el(c, 'title', {}, d.date + ' — группа ' + g + ': ' + d[g]);
+    });
+  });
+  const step = Math.max(1, Math.ceil(n / 10));
+  v.daily.forEach((d, i) => { if (i % step === 0) el(svg, 'text', {x: x(i), y: 250, 'text-anchor': 'middle'}, d.date); });
+}
+
+function render(name) {
+  const v = D.views[name];
+  metrics(v); means(v); effect(v); points(v); categories(v); daily(v);
+}
+
+const select = document.getElementById('view');
+Object.keys(D.views).forEach(name => select.add(new Option(name, name)));
+select.onchange = () => render(select.value);
+document.getElementById('generated').textContent = ' · сформирован ' + D.generated;
+render(select.value);
+</script>
+</body>
+</html>
+"""
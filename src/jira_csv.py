@@ -0,0 +1,115 @@
+"""
+Чтение CSV-выгрузок JIRA
+
+Полная выгрузка содержит многострочные поля в кавычках (Description,
+Комментарии) и десятки колонок, которые анализу не нужны. Читатель:
+- определяет разделитель по строке заголовков (запятая, точка с запятой, табуляция);
+- разбирает файл C-парсером pandas, который корректно обрабатывает
+  переводы строк и разделители внутри кавычек;
+- пропускает при разборе (usecols) широкие текстовые колонки — они не
+  загружаются и не отбрасываются потом; остальные колонки читаются все,
+  чтобы любую из них можно было взять для сегментов и подгрупп.
+"""
+
+import io
+import csv
+
+import pandas as pd
+
+# Широкие текстовые колонки: не читаются, если не запрошены явно
+WIDE_COLUMNS = ('Description', 'Комментарии', 'Environment')
+
+DELIMITERS = (',', ';', '\t')
+
+
+def sniff_header(file_path, encoding='utf-8-sig'):
+    """Разделитель и список колонок по первой строке файла
+
+    Выбирается разделитель, дающий больше всего колонок. Если вся строка
+    заголовков в кавычках (строки «слиплись» в одну колонку), возвращается
+    wrapped=True.
+    """
+
+    with open(file_path, encoding=encoding, newline='') as f:
+        line = f.readline()
+
+    best = max(DELIMITERS, key=lambda sep: len(next(csv.reader([line], delimiter=sep))))
+    header = next(csv.reader([line], delimiter=best))
+
+    wrapped = False
+    if len(header) == 1:
+        inner = max(DELIMITERS, key=header[0].count)
+        if inner in header[0]:
+            best, wrapped = inner, True
+            header = next(csv.reader([header[0]], delimiter=inner))
+
+    return best, [col.strip() for col in header], wrapped
+
+
+def select_columns(header, columns=None, skip=WIDE_COLUMNS):
+    """Колонки для чтения: заданные (если есть в файле) или все, кроме широких"""
+
+    wanted = set(columns or ())
+    selected = [col for col in header if col in wanted]
+    return selected or [col for col in header if col not in skip]
+
+
+class UnwrappedReader(io.TextIOBase):
+    """Файл, в котором каждая строка целиком взята в кавычки: внешний слой
+    снимается модулем csv по мере чтения, pandas получает обычный CSV
+
+    В памяти — только очередной блок, а не копия всего файла.
+    """
+
+    def __init__(self, f):
+        self._rows = csv.reader(f)
+        self._parts = []
+        self._size = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size is None or size < 0 or self._size < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = (row[0] if row else '') + '\n'
+            self._parts.append(line)
+            self._size += len(line)
+
+        data = ''.join(self._parts)
+        if size is not None and 0 <= size < len(data):
+            data, rest = data[:size], data[size:]
+        else:
+            rest = ''
+        self._parts = [rest] if rest else []
+        self._size = len(rest)
+        return data
+
+
+def _read(source, chunksize, options):
+    if chunksize:
+        return pd.concat(pd.read_csv(source, chunksize=chunksize, **options), ignore_index=True)
+    return pd.read_csv(source, **options)
+
+
+def read_jira_export(file_path, columns=None, skip=WIDE_COLUMNS, chunksize=0, encoding='utf-8-sig'):
+    """Выгрузка JIRA -> (DataFrame без широких текстовых колонок, сведения о файле)
+
+    columns — только эти колонки (по умолчанию все, кроме skip);
+    chunksize — разбор блоками по chunksize строк (меньше пиковая память).
+    """
+
+    sep, header, wrapped = sniff_header(file_path, encoding)
+    usecols = select_columns(header, columns, skip)
+    options = dict(sep=sep, usecols=lambda col: col.strip() in usecols, engine='c')
+
+    if wrapped:
+        with open(file_path, encoding=encoding, newline='') as f:
+            df = _read(UnwrappedReader(f), chunksize, options)
+    else:
+        df = _read(file_path, chunksize, dict(options, encoding=encoding))
+
+    df.columns = [col.strip() for col in df.columns]
+    return df, {'sep': sep, 'wrapped': wrapped, 'columns_total': len(header)}
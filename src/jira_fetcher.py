@@ -0,0 +1,266 @@
+"""
+Загрузка заявок напрямую из JIRA (REST API /rest/api/2/search)
+
+Страницы запрашиваются параллельно в нескольких потоках; у каждого потока
+свое постоянное HTTP-соединение (keep-alive). Временные ошибки (обрыв
+соединения, 429, 5xx) повторяются с экспоненциальной задержкой.
+Повторные запуски забирают только заявки, измененные с прошлой
+синхронизации (updated >= last_sync), и дописывают их в базу заявок.
+"""
+
+import json
+import time
+import random
+import threading
+import http.client
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+import pandas as pd
+
+SEARCH_PATH = "/rest/api/2/search"
+
+# Колонка выгрузки -> поле JIRA. Поля A/B-теста — пользовательские (customfield_*),
+# их идентификаторы зависят от экземпляра JIRA
+STANDARD_FIELDS = {
+    'Summary': 'summary',
+    'Status': 'status',
+    'Priority': 'priority',
+    'Created': 'created',
+    'Updated': 'updated',
+    'Component/s': 'components',
+}
+CUSTOM_FIELDS = {
+    'Аудитория': 'customfield_10101',
+    'Группа A/B теста': 'customfield_10102',
+    'Категория проблемы': 'customfield_10103',
+    'Кафедра': 'customfield_10104',
+    'Влияние на процесс': 'customfield_10105',
+    'Время решения (часы)': 'customfield_10106',
+}
+
+# Временные ошибки сервера — запрос повторяется
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Формат дат в JQL (точность — минуты) и в выгрузке CSV
+JQL_DATE_FORMAT = '%Y/%m/%d %H:%M'
+EXPORT_DATE_FORMAT = '%d/%m/%Y %H:%M'
+
+SYNC_STATE_KEY = 'jira_last_sync'
+
+
+def _field_value(value):
+    """Значение поля JIRA как строка/число: {"name": ...}, {"value": ...}, списки"""
+
+    if isinstance(value, dict):
+        return value.get('value', value.get('name'))
+    if isinstance(value, list):
+        return ', '.join(str(_field_value(item)) for item in value) or None
+    return value
+
+
+def _parse_jira_dates(values):
+    """'2025-10-01T09:59:00.000+0300' -> локальное время сервера JIRA (без зоны)"""
+
+    return pd.to_datetime(pd.Series(values, dtype=object).str[:19], format='%Y-%m-%dT%H:%M:%S', errors='coerce')
+
+
+def issues_to_frame(issues, custom_fields=None):
+    """Заявки из ответа API -> таблица с колонками CSV-выгрузки (как у load_data)"""
+
+    fields = dict(STANDARD_FIELDS, **(custom_fields or CUSTOM_FIELDS))
+    columns = {'Issue Key': [issue['key'] for issue in issues]}
+    for column, field in fields.items():
+        columns[column] = [_field_value(issue['fields'].get(field)) for issue in issues]
+
+    df = pd.DataFrame(columns)
+    for column in ('Created', 'Updated'):
+        df[column] = _parse_jira_dates(df[column]).dt.strftime(EXPORT_DATE_FORMAT)
+    return df
+
+
+class JiraFetcher:
+    """Постраничная загрузка заявок из JIRA в несколько потоков"""
+
+    def __init__(self, base_url, jql="project = MMC", page_size=100, workers=4, token=None,
+                 retries=5, backoff=0.5, timeout=30, custom_fields=None):
+        url = urlsplit(base_url)
+        if url.scheme not in ('http', 'https'):
+            raise ValueError(f"Адрес JIRA должен начинаться с http:// или https://: {base_url}")
+
+        self.host = url.hostname
+        self.port = url.port
+        self.base_path = url.path.rstrip('/')
+        self.connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+
+        self.jql = jql
+        self.page_size = page_size
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.custom_fields = custom_fields or CUSTOM_FIELDS
+
+        self.headers = {'Accept': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f"Bearer {token}"
+
+        self._local = threading.local()
+        self.stats = {'requests': 0, 'retries': 0}
+        self._stats_lock = threading.Lock()
+
+    # ===== HTTP =====
+
+    def _connection(self):
+        """Постоянное соединение текущего потока (создается при первом запросе)"""
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.connection_class(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _get_json(self, path, params):
+        """GET с повторами: задержка backoff * 2^попытка со случайным разбросом
+        (или Retry-After сервера)"""
+
+        target = f"{self.base_path}{path}?{urlencode(params)}"
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                conn = self._connection()
+                conn.request('GET', target, headers=self.headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                # Соединение могло закрыться на стороне сервера — открываем новое
+                self._drop_connection()
+                error = f"{type(e).__name__}: {e}"
+            else:
+                self._count('requests')
+                if response.status == 200:
+                    return json.loads(body)
+                if response.status not in RETRY_STATUSES:
+                    raise ValueError(f"JIRA вернула HTTP {response.status}: {body[:200].decode('utf-8', 'replace')}")
+                error = f"HTTP {response.status}"
+                retry_after = response.getheader('Retry-After')
+
+            if attempt == self.retries:
+                raise ConnectionError(f"JIRA недоступна после {self.retries + 1} попыток ({error})")
+            self._count('retries')
+            delay = float(retry_after) if retry_after else self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+            time.sleep(delay)
+
+    # ===== Поиск =====
+
+    def build_jql(self, since=None):
+        """JQL запроса; since — только заявки, измененные с этого момента"""
+
+        jql = f"({self.jql})" if since is not None else self.jql
+        if since is not None:
+            jql += f' AND updated >= "{pd.Timestamp(since):{JQL_DATE_FORMAT}}"'
+        # Постоянный порядок нужен, чтобы страницы по startAt не пересекались
+        return jql + " ORDER BY key ASC"
+
+    def fetch_page(self, jql, start_at):
+        fields = ','.join(list(STANDARD_FIELDS.values()) + list(self.custom_fields.values()))
+        return self._get_json(SEARCH_PATH, {
+            'jql': jql,
+            'startAt': start_at,
+            'maxResults': self.page_size,
+            'fields': fields,
+        })
+
+    def iter_pages(self, since=None):
+        """Страницы заявок (таблицы в формате CSV-выгрузки) по порядку
+
+        Первая страница сообщает общее число заявок, остальные запрашиваются
+        параллельно; в работе не больше 2 * workers страниц, поэтому память
+        не растет с размером выборки.
+        """
+
+        jql = self.build_jql(since)
+        first = self.fetch_page(jql, 0)
+        total = first.get('total', len(first['issues']))
+        # Сервер может уменьшить размер страницы — шагаем по фактическому
+        step = first.get('maxResults') or self.page_size
+        yield issues_to_frame(first['issues'], self.custom_fields)
+
+        starts = iter(range(step, total, step))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for start in starts:
+                pending.append(pool.submit(self.fetch_page, jql, start))
+                if len(pending) >= 2 * self.workers:
+                    yield issues_to_frame(pending.popleft().result()['issues'], self.custom_fields)
+            while pending:
+                yield issues_to_frame(pending.popleft().result()['issues'], self.custom_fields)
+
+    def fetch(self, since=None):
+        """Все заявки одной таблицей"""
+
+        pages = list(self.iter_pages(since))
+        return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+
+    # ===== Синхронизация с базой заявок =====
+
+    def sync(self, store, loader, full=False, batch_rows=5000, categorizer=None, categorize_mode='missing'):
+        """Загрузка новых и измененных заявок в базу (TicketStore)
+
+        Страницы очищаются тем же JiraDataLoader.clean_data(), что и CSV,
+        и дописываются в базу пачками по batch_rows строк. Время последней
+        синхронизации — максимальное Updated среди полученных заявок (время
+        сервера JIRA, а не локальные часы). JQL сравнивает с точностью до
+        минуты, поэтому граничные заявки приходят повторно — upsert по
+        Issue Key делает это безопасным. categorizer (TicketCategorizer)
+        определяет категории по тексту; его кэш общий для всех пачек.
+        """
+
+        since = None if full else store.get_state(SYNC_STATE_KEY)
+        print(f"\n🌐 Загрузка заявок из JIRA ({'все заявки' if since is None else f'изменения с {since}'})...")
+
+        self.stats = {'requests': 0, 'retries': 0}
+        start = time.perf_counter()
+        fetched = 0
+        last_update = pd.Timestamp(since) if since else None
+        batch = []
+
+        def flush():
+            loader.df = pd.concat(batch, ignore_index=True)
+            df_clean = loader.clean_data(verbose=False)
+            if categorizer is not None:
+                categorizer.apply(df_clean, categorize_mode)
+            store.upsert(df_clean)
+            batch.clear()
+
+        for page in self.iter_pages(since):
+            if page.empty:
+                continue
+            fetched += len(page)
+            updated = pd.to_datetime(page['Updated'], format=EXPORT_DATE_FORMAT, errors='coerce').max()
+            if pd.notna(updated) and (last_update is None or updated > last_update):
+                last_update = updated
+            batch.append(page)
+            if sum(len(part) for part in batch) >= batch_rows:
+                flush()
+        if batch:
+            flush()
+
+        if last_update is not None:
+            store.set_state(SYNC_STATE_KEY, f"{last_update:%Y-%m-%d %H:%M}")
+
+        elapsed = time.perf_counter() - start
+        print(f"✓ Из JIRA получено {fetched} заявок за {elapsed:.1f} с "
+              f"({self.stats['requests']} запросов, повторов: {self.stats['retries']})")
+        return fetched
@@ -0,0 +1,209 @@
+"""
+Локальный сервер, имитирующий JIRA REST API (/rest/api/2/search)
+
+Заявки создает JiraDataGenerator, поэтому загрузку из JIRA можно проверить
+и замерить без доступа к настоящему серверу.
+
+Запуск:
+    python -m src.jira_mock --tickets 5000 --port 8080 --latency 0.02
+    python main.py --ticket-db reports/tickets.db --jira-url http://127.0.0.1:8080
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.jira_fetcher import SEARCH_PATH, CUSTOM_FIELDS, EXPORT_DATE_FORMAT
+
+UPDATED_FILTER = re.compile(r'updated\s*>=\s*"([^"]+)"')
+
+
+def _jira_date(value):
+    """'01/10/2025 09:59' -> '2025-10-01T09:59:00.000+0300' (формат JIRA)"""
+    return f"{pd.Timestamp(value):%Y-%m-%dT%H:%M:%S}.000+0300"
+
+
+def _ticket_to_issue(ticket):
+    """Строка JiraDataGenerator -> заявка в формате ответа JIRA"""
+
+    def clean(value):
+        return None if value is None or (isinstance(value, float) and np.isnan(value)) else value
+
+    fields = {
+        'summary': ticket['Summary'],
+        'status': {'name': ticket['Status']},
+        'priority': {'name': ticket['Priority']},
+        'created': _jira_date(pd.to_datetime(ticket['Created'], format=EXPORT_DATE_FORMAT)),
+        'updated': _jira_date(pd.to_datetime(ticket['Updated'], format=EXPORT_DATE_FORMAT)),
+        'components': [{'name': ticket['Component/s']}],
+    }
+    for column, field in CUSTOM_FIELDS.items():
+        value = clean(ticket.get(column))
+        # Группа теста в JIRA — поле-список (select), остальные — текст/число
+        fields[field] = {'value': value} if column == 'Группа A/B теста' else value
+    return {'key': ticket['Issue Key'], 'fields': fields}
+
+
+class JiraMockServer:
+    """Имитация JIRA: поиск с пагинацией, фильтр updated >= и сбои по запросу
+
+    latency — задержка ответа (с), failure_rate — доля ответов 503
+    (для проверки повторов), max_page_size — ограничение maxResults,
+    как у настоящей JIRA.
+    """
+
+    def __init__(self, n_tickets=1000, seed=42, latency=0.0, failure_rate=0.0, max_page_size=1000,
+                 host='127.0.0.1', port=0):
+        from generate_jira_data import JiraDataGenerator
+
+        self.generator = JiraDataGenerator(seed=seed)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.max_page_size = max_page_size
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 1001
+
+        self.issues = []
+        self._encoded = []
+        self._updated = np.array([], dtype='datetime64[m]')
+        self.add_tickets(n_tickets)
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_tickets(self, n, updated_after=None):
+        """Новые заявки; updated_after — сдвинуть их Updated позже этого момента
+        (имитация изменений между синхронизациями)"""
+
+        with self._lock:
+            df = self.generator.generate_dataset(n) if n else pd.DataFrame()
+            if df.empty:
+                return 0
+            df['Issue Key'] = [f"MMC-{i:06d}" for i in range(self._next_id, self._next_id + len(df))]
+            self._next_id += len(df)
+            if updated_after is not None:
+                shift = pd.Timestamp(updated_after) + timedelta(hours=1)
+                df['Updated'] = shift.strftime(EXPORT_DATE_FORMAT)
+
+            issues = [_ticket_to_issue(ticket) for ticket in df.to_dict('records')]
+            # Заявки хранятся готовыми JSON-строками: ответ — просто их склейка
+            self.issues += issues
+            self._encoded += [json.dumps(issue, ensure_ascii=False) for issue in issues]
+            updated = pd.to_datetime(df['Updated'], format=EXPORT_DATE_FORMAT).to_numpy(dtype='datetime64[m]')
+            self._updated = np.concatenate([self._updated, updated])
+            return len(issues)
+
+    def search(self, jql, start_at, max_results):
+        """Тело ответа /search (JSON-строка)"""
+
+        with self._lock:
+            match = UPDATED_FILTER.search(jql)
+            if match:
+                since = np.datetime64(pd.Timestamp(match.group(1).replace('/', '-')), 'm')
+                selected = np.nonzero(self._updated >= since)[0]
+            else:
+                selected = np.arange(len(self._encoded))
+            max_results = min(max_results, self.max_page_size)
+            page = [self._encoded[i] for i in selected[start_at:start_at + max_results]]
+            total = len(selected)
+
+        return (f'{{"startAt":{start_at},"maxResults":{max_results},"total":{total},'
+                f'"issues":[{",".join(page)}]}}')
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive: клиент переиспользует соединение
+            # Заголовки и тело уходят разными пакетами — без этого алгоритм Нейгла
+            # добавляет ~40 мс к каждому ответу
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if url.path != SEARCH_PATH:
+                    return self._reply(404, '{"errorMessages":["Not found"]}')
+                if server.failure_rate and server._rng.random() < server.failure_rate:
+                    return self._reply(503, '{"errorMessages":["Service unavailable"]}')
+
+                params = parse_qs(url.query)
+                try:
+                    start_at = int(params.get('startAt', ['0'])[0])
+                    max_results = int(params.get('maxResults', ['50'])[0])
+                except ValueError:
+                    return self._reply(400, '{"errorMessages":["Bad paging parameters"]}')
+                self._reply(200, server.search(params.get('jql', [''])[0], start_at, max_results))
+
+            def _reply(self, status, body):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json;charset=UTF-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Запуск в фоновом потоке; возвращает адрес сервера"""
+
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Локальный сервер, имитирующий JIRA REST API')
+    parser.add_argument('--tickets', type=int, default=1000, help='Число заявок (по умолчанию: 1000)')
+    parser.add_argument('--port', type=int, default=8080, help='Порт (по умолчанию: 8080)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа, с')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Доля ответов 503')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    server = JiraMockServer(args.tickets, seed=args.seed, latency=args.latency,
+                            failure_rate=args.failure_rate, port=args.port)
+    print(f"🌐 Имитация JIRA: {server.url}{SEARCH_PATH} ({len(server.issues)} заявок), Ctrl+C — остановить")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+Конвейер анализа: этапы с зависимостями (DAG) и параллельный запуск
+"""
+
+import os
+import time
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+@dataclass
+class Stage:
+    """Этап конвейера
+
+    func получает словарь результатов уже выполненных этапов.
+    Этапы с общим ресурсом (например, 'pyplot') не выполняются одновременно.
+    """
+    name: str
+    func: Callable[[Dict], object]
+    deps: Tuple[str, ...] = ()
+    resources: Tuple[str, ...] = ()
+
+
+class PipelineRunner:
+    """Запуск этапов: независимые выполняются параллельно в пуле потоков"""
+
+    def __init__(self, stages: List[Stage], max_workers: int = 4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        self.results = {}
+        self.timings = {}
+        self.total_time = 0.0
+        self._check_graph()
+
+    def _check_graph(self):
+        """Проверка: все зависимости объявлены, циклов нет"""
+
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Этап '{stage.name}' зависит от неизвестного этапа '{dep}'")
+
+        # Топологическая сортировка (Кан)
+        indegree = {name: len(stage.deps) for name, stage in self.stages.items()}
+        queue = [name for name, d in indegree.items() if d == 0]
+        visited = 0
+        while queue:
+            current = queue.pop()
+            visited += 1
+            for stage in self.stages.values():
+                if current in stage.deps:
+                    indegree[stage.name] -= 1
+                    if indegree[stage.name] == 0:
+                        queue.append(stage.name)
+
+        if visited != len(self.stages):
+            raise ValueError("В графе этапов есть цикл")
+
+    def _run_stage(self, stage):
+        start = time.perf_counter()
+        value = stage.func(self.results)
+        return value, time.perf_counter() - start
+
+    def run(self):
+        """Выполнить все этапы; возвращает словарь {этап: результат}"""
+
+        pending = dict(self.stages)
+        running = {}
+        busy_resources = set()
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                # Запускаем все этапы, у которых готовы зависимости и свободны ресурсы
+                for name in list(pending):
+                    stage = pending[name]
+                    if len(running) >= self.max_workers:
+                        break
+                    if not all(dep in self.results for dep in stage.deps):
+                        continue
+                    if busy_resources.intersection(stage.resources):
+                        continue
+                    busy_resources.update(stage.resources)
+                    running[pool.submit(self._run_stage, stage)] = stage
+                    del pending[name]
+
+                if not running:
+                    raise RuntimeError(f"Этапы не могут быть запущены: {', '.join(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    busy_resources.difference_update(stage.resources)
+                    try:
+                        value, elapsed = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    self.results[stage.name] = value
+                    self.timings[stage.name] = elapsed
+
+        self.total_time = time.perf_counter() - start
+        return self.results
+
+    def critical_path_time(self):
+        """Длина критического пути по фактическим временам этапов"""
+
+        finish = {}
+
+        def finish_time(name):
+            if name not in finish:
+                deps = self.stages[name].deps
+                finish[name] = self.timings.get(name, 0.0) + max((finish_time(d) for d in deps), default=0.0)
+            return finish[name]
+
+        return max((finish_time(name) for name in self.stages), default=0.0)
+
+    def print_timings(self):
+        """Печать времени этапов"""
+
+        print("\n⏱ Время этапов:")
+        for name, elapsed in sorted(self.timings.items(), key=lambda item: -item[1]):
+            print(f"   {name:<20} {elapsed:7.2f} с")
+        print(f"   Сумма этапов:       {sum(self.timings.values()):7.2f} с")
+        print(f"   Критический путь:   {self.critical_path_time():7.2f} с")
+        print(f"   Фактически:         {self.total_time:7.2f} с")
+
+
+def drop_stages(stages: List[Stage], names) -> List[Stage]:
+    """Убрать этапы names и все этапы, которые от них зависят (транзитивно)"""
+
+    dropped = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for stage in stages:
+            if stage.name not in dropped and dropped.intersection(stage.deps):
+                dropped.add(stage.name)
+                changed = True
+
+    return [stage for stage in stages if stage.name not in dropped]
+
+
+def build_ab_test_stages(config, validate=False, plots=True, store_dir=None, cache_dir=None,
+                         segment_by=None, segment_report=None, html=False, bayes=False,
+                         survival=False, ratio=False, ticket_db=None, from_db=False, jira_workers=4,
+                         hte=False, did=False):
+    """Этапы анализа A/B-теста и зависимости между ними
+
+    load ─ clean ─ prepare ─ analyze ─┬─ validate ─ save
+    load_daily ────────────┐          └─ графики
+                           └─ графики динамики
+    Все графики используют pyplot и поэтому выполняются по очереди,
+    но параллельно с расчетами и сохранением результатов.
+
+    matplotlib/seaborn импортируются не здесь, а в этапе plot_setup,
+    который идет параллельно с загрузкой CSV. При plots=False они
+    не импортируются вовсе.
+
+    ticket_db — база заявок SQLite: очищенная выгрузка дописывается в нее
+    (этап db_upsert), а агрегаты для анализа считаются запросами GROUP BY.
+    from_db=True — анализ только по базе, без чтения CSV; этапы, которым
+    нужна таблица заявок целиком (bayes, survival, сегменты), пропускаются.
+    config.INFER_CATEGORIES — категории проблем определяются по тексту
+    заявок (этап categorize) до расчета category_stats; config.DEDUP_MODE —
+    повторные заявки отмечаются или исключаются (этап dedup).
+    Если задан config.JIRA_URL, перед анализом по базе новые и измененные
+    заявки загружаются из JIRA (этап jira_sync, jira_workers потоков).
+    hte=True — эффект по подгруппам атрибутов заявок (этап hte, forest plot).
+    did=True — разность разностей до/после config.DID_POST_START по панели
+    аудитория x день (этап did, event study).
+    """
+
+    from src.data_loader import JiraDataLoader
+    from src.analysis import ABTestAnalyzer
+    from src.utils import save_results
+
+    loader = JiraDataLoader(config)
+    analyzer = ABTestAnalyzer(config)
+
+    ticket_store = None
+    if ticket_db:
+        from src.ticket_store import TicketStore
+        ticket_store = TicketStore(ticket_db)
+    elif from_db:
+        raise ValueError("Для анализа по базе нужен путь к базе заявок (ticket_db)")
+
+    deduplicator = None
+    if config.DEDUP_MODE and not from_db:
+        from src.dedup import TicketDeduplicator
+        deduplicator = TicketDeduplicator(config)
+
+    if from_db:
+        skipped = [name for name, enabled in (('bayes', bayes), ('survival', survival), ('hte', hte), ('did', did),
+                                              ('segment-by', segment_by), ('segment-report', segment_report))
+                   if enabled]
+        if skipped:
+            print(f"⚠ Анализ по базе заявок: пропускаем {', '.join(skipped)} (нужна таблица заявок)")
+        bayes = survival = hte = did = False
+        segment_by = segment_report = None
+
+    def prepare(results):
+        if ticket_store is not None:
+            loader.prepare_from_store(ticket_store)
+        else:
+            loader.prepare_for_analysis()
+        if len(loader.group_a_tickets) == 0 or len(loader.group_b_tickets) == 0:
+            raise ValueError("Не удалось получить данные по группам!")
+        return loader
+
+    def analyze(results):
+        analysis = analyzer.run_full_analysis(
+            loader.group_a_tickets,
+            loader.group_b_tickets,
+            loader.category_stats
+        )
+        if deduplicator is not None:
+            analysis['deduplication'] = deduplicator.report
+        # A/B/n: больше двух групп — все сравнения с поправкой на множественность
+        if len(loader.arm_tickets) > 2:
+            analyzer.run_multiarm_analysis(loader.arm_tickets)
+        return analysis
+
+    if from_db:
+        stages = [
+            Stage('load_daily', lambda r: loader.load_daily_from_store(ticket_store),
+                  deps=('jira_sync',) if config.JIRA_URL else ()),
+            Stage('prepare', prepare, deps=('jira_sync',) if config.JIRA_URL else ()),
+        ]
+        if config.JIRA_URL:
+            from src.jira_fetcher import JiraFetcher
+            fetcher = JiraFetcher(config.JIRA_URL, config.JIRA_JQL, page_size=config.JIRA_PAGE_SIZE,
+                                  workers=jira_workers, token=os.environ.get('JIRA_TOKEN'))
+            categorizer = None
+            if config.INFER_CATEGORIES:
+                from src.categorizer import TicketCategorizer
+                categorizer = TicketCategorizer(config)
+            stages.insert(0, Stage('jira_sync', lambda r: fetcher.sync(ticket_store, loader, categorizer=categorizer,
+                                                                       categorize_mode=config.INFER_CATEGORIES)))
+    else:
+        stages = [
+            Stage('load', lambda r: loader.load_data()),
+            Stage('load_daily', lambda r: loader.load_daily_data()),
+            Stage('clean', lambda r: loader.clean_data(), deps=('load',)),
+        ]
+        # Этап, после которого таблица заявок окончательная
+        cleaned = 'clean'
+        if config.INFER_CATEGORIES:
+            from src.categorizer import TicketCategorizer
+            categorizer = TicketCategorizer(config)
+            stages.append(Stage('categorize', lambda r: categorizer.apply(loader.df_clean, config.INFER_CATEGORIES),
+                                deps=('clean',)))
+            cleaned = 'categorize'
+        if deduplicator is not None:
+            def deduplicate(results):
+                loader.df_clean = deduplicator.apply(loader.df_clean, config.DEDUP_MODE)
+                return deduplicator.report
+
+            stages.append(Stage('dedup', deduplicate, deps=(cleaned,)))
+            cleaned = 'dedup'
+        if ticket_store is not None:
+            stages.append(Stage('db_upsert', lambda r: loader.save_to_store(ticket_store), deps=(cleaned,)))
+            cleaned = 'db_upsert'
+        stages.append(Stage('prepare', prepare, deps=(cleaned,)))
+    stages.append(Stage('analyze', analyze, deps=('prepare',)))
+
+    save_deps = ('analyze',)
+
+    if validate:
+        from src.validation import ABTestValidator
+        from src.bootstrap_cache import BootstrapCache
+        cache = BootstrapCache(Path(cache_dir) / "bootstrap") if cache_dir else None
+        validator = ABTestValidator(config, bootstrap_cache=cache)
+
+        def run_validation(results):
+            results['analyze']['validation'] = validator.run_full_validation(
+                loader.group_a_tickets,
+                loader.group_b_tickets,
+                descriptive=results['analyze']['descriptive_stats'],
+                plots=False
+            )
+            return validator
+
+        def plot_validation(results):
+            validator.output_dir.mkdir(parents=True, exist_ok=True)
+            validator.plot_distributions()
+            validator.plot_bootstrap()
+
+        stages.append(Stage('validate', run_validation, deps=('analyze',)))
+        save_deps = ('validate',)
+        if plots:
+            stages.append(Stage('plot_validation', plot_validation, deps=('validate',), resources=('pyplot',)))
+
+    if bayes:
+        from src.bayesian import BayesianABTest
+        bayesian = BayesianABTest(config)
+
+        def run_bayes(results):
+            table = bayesian.analyze(loader.df_clean, segment_by)
+            path = Path(config.OUTPUT_DIR) / "bayesian.csv"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            table.to_csv(path, index=False, encoding='utf-8-sig')
+            print(f"✓ Байесовский анализ сохранен в {path}")
+            results['analyze']['bayesian'] = bayesian.summary()
+            return bayesian
+
+        stages.append(Stage('bayes', run_bayes, deps=('analyze',)))
+        save_deps += ('bayes',)
+
+    if survival:
+        from src.survival import SurvivalAnalyzer
+        survival_analyzer = SurvivalAnalyzer(config)
+
+        def run_survival(results):
+            results['analyze']['survival'] = survival_analyzer.run(loader.prepare_survival())
+            return survival_analyzer
+
+        stages.append(Stage('survival', run_survival, deps=('analyze',)))
+        save_deps += ('survival',)
+
+    if ratio:
+        from src.ratio_metrics import RatioMetricAnalyzer
+        ratio_analyzer = RatioMetricAnalyzer(config)
+
+        def run_ratio(results):
+            results['analyze']['ratio_metrics'] = ratio_analyzer.analyze(loader.classroom_stats)
+            return ratio_analyzer
+
+        stages.append(Stage('ratio', run_ratio, deps=('analyze',)))
+        save_deps += ('ratio',)
+
+    if hte:
+        from src.hte import HeterogeneityScanner
+        scanner = HeterogeneityScanner(config)
+
+        def run_hte(results):
+            table = scanner.scan(loader.df_clean)
+            path = Path(config.OUTPUT_DIR) / "hte.csv"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            table.to_csv(path, index=False, encoding='utf-8-sig')
+            print(f"✓ Эффект по подгруппам сохранен в {path}")
+            results['analyze']['hte'] = scanner.summary()
+            return scanner
+
+        stages.append(Stage('hte', run_hte, deps=('analyze',)))
+        save_deps += ('hte',)
+
+    if did:
+        from src.did import DiDAnalyzer
+        did_analyzer = DiDAnalyzer(config)
+
+        def run_did(results):
+            results['analyze']['did'] = did_analyzer.run(loader.prepare_panel())
+            path = Path(config.OUTPUT_DIR) / "did_event_study.csv"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            did_analyzer.event_study.to_csv(path, index=False, encoding='utf-8-sig')
+            return did_analyzer
+
+        stages.append(Stage('did', run_did, deps=('analyze',)))
+        save_deps += ('did',)
+
+    stages.append(Stage('save', lambda r: save_results(r['analyze'], "ab_test_results.json", config.OUTPUT_DIR), deps=save_deps))
+
+    if html:
+        from src.html_report import HTMLReportWriter
+        writer = HTMLReportWriter(config)
+
+        def write_html(results):
+            segments = loader.prepare_segments(segment_by) if segment_by else None
+            segment_results = analyzer.analyze_segments(segments) if segments else None
+            payload = writer.build_payload(loader, results['analyze'], segments, segment_results)
+            return writer.write(payload, Path(config.OUTPUT_DIR) / "ab_test_report.html")
+
+        stages.append(Stage('html_report', write_html, deps=('analyze', 'load_daily')))
+
+    if store_dir:
+        from src.results_store import ResultsStore
+        store = ResultsStore(store_dir)
+
+        def store_results(results):
+            arrays = {}
+            if 'validate' in results:
+                arrays['bootstrap_diffs'] = results['validate'].bootstrap_diffs
+            return store.save(results['analyze'], arrays=arrays, meta={'data_path': config.DATA_PATH})
+
+        stages.append(Stage('store', store_results, deps=save_deps))
+
+    if plots:
+        def plot_setup(results):
+            from src.visualization import ABTestVisualizer
+            return ABTestVisualizer(config)
+
+        stages += [
+            Stage('plot_setup', plot_setup, resources=('pyplot',)),
+            Stage('plot_comparison',
+                  lambda r: r['plot_setup'].plot_ticket_comparison(loader.group_a_tickets, loader.group_b_tickets),
+                  deps=('prepare', 'plot_setup'), resources=('pyplot',)),
+            Stage('plot_heatmap',
+                  lambda r: r['plot_setup'].plot_category_heatmap(loader.category_stats),
+                  deps=('prepare', 'plot_setup'), resources=('pyplot',)),
+            Stage('plot_daily',
+                  lambda r: r['plot_setup'].plot_daily_trends(loader.df_daily),
+                  deps=('load_daily', 'plot_setup'), resources=('pyplot',)),
+            Stage('plot_effect',
+                  lambda r: r['plot_setup'].plot_effect_size(r['analyze']),
+                  deps=('analyze', 'plot_setup'), resources=('pyplot',)),
+            Stage('dashboard',
+                  lambda r: r['plot_setup'].create_dashboard(loader, analyzer),
+                  deps=('analyze', 'load_daily', 'plot_setup'), resources=('pyplot',)),
+        ]
+
+        if survival:
+            stages.append(Stage('plot_survival',
+                                lambda r: r['plot_setup'].plot_survival(r['survival']),
+                                deps=('survival', 'plot_setup'), resources=('pyplot',)))
+
+        if hte:
+            stages.append(Stage('plot_hte',
+                                lambda r: r['plot_setup'].plot_hte_forest(r['hte']),
+                                deps=('hte', 'plot_setup'), resources=('pyplot',)))
+
+        if did:
+            stages.append(Stage('plot_did',
+                                lambda r: r['plot_setup'].plot_event_study(r['did']),
+                                deps=('did', 'plot_setup'), resources=('pyplot',)))
+
+        if len(config.ARM_LABELS) > 2:
+            stages.append(Stage('plot_arms',
+                                lambda r: r['plot_setup'].plot_arms_comparison(
+                                    loader.arm_tickets, r['analyze']['multiarm'], loader.category_stats),
+                                deps=('analyze', 'plot_setup'), resources=('pyplot',)))
+
+        if segment_by:
+            def segment_dashboards(results):
+                segments = loader.prepare_segments(segment_by)
+                return results['plot_setup'].create_segment_dashboards(segments, analyzer.analyze_segments(segments))
+
+            # Шаблон рисует без pyplot, поэтому общий ресурс не нужен
+            stages.append(Stage('segment_dashboards', segment_dashboards, deps=('prepare', 'plot_setup')))
+
+        if segment_report:
+            def render_segment_report(results):
+                from src.segment_report import SegmentReportGenerator
+                table = loader.segment_category_table(segment_report)
+                return SegmentReportGenerator(config, dpi=config.FIGURE_DPI).render_all(table, results['plot_setup'].figures_dir)
+
+            stages.append(Stage('segment_report', render_segment_report, deps=('prepare', 'plot_setup')))
+
+    return stages, loader, analyzer
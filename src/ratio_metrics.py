@@ -0,0 +1,203 @@
+"""
+Ratio-метрики: сумма числителя / сумма знаменателя по аудиториям
+
+Например, доля решенных заявок (решено / всего заявок) или заявки на час
+занятий (заявки / часы по расписанию). Единица рандомизации — аудитория,
+поэтому дисперсия отношения считается дельта-методом по суммам аудиторий,
+а не как у биномиальной доли по заявкам.
+"""
+
+import numpy as np
+from scipy import stats
+
+# метрика: (числитель, знаменатель) — колонки classroom_stats
+DEFAULT_METRICS = {
+    'resolution_rate': ('resolved_tickets', 'ticket_count'),
+    'tickets_per_lesson_hour': ('ticket_count', 'lesson_hours'),
+}
+
+
+def grouped_moments(numerators, denominators, groups):
+    """Достаточные статистики всех метрик по всем группам одним умножением матриц
+
+    numerators, denominators — (n аудиторий, m метрик); groups — метки групп.
+    Аудитории с пропуском (NaN) в числителе или знаменателе метрики
+    исключаются только из этой метрики. Возвращает метки и словарь массивов
+    (k групп, m метрик): n, mean_x, mean_y, var_x, var_y, cov_xy.
+    """
+
+    x = np.asarray(numerators, dtype=float)
+    y = np.asarray(denominators, dtype=float)
+    labels, codes = np.unique(np.asarray(groups), return_inverse=True)
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+
+    # One-hot матрица групп: G.T @ [x, y, x², y², xy] — все суммы за один проход
+    onehot = np.zeros((len(codes), len(labels)))
+    onehot[np.arange(len(codes)), codes] = 1.0
+    m = x.shape[1]
+    sums = onehot.T @ np.hstack([x, y, x * x, y * y, x * y])
+    sx, sy, sxx, syy, sxy = (sums[:, i * m:(i + 1) * m] for i in range(5))
+
+    n = onehot.T @ valid.astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x, mean_y = sx / n, sy / n
+    return labels, {
+        'n': n,
+        'mean_x': mean_x,
+        'mean_y': mean_y,
+        'var_x': (sxx - n * mean_x ** 2) / (n - 1),
+        'var_y': (syy - n * mean_y ** 2) / (n - 1),
+        'cov_xy': (sxy - n * mean_x * mean_y) / (n - 1),
+    }
+
+
+def delta_method(moments):
+    """Отношение R = x̄ / ȳ и его дисперсия дельта-методом
+
+    Var(R) ≈ (σx² - 2R·σxy + R²·σy²) / (n·ȳ²)
+    """
+
+    ratio = moments['mean_x'] / moments['mean_y']
+    variance = (moments['var_x'] - 2 * ratio * moments['cov_xy'] + ratio ** 2 * moments['var_y']) \
+        / (moments['n'] * moments['mean_y'] ** 2)
+    return ratio, np.maximum(variance, 0)
+
+
+def fieller_interval(a, b, var_a, var_b, cov_ab=0.0, alpha=0.05):
+    """Доверительный интервал Филлера для θ = a / b
+
+    Корни квадратного уравнения (b² - z²·Vb)θ² - 2(ab - z²·Cab)θ + (a² - z²·Va) = 0.
+    Если знаменатель не отделен от нуля (b² <= z²·Vb), интервал неограничен — NaN.
+    """
+
+    z2 = stats.norm.ppf(1 - alpha / 2) ** 2
+    qa = b ** 2 - z2 * var_b
+    qb = a * b - z2 * cov_ab
+    qc = a ** 2 - z2 * var_a
+    disc = qb ** 2 - qa * qc
+
+    bounded = (qa > 0) & (disc >= 0)
+    root = np.sqrt(np.where(bounded, disc, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lower = np.where(bounded, (qb - root) / qa, np.nan)
+        upper = np.where(bounded, (qb + root) / qa, np.nan)
+    return lower, upper
+
+
+def bootstrap_ratio_diff(x_a, y_a, x_b, y_b, n_resamples=2000, seed=42):
+    """Кластерный бутстрап разницы отношений (B - A) для нескольких метрик сразу
+
+    Выборка аудиторий с возвращением = мультиномиальные веса; суммы по всем
+    репликам считаются умножением матриц (реплики x аудитории) @ (аудитории x метрики).
+    """
+
+    rng = np.random.default_rng(seed)
+    diffs = 0.0
+    for sign, x, y in ((-1, x_a, y_a), (1, x_b, y_b)):
+        n = len(x)
+        weights = rng.multinomial(n, np.full(n, 1.0 / n), size=n_resamples).astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diffs = diffs + sign * (weights @ x) / (weights @ y)
+    return diffs
+
+
+class RatioMetricAnalyzer:
+    """Сравнение групп по ratio-метрикам: дельта-метод, Филлер и бутстрап"""
+
+    def __init__(self, config, n_bootstrap=2000, seed=42):
+        self.config = config
+        self.n_bootstrap = n_bootstrap
+        self.seed = seed
+        self.results = {}
+
+    def analyze(self, classroom_stats, metrics=None, group_col=None):
+        """Все метрики, для которых в classroom_stats есть числитель и знаменатель"""
+
+        print("\n➗ Ratio-метрики (дельта-метод)...")
+
+        group_col = group_col or self.config.COLUMN_GROUP
+        metrics = metrics or DEFAULT_METRICS
+        metrics = {name: cols for name, cols in metrics.items()
+                   if all(col in classroom_stats.columns for col in cols)}
+        if not metrics:
+            print("  ⚠ Нет колонок для ratio-метрик")
+            return {}
+
+        data = classroom_stats[classroom_stats[group_col].isin(['A', 'B'])]
+        columns = list(metrics.values())
+
+        # Пропуски (NaN) исключаются для каждой метрики отдельно
+        x = data[[num for num, _ in columns]].to_numpy(dtype=float)
+        y = data[[den for _, den in columns]].to_numpy(dtype=float)
+        groups = data[group_col].to_numpy()
+
+        labels, moments = grouped_moments(x, y, groups)
+        ratio, variance = delta_method(moments)
+        a, b = list(labels).index('A'), list(labels).index('B')
+
+        alpha = self.config.ALPHA
+        z_crit = stats.norm.ppf(1 - alpha / 2)
+        diff = ratio[b] - ratio[a]
+        se = np.sqrt(variance[a] + variance[b])
+        z = diff / se
+        p_value = 2 * stats.norm.sf(np.abs(z))
+
+        # Относительный эффект R_B / R_A — интервал Филлера (группы независимы)
+        rel_low, rel_high = fieller_interval(ratio[b], ratio[a], variance[b], variance[a], alpha=alpha)
+
+        # Бутстрап — одним вызовом для метрик с одинаковым набором аудиторий без пропусков
+        valid = np.isfinite(x) & np.isfinite(y)
+        patterns, pattern_of = np.unique(valid, axis=1, return_inverse=True)
+        boot_low, boot_high = np.full(len(columns), np.nan), np.full(len(columns), np.nan)
+        for p in range(patterns.shape[1]):
+            cols, rows = pattern_of.ravel() == p, patterns[:, p]
+            in_a, in_b = rows & (groups == 'A'), rows & (groups == 'B')
+            if not in_a.any() or not in_b.any():
+                continue
+            boot = bootstrap_ratio_diff(x[in_a][:, cols], y[in_a][:, cols], x[in_b][:, cols], y[in_b][:, cols],
+                                        self.n_bootstrap, self.seed)
+            boot_low[cols], boot_high[cols] = np.nanpercentile(
+                boot, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+
+        self.results = {}
+        for j, (name, (numerator, denominator)) in enumerate(metrics.items()):
+            self.results[name] = {
+                'numerator': numerator,
+                'denominator': denominator,
+                'ratio_a': ratio[a, j],
+                'ratio_b': ratio[b, j],
+                'diff': diff[j],
+                'se': se[j],
+                'z_statistic': z[j],
+                'p_value': p_value[j],
+                'significant': p_value[j] < alpha,
+                'ci_delta': (diff[j] - z_crit * se[j], diff[j] + z_crit * se[j]),
+                'ci_bootstrap': (boot_low[j], boot_high[j]),
+                'relative': ratio[b, j] / ratio[a, j],
+                'ci_relative_fieller': (rel_low[j], rel_high[j])
+            }
+            print(f"   {name}: A = {ratio[a, j]:.4f}, B = {ratio[b, j]:.4f}, p = {p_value[j]:.4f}")
+
+        return self.results
+
+    def print_summary(self):
+        """Печать результатов в консоль"""
+
+        if not self.results:
+            return
+
+        print("\n" + "=" * 60)
+        print("RATIO-МЕТРИКИ (по аудиториям, дельта-метод)")
+        print("=" * 60)
+        for name, row in self.results.items():
+            mark = "✅" if row['significant'] else "❌"
+            low, high = row['ci_delta']
+            boot_low, boot_high = row['ci_bootstrap']
+            rel_low, rel_high = row['ci_relative_fieller']
+            print(f"\n{mark} {name} = {row['numerator']} / {row['denominator']}")
+            print(f"   A: {row['ratio_a']:.4f}   B: {row['ratio_b']:.4f}   B - A: {row['diff']:+.4f}")
+            print(f"   p = {row['p_value']:.4f}; ДИ (дельта): [{low:.4f}, {high:.4f}]; "
+                  f"ДИ (бутстрап): [{boot_low:.4f}, {boot_high:.4f}]")
+            print(f"   B / A = {row['relative']:.3f}, ДИ Филлера: [{rel_low:.3f}, {rel_high:.3f}]")
+        print("=" * 60)
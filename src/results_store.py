@@ -0,0 +1,160 @@
+"""
+Хранилище результатов: скаляры в компактном JSON, массивы и таблицы рядом
+"""
+
+import json
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils import convert_numpy
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class ResultsStore:
+    """Хранилище результатов запусков
+
+    Структура папки:
+        history.jsonl             — одна строка на запуск (плоские скаляры)
+        runs/<run_id>/summary.json — результаты, большие массивы заменены ссылками
+        runs/<run_id>/*.npy        — массивы (читаются через memory map)
+        runs/<run_id>/*.parquet    — таблицы (или *.pkl, если нет pyarrow)
+    """
+
+    def __init__(self, root="reports/store", array_threshold=64):
+        self.root = Path(root)
+        self.array_threshold = array_threshold
+        self.history_path = self.root / "history.jsonl"
+
+    def _split(self, obj, path, run_dir):
+        """Рекурсивно выносим большие массивы и таблицы в отдельные файлы"""
+
+        if isinstance(obj, dict):
+            return {str(k): self._split(v, f"{path}.{k}" if path else str(k), run_dir) for k, v in obj.items()}
+
+        if isinstance(obj, pd.DataFrame):
+            if _parquet_available():
+                name = f"{path}.parquet"
+                obj.to_parquet(run_dir / name)
+            else:
+                name = f"{path}.pkl"
+                obj.to_pickle(run_dir / name)
+            return {'__table__': name, 'shape': list(obj.shape)}
+
+        if isinstance(obj, pd.Series):
+            obj = obj.to_numpy()
+
+        if isinstance(obj, list) and len(obj) > self.array_threshold:
+            array = np.asarray(obj)
+            if array.dtype.kind in 'biuf':
+                obj = array
+
+        if isinstance(obj, np.ndarray) and obj.size > self.array_threshold:
+            name = f"{path}.npy"
+            np.save(run_dir / name, obj, allow_pickle=False)
+            return {'__array__': name, 'shape': list(obj.shape), 'dtype': str(obj.dtype)}
+
+        return convert_numpy(obj)
+
+    def _join(self, obj, run_dir, mmap):
+        """Обратная операция: подставляем массивы и таблицы по ссылкам"""
+
+        if isinstance(obj, dict):
+            if '__array__' in obj:
+                return np.load(run_dir / obj['__array__'], mmap_mode='r' if mmap else None)
+            if '__table__' in obj:
+                name = obj['__table__']
+                if name.endswith('.parquet'):
+                    return pd.read_parquet(run_dir / name)
+                return pd.read_pickle(run_dir / name)
+            return {k: self._join(v, run_dir, mmap) for k, v in obj.items()}
+        return obj
+
+    @staticmethod
+    def _flatten(obj, prefix=""):
+        """Плоский словарь скаляров: {'ttest.p_value': 0.028, ...}"""
+
+        flat = {}
+        for key, value in obj.items():
+            name = f"{prefix}.{key}" if prefix else key
+            if isinstance(value, dict) and '__array__' not in value and '__table__' not in value:
+                flat.update(ResultsStore._flatten(value, name))
+            elif isinstance(value, (int, float, bool)) or value is None:
+                flat[name] = value
+        return flat
+
+    def save(self, results, arrays=None, run_id=None, meta=None):
+        """Сохранение запуска; возвращает run_id
+
+        arrays — дополнительные большие массивы, которых нет в results
+        (например, бутстрап-распределение).
+        """
+
+        run_id = run_id or f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        run_dir = self.root / "runs" / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+        payload = dict(results)
+        if arrays:
+            payload['arrays'] = arrays
+
+        summary = self._split(payload, "", run_dir)
+
+        with open(run_dir / "summary.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, separators=(',', ':'))
+
+        entry = {
+            'run_id': run_id,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'meta': convert_numpy(meta or {}),
+            'scalars': self._flatten(summary)
+        }
+        with open(self.history_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+
+        print(f"✓ Результаты записаны в хранилище: {run_dir}")
+        return run_id
+
+    def load(self, run_id, mmap=True):
+        """Загрузка запуска; массивы по умолчанию открываются через memory map"""
+
+        run_dir = self.root / "runs" / run_id
+        with open(run_dir / "summary.json", encoding='utf-8') as f:
+            summary = json.load(f)
+        return self._join(summary, run_dir, mmap)
+
+    def runs(self):
+        """Список run_id в порядке записи"""
+
+        if not self.history_path.exists():
+            return []
+        with open(self.history_path, encoding='utf-8') as f:
+            return [json.loads(line)['run_id'] for line in f if line.strip()]
+
+    def history(self):
+        """История запусков: одна строка на запуск, колонки — скаляры"""
+
+        if not self.history_path.exists():
+            return pd.DataFrame()
+
+        rows = []
+        with open(self.history_path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                row = {'run_id': entry['run_id'], 'created': entry['created']}
+                row.update(entry['scalars'])
+                rows.append(row)
+
+        return pd.DataFrame(rows)
@@ -0,0 +1,114 @@
+"""
+Отчет по сегментам: малые множественные графики (small multiples)
+"""
+
+import re
+from pathlib import Path
+
+import numpy as np
+
+
+class SegmentReportGenerator:
+    """Отчет по сегментам: сетки мини-тепловых карт на нескольких страницах
+
+    Каждая страница — одна фигура с nrows x ncols панелями (категории x группы).
+    Все панели строятся из одной сводной таблицы
+    JiraDataLoader.segment_category_table, шкала цвета общая для всех сегментов.
+    """
+
+    def __init__(self, config, ncols=4, nrows=3, dpi=100):
+        self.config = config
+        self.ncols = ncols
+        self.nrows = nrows
+        self.dpi = dpi
+
+    def _new_page(self, title):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig = Figure(figsize=(4.2 * self.ncols, 3.6 * self.nrows + 0.8))
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(self.nrows, self.ncols, squeeze=False, sharey=True,
+                            gridspec_kw=dict(left=0.16, right=0.97, top=0.92, bottom=0.04,
+                                             hspace=0.35, wspace=0.08))
+        fig.suptitle(title, fontsize=14, fontweight='bold')
+        return fig, axes
+
+    def render(self, table, segment_type, output_dir, formats=('pdf',)):
+        """Отрисовать все сегменты одного типа; возвращает пути к файлам"""
+
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        data = table[table['segment_type'] == segment_type]
+        if data.empty:
+            print(f"  ⚠ Нет данных для сегментов: {segment_type}")
+            return []
+
+        # Общий порядок категорий (по числу заявок) и матрица сегмент x категория x группа
+        categories = data.groupby('category')[['A', 'B']].sum().sum(axis=1).sort_values(ascending=False).index
+        segments = data.groupby('segment')[['A', 'B']].sum().sum(axis=1).sort_values(ascending=False).index
+        cube = (data.set_index(['segment', 'category'])[['A', 'B']]
+                .reindex(index=[(s, c) for s in segments for c in categories], fill_value=0)
+                .to_numpy()
+                .reshape(len(segments), len(categories), 2))
+        vmax = max(cube.max(), 1)
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        safe_type = re.sub(r'[^\w-]+', '_', segment_type)
+        stem = output_dir / f"segments_{safe_type}"
+
+        per_page = self.ncols * self.nrows
+        n_pages = int(np.ceil(len(segments) / per_page))
+        category_labels = [str(c)[:28] + '…' if len(str(c)) > 28 else str(c) for c in categories]
+
+        print(f"🗂 Отчет по сегментам «{segment_type}»: {len(segments)} сегментов, {n_pages} стр.")
+
+        paths = []
+        pdf = PdfPages(stem.with_suffix('.pdf')) if 'pdf' in formats else None
+        try:
+            for page in range(n_pages):
+                fig, axes = self._new_page(f"{segment_type}: заявки по категориям (стр. {page + 1}/{n_pages})")
+                for k, ax in enumerate(axes.flat):
+                    i = page * per_page + k
+                    if i >= len(segments):
+                        ax.axis('off')
+                        continue
+
+                    counts = cube[i]
+                    ax.imshow(counts, aspect='auto', cmap='RdYlGn_r', vmin=0, vmax=vmax)
+                    for (row, col), value in np.ndenumerate(counts):
+                        if value:
+                            ax.text(col, row, int(value), ha='center', va='center', fontsize=8)
+
+                    total_a, total_b = counts.sum(axis=0)
+                    name = str(segments[i])
+                    ax.set_title(f"{name[:34] + '…' if len(name) > 34 else name}\nA={total_a:.0f}  B={total_b:.0f}",
+                                 fontsize=9, fontweight='bold')
+                    ax.set_xticks([0, 1])
+                    ax.set_xticklabels(['A', 'B'], fontsize=9)
+                    ax.set_yticks(np.arange(len(categories)))
+                    ax.set_yticklabels(category_labels, fontsize=7)
+
+                if pdf is not None:
+                    pdf.savefig(fig)
+                for fmt in formats:
+                    if fmt != 'pdf':
+                        path = Path(f"{stem}_p{page + 1:02d}.{fmt}")
+                        fig.savefig(path, dpi=self.dpi)
+                        paths.append(path)
+        finally:
+            if pdf is not None:
+                pdf.close()
+                paths.insert(0, stem.with_suffix('.pdf'))
+
+        print(f"  ✓ Сохранено: {paths[0]}")
+        return paths
+
+    def render_all(self, table, output_dir, formats=('pdf',)):
+        """Отчеты по всем типам сегментов из таблицы"""
+
+        paths = []
+        for segment_type in table['segment_type'].unique():
+            paths += self.render(table, segment_type, output_dir, formats)
+        return paths
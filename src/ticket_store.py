@@ -0,0 +1,186 @@
+"""
+Локальная база заявок (SQLite): выгрузки накапливаются, агрегаты считает SQL
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    issue_key        TEXT PRIMARY KEY,
+    summary          TEXT,
+    status           TEXT,
+    priority         TEXT,
+    created          TEXT,      -- ISO 8601: 2025-10-01 09:59:00
+    created_date     TEXT,      -- 2025-10-01
+    classroom        TEXT,
+    grp              TEXT,      -- внутренняя метка группы: A, B, C, ...
+    category         TEXT,
+    component        TEXT,
+    department       TEXT,
+    resolution_hours REAL,
+    is_critical      INTEGER NOT NULL DEFAULT 0,
+    is_resolved      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_group_classroom ON tickets (grp, classroom);
+CREATE INDEX IF NOT EXISTS idx_tickets_created_date ON tickets (created_date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+COLUMNS = ('issue_key', 'summary', 'status', 'priority', 'created', 'created_date', 'classroom',
+           'grp', 'category', 'component', 'department', 'resolution_hours', 'is_critical', 'is_resolved')
+
+UPSERT = (
+    f"INSERT INTO tickets ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+    f"ON CONFLICT(issue_key) DO UPDATE SET "
+    + ", ".join(f"{col} = excluded.{col}" for col in COLUMNS[1:])
+)
+
+
+class TicketStore:
+    """Заявки JIRA в SQLite: upsert выгрузок и агрегаты через GROUP BY
+
+    Повторная загрузка той же выгрузки (или более свежей) обновляет заявки
+    по Issue Key, поэтому база — актуальное состояние всех выгрузок.
+    """
+
+    def __init__(self, path="reports/tickets.db"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Этапы конвейера выполняются в пуле потоков, и независимые этапы
+        # (например, load_daily и prepare в режиме --from-db) обращаются к
+        # базе одновременно: соединение общее, запросы идут по очереди под блокировкой
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _rows(df_clean):
+        """Строки для executemany из очищенной таблицы JiraDataLoader.clean_data()"""
+
+        from src.data_loader import JiraDataLoader
+        find = lambda *keywords: JiraDataLoader._find_column(df_clean, *keywords)
+
+        def column(name, default=None):
+            if name is None:
+                return pd.Series(default, index=df_clean.index, dtype=object)
+            values = df_clean[name]
+            return values.astype(object).where(values.notna(), None)
+
+        created = df_clean.get('created_datetime')
+        created_text = created.dt.strftime('%Y-%m-%d %H:%M:%S') if created is not None else None
+
+        data = {
+            'issue_key': column('Issue Key' if 'Issue Key' in df_clean.columns else find('issue', 'key')),
+            'summary': column(find('summary', 'описан')),
+            'status': column(find('status', 'статус')),
+            'priority': column(find('priority', 'приоритет')),
+            'created': column(None) if created_text is None else created_text.astype(object).where(created.notna(), None),
+            'created_date': column(None) if created is None else created.dt.strftime('%Y-%m-%d').astype(object).where(created.notna(), None),
+            'classroom': column(find('аудитор')),
+            'grp': column(find('групп')),
+            'category': column(find('категор', 'проблем')),
+            'component': column(find('component', 'компонент')),
+            'department': column(find('кафедр')),
+            'resolution_hours': column('time_resolution_hours' if 'time_resolution_hours' in df_clean.columns else None),
+            'is_critical': df_clean.get('is_critical', pd.Series(0, index=df_clean.index)).fillna(0).astype(int),
+            'is_resolved': df_clean.get('is_resolved', pd.Series(0, index=df_clean.index)).fillna(0).astype(int),
+        }
+        table = pd.DataFrame(data, columns=COLUMNS)
+        table = table[table['issue_key'].notna()]
+        # Python-типы (а не numpy) — sqlite3 принимает их без адаптеров
+        return list(table.astype(object).itertuples(index=False, name=None))
+
+    def upsert(self, df_clean):
+        """Загрузка выгрузки одной транзакцией (executemany); возвращает число строк"""
+
+        rows = self._rows(df_clean)
+        with self.lock, self.conn:
+            self.conn.executemany(UPSERT, rows)
+        print(f"✓ В базе заявок {self.path}: загружено {len(rows)}, всего {self.count()}")
+        return len(rows)
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+
+    def get_state(self, key, default=None):
+        """Служебное значение (например, время последней синхронизации с JIRA)"""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO sync_state (key, value) VALUES (?, ?) "
+                              "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    # ===== Агрегаты (до pandas доходят только маленькие таблицы) =====
+
+    def classroom_stats(self, classroom_col='Аудитория', group_col='Группа A/B теста'):
+        """Заявки по аудиториям — те же колонки, что у prepare_for_analysis"""
+
+        table = self.query("""
+            SELECT classroom, grp,
+                   COUNT(*)              AS ticket_count,
+                   AVG(resolution_hours) AS avg_resolution_time,
+                   SUM(is_critical)      AS critical_tickets,
+                   AVG(is_resolved)      AS resolution_rate,
+                   SUM(is_resolved)      AS resolved_tickets
+            FROM tickets
+            WHERE grp IS NOT NULL AND classroom IS NOT NULL
+            GROUP BY grp, classroom
+            ORDER BY classroom, grp
+        """)
+        return table.rename(columns={'classroom': classroom_col, 'grp': group_col})
+
+    def category_stats(self, category_col='Категория проблемы', group_col='Группа A/B теста'):
+        """Заявки по категориям: строки — категории, колонки — группы"""
+
+        table = self.query("""
+            SELECT category, grp, COUNT(*) AS tickets
+            FROM tickets
+            WHERE grp IS NOT NULL AND category IS NOT NULL
+            GROUP BY category, grp
+        """)
+        stats = table.pivot(index='category', columns='grp', values='tickets').fillna(0).astype(int)
+        stats.index.name = category_col
+        stats.columns.name = group_col
+        return stats
+
+    def daily_stats(self):
+        """Заявки по дням: Дата, A, B, ..."""
+
+        table = self.query("""
+            SELECT created_date, grp, COUNT(*) AS tickets
+            FROM tickets
+            WHERE grp IS NOT NULL AND created_date IS NOT NULL
+            GROUP BY created_date, grp
+        """)
+        daily = table.pivot(index='created_date', columns='grp', values='tickets').fillna(0).astype(int)
+        daily.columns.name = None
+        daily = daily.reset_index().rename(columns={'created_date': 'Дата'})
+        daily['Дата'] = pd.to_datetime(daily['Дата'])
+        return daily
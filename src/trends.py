@@ -0,0 +1,217 @@
+"""
+Тренды по длинным временным рядам: скользящие окна и прореживание для графиков
+
+Все функции работают с массивами (n,) или (n, k) — k рядов (групп) сразу —
+и не изменяют входные данные.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+DATE_COLUMN = 'Дата'
+
+
+def arm_columns(df, date_col=DATE_COLUMN):
+    """Колонки групп: все числовые, кроме даты"""
+
+    return [col for col in df.columns
+            if col != date_col and pd.api.types.is_numeric_dtype(df[col])]
+
+
+def _window_bounds(n, window, center):
+    """Границы окна [start, end) для каждой точки (как rolling(..., min_periods=1))"""
+
+    idx = np.arange(n)
+    if center:
+        left = window // 2
+        right = window - left - 1
+    else:
+        left, right = window - 1, 0
+    return np.clip(idx - left, 0, n), np.clip(idx + right + 1, 0, n)
+
+
+def rolling_mean(values, window=7, center=True):
+    """Скользящее среднее за O(n) через кумулятивные суммы; NaN пропускаются"""
+
+    values = np.asarray(values, dtype=float)
+    start, end = _window_bounds(len(values), window, center)
+
+    finite = ~np.isnan(values)
+    zeros = np.zeros((1,) + values.shape[1:])
+    sums = np.concatenate([zeros, np.cumsum(np.where(finite, values, 0.0), axis=0)])
+    counts = np.concatenate([zeros, np.cumsum(finite, axis=0)])
+
+    window_sum = sums[end] - sums[start]
+    window_count = counts[end] - counts[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_count > 0, window_sum / window_count, np.nan)
+
+
+def rolling_median(values, window=7, center=True):
+    """Скользящая медиана: окна — представления одного массива (без копирования),
+    медиана через частичную сортировку np.nanmedian"""
+
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0:
+        return values.copy()
+
+    left = window // 2 if center else window - 1
+    right = window - left - 1
+    pad = [(left, right)] + [(0, 0)] * (values.ndim - 1)
+    padded = np.pad(values, pad, constant_values=np.nan)
+
+    # (n, [k,] window): окно — последняя ось
+    windows = sliding_window_view(padded, window, axis=0)
+    with warnings.catch_warnings():
+        # Окно из одних NaN дает NaN — это ожидаемо
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmedian(windows, axis=-1)
+
+
+def ewma(values, span=7, alpha=None):
+    """Экспоненциальное сглаживание за O(n): y[t] = (1 - a) * y[t-1] + a * x[t]
+
+    Совпадает с pandas ewm(span=span, adjust=False).mean(). Ряды без
+    пропусков считаются линейным фильтром scipy.signal.lfilter (на C, все
+    ряды сразу). С пропусками — как в pandas: до первого значения результат
+    NaN, на пропуске повторяется прошлое значение, а его вес продолжает
+    убывать, поэтому после пропуска новое наблюдение весит больше.
+    """
+
+    from scipy.signal import lfilter
+
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return values.copy()
+
+    a = alpha if alpha is not None else 2.0 / (span + 1.0)
+    observed = ~np.isnan(values)
+    if observed.all():
+        # Начальное состояние фильтра дает y[0] = x[0]
+        zi = (1 - a) * values[:1]
+        smoothed, _ = lfilter([a], [1.0, -(1 - a)], values, axis=0, zi=zi)
+        return smoothed
+
+    # Рекурсия pandas (ignore_na=False) по времени, все ряды сразу
+    x = values.reshape(len(values), -1)
+    observed = observed.reshape(x.shape)
+    smoothed = np.empty_like(x)
+    level = np.full(x.shape[1], np.nan)
+    old_weight = np.ones(x.shape[1])
+    for t in range(len(x)):
+        started = ~np.isnan(level)
+        old_weight[started] *= 1 - a
+        update = started & observed[t]
+        level[update] = ((old_weight[update] * level[update] + a * x[t, update])
+                         / (old_weight[update] + a))
+        old_weight[update] = 1.0
+        first = ~started & observed[t]
+        level[first] = x[t, first]
+        smoothed[t] = level
+    return smoothed.reshape(values.shape)
+
+
+SMOOTHERS = {
+    'mean': rolling_mean,
+    'median': rolling_median,
+    'ewma': lambda values, window=7, center=True: ewma(values, span=window),
+}
+
+
+def compute_trends(df, window=7, method='mean', center=True, date_col=DATE_COLUMN, arms=None):
+    """Новая таблица: дата, исходные ряды групп и <группа>_trend
+
+    Входная таблица не изменяется. Если точек меньше окна, тренд не считается.
+    """
+
+    if method not in SMOOTHERS:
+        raise ValueError(f"Неизвестный метод сглаживания: {method} (доступны: {', '.join(SMOOTHERS)})")
+
+    arms = list(arms) if arms is not None else arm_columns(df, date_col)
+    trends = df[[date_col] + arms].copy()
+
+    if len(df) >= window and arms:
+        smoothed = SMOOTHERS[method](df[arms].to_numpy(dtype=float), window=window, center=center)
+        for i, arm in enumerate(arms):
+            trends[f'{arm}_trend'] = smoothed[:, i]
+
+    return trends
+
+
+def lttb(x, y, n_out):
+    """Индексы точек по алгоритму Largest-Triangle-Three-Buckets
+
+    Сохраняет форму ряда (пики и провалы) при прореживании до n_out точек.
+    Один проход по корзинам, внутри корзины — векторные операции: O(n).
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Третья вершина — среднее следующей корзины (или последняя точка)
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev])
+                      - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        selected[i + 1] = prev
+
+    return selected
+
+
+def minmax_downsample(y, n_out):
+    """Индексы минимума и максимума в каждой из n_out // 2 корзин
+
+    Быстрее LTTB (полностью векторно) и не теряет выбросы.
+    """
+
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return np.arange(n)
+
+    size = int(np.ceil(n / n_buckets))
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+
+    # Корзины, где все значения NaN, пропускаем
+    valid = ~np.isnan(buckets).all(axis=1)
+    filled_min = np.where(np.isnan(buckets), np.inf, buckets)
+    filled_max = np.where(np.isnan(buckets), -np.inf, buckets)
+    offsets = np.arange(n_buckets) * size
+    idx_min = offsets + filled_min.argmin(axis=1)
+    idx_max = offsets + filled_max.argmax(axis=1)
+
+    return np.unique(np.concatenate([idx_min[valid], idx_max[valid]]))
+
+
+def downsample(dates, values, n_out=2000, method='lttb'):
+    """Индексы точек для отрисовки одного ряда (без изменения входных данных)"""
+
+    if method == 'minmax':
+        return minmax_downsample(values, n_out)
+    if method == 'lttb':
+        x = pd.Series(dates)
+        if pd.api.types.is_datetime64_any_dtype(x):
+            x = x.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        return lttb(x, values, n_out)
+    raise ValueError(f"Неизвестный метод прореживания: {method}")
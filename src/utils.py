@@ -1,9 +1,10 @@
 """
 Вспомогательные функции
+
+numpy и pandas импортируются внутри функций: print_* используются
+в main.py до загрузки данных, и `main.py --help` не должен их тянуть.
 """
 
-import pandas as pd
-import numpy as np
 from pathlib import Path
 import json
 from datetime import datetime
@@ -17,6 +18,9 @@ def ensure_dir(path):
 
 def convert_numpy(obj):
     """Рекурсивное преобразование numpy типов в Python типы"""
+    import numpy as np
+    import pandas as pd
+    
     if obj is None:
         return None
     elif isinstance(obj, (np.integer, np.int64, np.int32, np.int16, np.int8)):
@@ -33,9 +37,9 @@ def convert_numpy(obj):
         return {convert_numpy(k): convert_numpy(v) for k, v in obj.items()}
     elif isinstance(obj, (list, tuple)):
         return [convert_numpy(item) for item in obj]
-    elif isinstance(obj, (np.inf, -np.inf)):
-        return None
-    elif isinstance(obj, float) and pd.isna(obj):  # проверка на NaN
+    elif isinstance(obj, str):
+        return obj
+    elif isinstance(obj, float) and (pd.isna(obj) or np.isinf(obj)):  # NaN и ±inf
         return None
     elif isinstance(obj, datetime):
         return obj.isoformat()
@@ -47,12 +51,12 @@ def convert_numpy(obj):
     else:
         return obj
 
-def save_results(results, filename="results.json"):
+def save_results(results, filename="results.json", output_dir="reports"):
     """Сохранение результатов в JSON"""
     
     try:
         # Создаем папку reports если её нет
-        output_path = Path("reports") / filename
+        output_path = Path(output_dir) / filename
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Конвертируем numpy типы в обычные Python типы
@@ -70,7 +74,7 @@ def save_results(results, filename="results.json"):
         
         # Сохраняем в текстовый файл как резервный вариант
         try:
-            backup_path = Path("reports") / "results_backup.txt"
+            backup_path = Path(output_dir) / "results_backup.txt"
             with open(backup_path, 'w', encoding='utf-8') as f:
                 f.write("=== РЕЗУЛЬТАТЫ A/B-ТЕСТА ===\n")
                 f.write(f"Дата: {datetime.now()}\n\n")
@@ -0,0 +1,315 @@
+"""
+Проверка допущений A/B-теста (валидация)
+"""
+
+import numpy as np
+from scipy import stats
+from pathlib import Path
+
+from src.bootstrap_cache import bootstrap_mean_diffs
+
+
+def effect_size_description(d):
+    """Словесная оценка размера эффекта по Коэну"""
+    if abs(d) < 0.2:
+        return "🍃 НИЧТОЖНЫЙ"
+    elif abs(d) < 0.5:
+        return "📏 МАЛЕНЬКИЙ"
+    elif abs(d) < 0.8:
+        return "📊 СРЕДНИЙ"
+    else:
+        return "💪 БОЛЬШОЙ"
+
+
+class ABTestValidator:
+    """Проверка валидности исследования на уже загруженных группах"""
+
+    def __init__(self, config, output_dir=None, n_bootstrap=10000, seed=42, bootstrap_cache=None):
+        self.config = config
+        self.output_dir = Path(output_dir or Path(config.OUTPUT_DIR) / "validation")
+        self.n_bootstrap = n_bootstrap
+        self.seed = seed
+        self.bootstrap_cache = bootstrap_cache
+        self.moments = {}
+        self.bootstrap_diffs = None
+        self.results = {}
+
+    def compute_moments(self, group_a, group_b, descriptive=None):
+        """ШАГ 1: Моменты групп — считаются один раз и используются всеми проверками"""
+
+        for key, values in (('group_a', group_a), ('group_b', group_b)):
+            x = np.asarray(values, dtype=float)
+            n = len(x)
+
+            # Среднее и СКО берем из ABTestAnalyzer, если они уже посчитаны
+            if descriptive is not None and key in descriptive:
+                mean = float(descriptive[key]['mean'])
+                std = float(descriptive[key]['std'])
+            else:
+                mean = x.mean()
+                std = x.std(ddof=1)
+
+            centered = x - mean
+            m2 = np.mean(centered**2)
+
+            self.moments[key] = {
+                'values': x,
+                'n': n,
+                'sum': x.sum(),
+                'sum_sq': np.dot(x, x),
+                'mean': mean,
+                'std': std,
+                'var': std**2,
+                'm2': m2,
+                'm3': np.mean(centered**3),
+                'm4': np.mean(centered**4),
+            }
+
+        return self.moments
+
+    def check_normality(self):
+        """ШАГ 2: Нормальность (Шапиро-Уилк, асимметрия, эксцесс)"""
+
+        normality = {}
+        for key in ('group_a', 'group_b'):
+            m = self.moments[key]
+
+            if m['n'] >= 3:
+                normality[f'{key}_shapiro'] = stats.shapiro(m['values']).pvalue
+
+            # Те же формулы, что в stats.skew / stats.kurtosis (смещенные оценки)
+            if m['m2'] > 0:
+                normality[f'{key}_skew'] = m['m3'] / m['m2']**1.5
+                normality[f'{key}_kurtosis'] = m['m4'] / m['m2']**2 - 3
+            else:
+                normality[f'{key}_skew'] = np.nan
+                normality[f'{key}_kurtosis'] = np.nan
+
+        return normality
+
+    def check_variances(self):
+        """ШАГ 3: Равенство дисперсий (тест Левена)"""
+
+        levene = stats.levene(self.moments['group_a']['values'], self.moments['group_b']['values'])
+
+        return {
+            'levene_statistic': levene.statistic,
+            'levene_p': levene.pvalue,
+            'equal_variances': levene.pvalue > self.config.ALPHA,
+            'var_a': self.moments['group_a']['var'],
+            'var_b': self.moments['group_b']['var']
+        }
+
+    def calculate_effect_size(self):
+        """ШАГ 4: Размер эффекта (Cohen's d, Hedges' g)"""
+
+        a, b = self.moments['group_a'], self.moments['group_b']
+
+        pooled_std = np.sqrt((a['var'] + b['var']) / 2)
+        cohens_d = (b['mean'] - a['mean']) / pooled_std
+        hedges_g = cohens_d * (1 - 3 / (4 * (a['n'] + b['n']) - 9))
+
+        return {
+            'cohens_d': cohens_d,
+            'hedges_g': hedges_g,
+            'relative_diff': (b['mean'] - a['mean']) / a['mean'] * 100,
+            'description': effect_size_description(cohens_d)
+        }
+
+    def run_nonparametric(self):
+        """ШАГ 5: Непараметрическая проверка (U-тест Манна-Уитни)"""
+
+        mw = stats.mannwhitneyu(self.moments['group_a']['values'],
+                                self.moments['group_b']['values'],
+                                alternative='two-sided')
+
+        return {
+            'mannwhitney_u': mw.statistic,
+            'mannwhitney_p': mw.pvalue,
+            'significant': mw.pvalue < self.config.ALPHA
+        }
+
+    def run_bootstrap(self):
+        """ШАГ 6: Бутстрап разницы средних (векторно, блоками)
+
+        С bootstrap_cache реплики пишутся в memory-mapped файл и при повторном
+        запуске на тех же данных и seed читаются с диска без пересчета.
+        """
+
+        a, b = self.moments['group_a'], self.moments['group_b']
+
+        if self.bootstrap_cache is not None:
+            diffs = self.bootstrap_cache.get_or_compute(a['values'], b['values'], self.n_bootstrap, self.seed)
+        else:
+            diffs = bootstrap_mean_diffs(a['values'], b['values'], self.n_bootstrap, self.seed)
+
+        self.bootstrap_diffs = diffs
+        ci_lower, ci_upper = np.percentile(diffs, [2.5, 97.5])
+
+        # Базовый (reverse percentile) интервал по тем же репликам
+        observed = b['mean'] - a['mean']
+
+        return {
+            'n_bootstrap': self.n_bootstrap,
+            'seed': self.seed,
+            'ci_lower': ci_lower,
+            'ci_upper': ci_upper,
+            'basic_ci_lower': 2 * observed - ci_upper,
+            'basic_ci_upper': 2 * observed - ci_lower,
+            'p_value': min(1.0, np.mean(diffs >= 0) * 2),
+            'ci_excludes_zero': ci_upper < 0 or ci_lower > 0
+        }
+
+    def run_sensitivity(self):
+        """ШАГ 7: Leave-one-out — t-тест Уэлча без каждого наблюдения
+
+        Средние и дисперсии выборок без одного элемента получаются из сумм
+        и сумм квадратов, поэтому все p-значения считаются одним проходом.
+        """
+
+        a, b = self.moments['group_a'], self.moments['group_b']
+
+        def loo_moments(m):
+            n = m['n'] - 1
+            means = (m['sum'] - m['values']) / n
+            variances = (m['sum_sq'] - m['values']**2 - n * means**2) / (n - 1)
+            return n, means, np.maximum(variances, 0)
+
+        def welch_p(n1, mean1, var1, n2, mean2, var2):
+            se1, se2 = var1 / n1, var2 / n2
+            t = (mean1 - mean2) / np.sqrt(se1 + se2)
+            df = (se1 + se2)**2 / (se1**2 / (n1 - 1) + se2**2 / (n2 - 1))
+            return 2 * stats.t.sf(np.abs(t), df)
+
+        n_a, means_a, vars_a = loo_moments(a)
+        n_b, means_b, vars_b = loo_moments(b)
+
+        p_values = np.concatenate([
+            welch_p(n_a, means_a, vars_a, b['n'], b['mean'], b['var']),
+            welch_p(a['n'], a['mean'], a['var'], n_b, means_b, vars_b)
+        ])
+
+        return {
+            'p_values': p_values,
+            'p_min': np.nanmin(p_values),
+            'p_max': np.nanmax(p_values),
+            'all_significant': bool((p_values < self.config.ALPHA).all())
+        }
+
+    def plot_distributions(self):
+        """ГРАФИК: Гистограммы и Q-Q графики групп"""
+
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        a, b = self.moments['group_a'], self.moments['group_b']
+        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+
+        sns.histplot(a['values'], kde=True, ax=axes[0, 0], color=self.config.COLOR_A, bins=8, alpha=0.7)
+        axes[0, 0].axvline(a['mean'], color='red', linestyle='--', linewidth=2, label=f"Среднее: {a['mean']:.1f}")
+        axes[0, 0].set_title('Группа A (контрольная)', fontweight='bold')
+        axes[0, 0].legend()
+        axes[0, 0].grid(True, alpha=0.3)
+
+        sns.histplot(b['values'], kde=True, ax=axes[0, 1], color=self.config.COLOR_B, bins=8, alpha=0.7)
+        axes[0, 1].axvline(b['mean'], color='blue', linestyle='--', linewidth=2, label=f"Среднее: {b['mean']:.1f}")
+        axes[0, 1].set_title('Группа B (тестовая)', fontweight='bold')
+        axes[0, 1].legend()
+        axes[0, 1].grid(True, alpha=0.3)
+
+        stats.probplot(a['values'], dist="norm", plot=axes[1, 0])
+        axes[1, 0].set_title('Q-Q Plot: Группа A', fontweight='bold')
+        axes[1, 0].grid(True, alpha=0.3)
+
+        stats.probplot(b['values'], dist="norm", plot=axes[1, 1])
+        axes[1, 1].set_title('Q-Q Plot: Группа B', fontweight='bold')
+        axes[1, 1].grid(True, alpha=0.3)
+
+        plt.tight_layout()
+        plt.savefig(self.output_dir / '01_distributions_qq.png', dpi=150, bbox_inches='tight')
+        print(f"  ✓ Сохранено: {self.output_dir / '01_distributions_qq.png'}")
+        plt.close()
+        return fig
+
+    def plot_bootstrap(self):
+        """ГРАФИК: Бутстрап-распределение разницы средних"""
+
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        boot = self.results['bootstrap']
+        fig, ax = plt.subplots(figsize=(12, 6))
+
+        sns.histplot(self.bootstrap_diffs, bins=50, kde=True, ax=ax, color='purple', alpha=0.6)
+        ax.axvline(0, color='red', linestyle='--', linewidth=2, label='Нет эффекта')
+        ax.axvline(boot['ci_lower'], color='green', linestyle=':', linewidth=1.5, label='95% ДИ')
+        ax.axvline(boot['ci_upper'], color='green', linestyle=':', linewidth=1.5)
+        ax.set_xlabel('Разница средних (B - A)')
+        ax.set_title('Бутстрап-распределение разницы средних')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+        plt.savefig(self.output_dir / '02_bootstrap.png', dpi=150, bbox_inches='tight')
+        print(f"  ✓ Сохранено: {self.output_dir / '02_bootstrap.png'}")
+        plt.close()
+        return fig
+
+    def run_full_validation(self, group_a, group_b, descriptive=None, plots=True):
+        """Полная проверка допущений"""
+
+        print("\n🔍 Проверяем допущения теста...")
+
+        self.compute_moments(group_a, group_b, descriptive)
+
+        self.results = {
+            'unit_of_analysis': {
+                'group_a_units': self.moments['group_a']['n'],
+                'group_b_units': self.moments['group_b']['n'],
+                'group_a_tickets': self.moments['group_a']['sum'],
+                'group_b_tickets': self.moments['group_b']['sum']
+            },
+            'normality': self.check_normality(),
+            'variances': self.check_variances(),
+            'effect_size': self.calculate_effect_size(),
+            'nonparametric': self.run_nonparametric(),
+            'bootstrap': self.run_bootstrap(),
+            'sensitivity': self.run_sensitivity()
+        }
+
+        print(f"   p(Левен): {self.results['variances']['levene_p']:.4f}")
+        print(f"   p(Манн-Уитни): {self.results['nonparametric']['mannwhitney_p']:.4f}")
+        print(f"   Бутстрап 95% ДИ: [{self.results['bootstrap']['ci_lower']:.3f}, "
+              f"{self.results['bootstrap']['ci_upper']:.3f}]")
+
+        if plots:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self.plot_distributions()
+            self.plot_bootstrap()
+
+        return self.results
+
+    def print_summary(self):
+        """Печать итогового отчета о валидности"""
+
+        if not self.results:
+            print("Сначала выполните run_full_validation()")
+            return
+
+        r = self.results
+        normality = r['normality']
+
+        print("\n" + "="*80)
+        print("🏁 ИТОГОВЫЙ ОТЧЕТ О ВАЛИДНОСТИ".center(80, "="))
+        print("="*80)
+        print(f"""
+✅ ЕДИНИЦА АНАЛИЗА: {r['unit_of_analysis']['group_a_units']}/{r['unit_of_analysis']['group_b_units']} аудиторий
+✅ НОРМАЛЬНОСТЬ: p_A={normality.get('group_a_shapiro', np.nan):.3f}, p_B={normality.get('group_b_shapiro', np.nan):.3f}
+✅ ДИСПЕРСИИ: p(Левен)={r['variances']['levene_p']:.3f} - {'РАВНЫ' if r['variances']['equal_variances'] else 'РАЗНЫЕ'}
+✅ РАЗМЕР ЭФФЕКТА: d={abs(r['effect_size']['cohens_d']):.2f} ({r['effect_size']['description']})
+✅ РОБАСТНОСТЬ: p(Манн-Уитни)={r['nonparametric']['mannwhitney_p']:.4f}
+✅ БУТСТРАП: 95% ДИ [{r['bootstrap']['ci_lower']:.2f}, {r['bootstrap']['ci_upper']:.2f}]
+✅ LOO: p от {r['sensitivity']['p_min']:.4f} до {r['sensitivity']['p_max']:.4f}
+
+🏆 ВЫВОД: ИССЛЕДОВАНИЕ {'ПОЛНОСТЬЮ' if r['sensitivity']['all_significant'] else 'УСЛОВНО'} ВАЛИДНО
+""")
+        print("="*80)
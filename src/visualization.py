@@ -4,27 +4,47 @@
 
 import matplotlib.pyplot as plt
 import seaborn as sns
+import re
 import numpy as np
 import pandas as pd
 from pathlib import Path
 from scipy import stats
 
-# Настройка стилей для красивых графиков
-plt.style.use('seaborn-v0_8-whitegrid')
-sns.set_palette("husl")
-plt.rcParams['font.family'] = 'DejaVu Sans'  # Поддержка русского языка
+_STYLE_APPLIED = False
+
+def setup_style():
+    """Настройка стилей для красивых графиков (один раз, при первом использовании)"""
+    global _STYLE_APPLIED
+    if _STYLE_APPLIED:
+        return
+    plt.style.use('seaborn-v0_8-whitegrid')
+    sns.set_palette("husl")
+    plt.rcParams['font.family'] = 'DejaVu Sans'  # Поддержка русского языка
+    _STYLE_APPLIED = True
 
 class ABTestVisualizer:
     """Класс для создания графиков"""
     
     def __init__(self, config):
         self.config = config
+        setup_style()
         
         # Создаем папку для графиков
-        self.figures_dir = Path("reports/figures")
+        self.figures_dir = Path(self.config.OUTPUT_DIR) / "figures"
         self.figures_dir.mkdir(parents=True, exist_ok=True)
         print(f"📁 Папка для графиков: {self.figures_dir}")
     
+    def _save(self, name, **kwargs):
+        """Сохранение текущей фигуры во всех форматах config.FIGURE_FORMATS"""
+        
+        paths = [self.figures_dir / f'{name}.{fmt}' for fmt in self.config.FIGURE_FORMATS]
+        for path in paths:
+            plt.savefig(path, dpi=self.config.FIGURE_DPI, bbox_inches='tight', **kwargs)
+        
+        if paths:
+            print(f"  ✓ Сохранено: {paths[0]}")
+        return paths
+    
     def plot_ticket_comparison(self, group_a, group_b):
         """ГРАФИК 1: Сравнение групп (столбчатая диаграмма + box plot)"""
         
@@ -106,12 +126,7 @@ class ABTestVisualizer:
         plt.tight_layout()
         
         # Сохраняем в разных форматах
-        plt.savefig(self.figures_dir / '01_ticket_comparison.png', 
-                   dpi=300, bbox_inches='tight')
-        plt.savefig(self.figures_dir / '01_ticket_comparison.pdf', 
-                   bbox_inches='tight')
-        
-        print(f"  ✓ Сохранено: {self.figures_dir / '01_ticket_comparison.png'}")
+        self._save('01_ticket_comparison')
         plt.close()
         return fig
     
@@ -158,15 +173,53 @@ class ABTestVisualizer:
         plt.tight_layout()
         
         # Сохраняем
-        plt.savefig(self.figures_dir / '02_category_heatmap.png', 
-                   dpi=300, bbox_inches='tight')
-        plt.savefig(self.figures_dir / '02_category_heatmap.pdf', 
-                   bbox_inches='tight')
-        
-        print(f"  ✓ Сохранено: {self.figures_dir / '02_category_heatmap.png'}")
+        self._save('02_category_heatmap')
         plt.close()
         return fig
     
+    def _arm_color(self, arm, i):
+        """Цвет группы: A и B — из config, остальные — из палитры"""
+        
+        if arm == 'A':
+            return self.config.COLOR_A
+        if arm == 'B':
+            return self.config.COLOR_B
+        return sns.color_palette("husl", i + 1)[i]
+    
+    def _draw_trends(self, ax, df_daily, point_alpha, point_size, line_alpha):
+        """Точки по дням и сглаженные тренды для всех групп из df_daily
+        
+        Тренды считаются в src.trends по полному ряду, а на график попадает
+        не больше config.TREND_MAX_POINTS точек на ряд (точки — min/max по
+        корзинам, линии — LTTB). Возвращает список групп.
+        """
+        
+        from src.trends import compute_trends, downsample
+        
+        trends = compute_trends(df_daily, window=self.config.TREND_WINDOW,
+                                method=self.config.TREND_METHOD)
+        arms = [col for col in trends.columns if col != 'Дата' and not col.endswith('_trend')]
+        dates = trends['Дата'].to_numpy()
+        max_points = self.config.TREND_MAX_POINTS
+        
+        for i, arm in enumerate(arms):
+            color = self._arm_color(arm, i)
+            values = trends[arm].to_numpy(dtype=float)
+            idx = downsample(dates, values, max_points, method='minmax')
+            ax.scatter(dates[idx], values[idx], 
+                      color=color, alpha=point_alpha, s=point_size, label=f'Группа {arm} (ежедневно)')
+        
+        for i, arm in enumerate(arms):
+            if f'{arm}_trend' not in trends.columns:
+                continue
+            smooth = trends[f'{arm}_trend'].to_numpy()
+            idx = downsample(trends['Дата'], smooth, max_points, method='lttb')
+            ax.plot(dates[idx], smooth[idx], 
+                   color=self._arm_color(arm, i), linewidth=3, alpha=line_alpha,
+                   label=f'Группа {arm} (тренд)')
+        
+        return arms
+    
     def plot_daily_trends(self, df_daily):
         """ГРАФИК 3: Динамика заявок по дням"""
         
@@ -178,25 +231,8 @@ class ABTestVisualizer:
         
         fig, ax = plt.subplots(figsize=(14, 6))
         
-        # Сглаживание (7-дневное скользящее среднее)
-        if len(df_daily) >= 7:
-            df_daily['A_smooth'] = df_daily['A'].rolling(window=7, center=True, min_periods=1).mean()
-            df_daily['B_smooth'] = df_daily['B'].rolling(window=7, center=True, min_periods=1).mean()
-        
-        # Исходные данные (прозрачные точки)
-        ax.scatter(df_daily['Дата'], df_daily['A'], 
-                  color=self.config.COLOR_A, alpha=0.3, s=20, label='Группа A (ежедневно)')
-        ax.scatter(df_daily['Дата'], df_daily['B'], 
-                  color=self.config.COLOR_B, alpha=0.3, s=20, label='Группа B (ежедневно)')
-        
-        # Сглаженные тренды
-        if 'A_smooth' in df_daily.columns:
-            ax.plot(df_daily['Дата'], df_daily['A_smooth'], 
-                   color=self.config.COLOR_A, linewidth=3, alpha=0.8,
-                   label='Группа A (тренд)')
-            ax.plot(df_daily['Дата'], df_daily['B_smooth'], 
-                   color=self.config.COLOR_B, linewidth=3, alpha=0.8,
-                   label='Группа B (тренд)')
+        # Исходные точки и сглаженные тренды (df_daily не изменяется)
+        arms = self._draw_trends(ax, df_daily, point_alpha=0.3, point_size=20, line_alpha=0.8)
         
         ax.set_xlabel('Дата', fontsize=11, fontweight='bold')
         ax.set_ylabel('Количество заявок', fontsize=11, fontweight='bold')
@@ -209,20 +245,15 @@ class ABTestVisualizer:
         plt.yticks(fontsize=9)
         
         # Добавляем горизонтальную линию среднего
-        ax.axhline(y=np.mean(df_daily['A']), color=self.config.COLOR_A, 
-                  linestyle='--', alpha=0.5, label=f'Среднее A: {np.mean(df_daily["A"]):.1f}')
-        ax.axhline(y=np.mean(df_daily['B']), color=self.config.COLOR_B, 
-                  linestyle='--', alpha=0.5, label=f'Среднее B: {np.mean(df_daily["B"]):.1f}')
+        for i, arm in enumerate(arms):
+            mean = np.nanmean(df_daily[arm])
+            ax.axhline(y=mean, color=self._arm_color(arm, i), 
+                      linestyle='--', alpha=0.5, label=f'Среднее {arm}: {mean:.1f}')
         
         plt.tight_layout()
         
         # Сохраняем
-        plt.savefig(self.figures_dir / '03_daily_trends.png', 
-                   dpi=300, bbox_inches='tight')
-        plt.savefig(self.figures_dir / '03_daily_trends.pdf', 
-                   bbox_inches='tight')
-        
-        print(f"  ✓ Сохранено: {self.figures_dir / '03_daily_trends.png'}")
+        self._save('03_daily_trends')
         plt.close()
         return fig
     
@@ -270,12 +301,200 @@ class ABTestVisualizer:
         plt.tight_layout()
         
         # Сохраняем
-        plt.savefig(self.figures_dir / '04_effect_size.png', 
-                   dpi=300, bbox_inches='tight')
-        plt.savefig(self.figures_dir / '04_effect_size.pdf', 
-                   bbox_inches='tight')
+        self._save('04_effect_size')
+        plt.close()
+        return fig
+    
+    def plot_arms_comparison(self, arm_tickets, multiarm, category_stats=None):
+        """ГРАФИК 7: A/B/n — средние всех групп, разницы с поправкой и категории"""
+        
+        print("📊 Создаем график сравнения всех групп...")
+        
+        arms = multiarm['arms']
+        moments = multiarm['moments']
+        colors = [self._arm_color(arm, i) for i, arm in enumerate(arms)]
+        n_panels = 3 if category_stats is not None else 2
+        fig, axes = plt.subplots(1, n_panels, figsize=(7 * n_panels, 6),
+                                 gridspec_kw={'width_ratios': [1, 1, 1.4][:n_panels]})
+        
+        # ===== 7.1: Средние ± SE и отдельные аудитории =====
+        ax1 = axes[0]
+        x = np.arange(len(arms))
+        ax1.bar(x, [moments[arm]['mean'] for arm in arms],
+                yerr=[moments[arm]['sem'] for arm in arms], capsize=8,
+                color=colors, edgecolor='black', linewidth=1.5, alpha=0.8)
+        for i, arm in enumerate(arms):
+            values = np.asarray(arm_tickets[arm], dtype=float)
+            jitter = np.random.default_rng(i).uniform(-0.15, 0.15, len(values))
+            ax1.scatter(i + jitter, values, color='black', s=12, alpha=0.5, zorder=3)
+        ax1.set_xticks(x)
+        ax1.set_xticklabels([f"{arm}\n(n={moments[arm]['size']})" for arm in arms], fontsize=10)
+        ax1.set_ylabel('Заявок на аудиторию', fontsize=11)
+        ax1.set_title('Средние по группам (± SE)', fontweight='bold', fontsize=12)
+        ax1.grid(axis='y', alpha=0.3)
+        
+        # ===== 7.2: Разницы и доверительные интервалы =====
+        ax2 = axes[1]
+        rows = multiarm['comparisons']
+        y = np.arange(len(rows))[::-1]
+        for yi, row in zip(y, rows):
+            low, high = row['confidence_interval']
+            color = '#2E7D32' if row['significant'] else 'gray'
+            ax2.plot([low, high], [yi, yi], color=color, linewidth=3)
+            ax2.plot(row['mean_diff'], yi, 'o', color=color, markersize=9)
+            ax2.annotate(f"p = {row['p_adjusted']:.3f}", (row['mean_diff'], yi), xytext=(0, 10),
+                         textcoords='offset points', ha='center', fontsize=9, color=color)
+        ax2.axvline(0, color='black', linestyle='--', linewidth=1)
+        ax2.set_ylim(-0.7, len(rows) - 0.3)
+        ax2.set_yticks(y)
+        ax2.set_yticklabels([f"{row['arm']} − {row['vs']}" for row in rows], fontsize=10)
+        ax2.set_xlabel('Разница средних (заявок на аудиторию)', fontsize=11)
+        ax2.set_title(f"Сравнения (поправка: {multiarm['correction']})", fontweight='bold', fontsize=12)
+        ax2.grid(axis='x', alpha=0.3)
+        
+        # ===== 7.3: Категории по всем группам =====
+        if category_stats is not None:
+            ax3 = axes[2]
+            plot_data = category_stats[[arm for arm in arms if arm in category_stats.columns]]
+            plot_data = plot_data.loc[plot_data.sum(axis=1).sort_values(ascending=False).index]
+            sns.heatmap(plot_data, annot=True, fmt='d', cmap='RdYlGn_r',
+                        linewidths=1, linecolor='white', cbar=False, ax=ax3)
+            ax3.set_xlabel('Группа', fontsize=11)
+            ax3.set_ylabel('')
+            ax3.set_title('Заявки по категориям', fontweight='bold', fontsize=12)
+        
+        plt.tight_layout()
+        
+        self._save('07_arms_comparison')
+        plt.close()
+        return fig
+    
+    def plot_survival(self, survival):
+        """ГРАФИК 8: Кривые Каплана-Мейера — доля еще не решенных заявок во времени"""
+        
+        print("⏳ Создаем график времени до решения (Каплан-Мейер)...")
+        
+        fig, ax = plt.subplots(figsize=(12, 6))
+        
+        for i, (group, curve) in enumerate(survival.curves.items()):
+            color = self._arm_color(group, i)
+            row = survival.results['groups'][group]
+            times = np.concatenate([[0.0], curve['time']])
+            
+            ax.step(times, np.concatenate([[1.0], curve['survival']]), where='post',
+                    color=color, linewidth=2.5,
+                    label=f"Группа {group} (медиана {row['median_hours']:.0f} ч, n={row['tickets']})")
+            ax.fill_between(times, np.concatenate([[1.0], curve['ci_lower']]),
+                            np.concatenate([[1.0], curve['ci_upper']]),
+                            step='post', color=color, alpha=0.15)
+            
+            # Засечки — моменты цензурирования (открытые заявки)
+            censored = curve['censored'] > 0
+            ax.plot(curve['time'][censored], curve['survival'][censored], '|',
+                    color=color, markersize=10, markeredgewidth=1.5)
+        
+        ax.axhline(0.5, color='gray', linestyle=':', linewidth=1)
+        logrank = survival.results['logrank']
+        ax.text(0.98, 0.95, f"Лог-ранговый тест: p = {logrank['p_value']:.4f}\n| — открытые заявки",
+                transform=ax.transAxes, ha='right', va='top', fontsize=10,
+                bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+        
+        ax.set_xlabel('Часы с момента создания заявки', fontsize=11, fontweight='bold')
+        ax.set_ylabel('Доля нерешенных заявок', fontsize=11, fontweight='bold')
+        ax.set_title('Время до решения заявки (Каплан-Мейер, открытые заявки цензурированы)',
+                     fontweight='bold', fontsize=14)
+        ax.set_ylim(0, 1.02)
+        ax.set_xlim(left=0)
+        ax.legend(loc='lower left', fontsize=10, frameon=True)
+        ax.grid(True, alpha=0.3)
+        
+        plt.tight_layout()
+        
+        self._save('08_survival')
+        plt.close()
+        return fig
+    
+    def plot_hte_forest(self, scanner, top=25):
+        """ГРАФИК 9: Forest plot — эффект в подгруппах с наименьшими p-значениями"""
+        
+        print("🌲 Создаем forest plot по подгруппам...")
+        
+        rows = scanner.results.head(top)
+        fig, ax = plt.subplots(figsize=(12, max(4, 0.38 * len(rows) + 1.5)))
+        
+        y = np.arange(len(rows))[::-1]
+        colors = np.where(rows['significant'], '#2E7D32', 'gray')
+        ax.hlines(y, rows['ci_lower'], rows['ci_upper'], colors=colors, linewidth=2.5)
+        ax.scatter(rows['mean_diff'], y, c=colors, s=40 + 2 * np.sqrt(rows['tickets']), zorder=3)
+        
+        ax.axvline(0, color='black', linestyle='--', linewidth=1)
+        for row in scanner.overall:
+            ax.axvline(row['mean_diff'], color='darkblue', linestyle=':', linewidth=1.5,
+                       label=f"Все заявки ({row['arm']} − {row['vs']}): {row['mean_diff']:+.2f}")
+        
+        labels = [f"{row['attribute']}: {row['value']}" for _, row in rows.iterrows()]
+        ax.set_yticks(y)
+        ax.set_yticklabels([label[:60] + '…' if len(label) > 60 else label for label in labels], fontsize=8)
+        for yi, (_, row) in zip(y, rows.iterrows()):
+            ax.annotate(f"q = {row['q_value']:.3f}", (row['ci_upper'], yi), xytext=(5, 0),
+                        textcoords='offset points', va='center', fontsize=7, color='dimgray')
+        
+        ax.set_xlabel('Разница средних (заявок на аудиторию, вариант − контроль)', fontsize=11, fontweight='bold')
+        ax.set_title(f'Эффект по подгруппам: {len(rows)} из {len(scanner.results)} с наименьшими p '
+                     f'(зеленые — значимы после поправки BH)', fontweight='bold', fontsize=12)
+        ax.legend(loc='lower right', fontsize=9)
+        ax.grid(axis='x', alpha=0.3)
+        
+        plt.tight_layout()
+        
+        self._save('09_hte_forest')
+        plt.close()
+        return fig
+    
+    def plot_event_study(self, did):
+        """ГРАФИК 10: Event study — эффект по периодам относительно начала пост-периода"""
+        
+        print("📐 Создаем график event study...")
+        
+        table = did.event_study
+        fig, ax = plt.subplots(figsize=(12, 6))
+        
+        # Базовый период -1 — ноль по построению
+        periods = np.append(table['period'].to_numpy(), -1)
+        estimates = np.append(table['estimate'].to_numpy(), 0.0)
+        lower = np.append(table['ci_lower'].to_numpy(), 0.0)
+        upper = np.append(table['ci_upper'].to_numpy(), 0.0)
+        order = np.argsort(periods)
+        periods, estimates, lower, upper = periods[order], estimates[order], lower[order], upper[order]
+        
+        colors = np.where(periods < 0, 'gray', self.config.COLOR_B)
+        ax.vlines(periods, lower, upper, colors=colors, linewidth=2.5)
+        ax.scatter(periods, estimates, c=colors, s=60, zorder=3)
+        ax.plot(periods, estimates, color='black', linewidth=1, alpha=0.4)
+        
+        ax.axhline(0, color='black', linestyle='--', linewidth=1)
+        ax.axvline(-0.5, color='red', linestyle=':', linewidth=1.5,
+                   label=f"Начало пост-периода ({did.results['post_start']})")
+        
+        res = did.results
+        text = f"DiD: {res['estimate']:+.3f} в день, p = {res['p_value']:.4f}"
+        if res['pretrend']:
+            text += f"\nТренды до начала: p = {res['pretrend']['p_value']:.4f}"
+        ax.text(0.02, 0.95, text, transform=ax.transAxes, va='top', fontsize=10,
+                bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+        
+        ax.set_xticks(periods)
+        ax.set_xlabel(f'Период относительно начала ({did.bin_days} дн.; крайние объединяют остальное)',
+                      fontsize=11, fontweight='bold')
+        ax.set_ylabel('Эффект (заявок на аудиторию в день)', fontsize=11, fontweight='bold')
+        ax.set_title('Event study: разность разностей по периодам (ошибки кластеризованы по аудиториям)',
+                     fontweight='bold', fontsize=13)
+        ax.legend(loc='lower right', fontsize=10)
+        ax.grid(True, alpha=0.3)
         
-        print(f"  ✓ Сохранено: {self.figures_dir / '04_effect_size.png'}")
+        plt.tight_layout()
+        
+        self._save('10_did_event_study')
         plt.close()
         return fig
     
@@ -441,30 +660,14 @@ class ABTestVisualizer:
         if loader.df_daily is not None:
             ax7 = fig.add_subplot(gs[2, :])
             
-            # Сглаживание
-            df_daily = loader.df_daily.copy()
-            if len(df_daily) >= 7:
-                df_daily['A_smooth'] = df_daily['A'].rolling(window=7, center=True, min_periods=1).mean()
-                df_daily['B_smooth'] = df_daily['B'].rolling(window=7, center=True, min_periods=1).mean()
-            
-            # Исходные точки (полупрозрачные)
-            ax7.scatter(df_daily['Дата'], df_daily['A'], 
-                       color=self.config.COLOR_A, alpha=0.2, s=15, label='Группа A (ежедневно)')
-            ax7.scatter(df_daily['Дата'], df_daily['B'], 
-                       color=self.config.COLOR_B, alpha=0.2, s=15, label='Группа B (ежедневно)')
-            
-            # Тренды
-            if 'A_smooth' in df_daily.columns:
-                ax7.plot(df_daily['Дата'], df_daily['A_smooth'], 
-                        color=self.config.COLOR_A, linewidth=3, alpha=0.9, label='Группа A (тренд)')
-                ax7.plot(df_daily['Дата'], df_daily['B_smooth'], 
-                        color=self.config.COLOR_B, linewidth=3, alpha=0.9, label='Группа B (тренд)')
+            # Исходные точки (полупрозрачные) и тренды
+            df_daily = loader.df_daily
+            arms = self._draw_trends(ax7, df_daily, point_alpha=0.2, point_size=15, line_alpha=0.9)
             
             # Средние линии
-            ax7.axhline(y=df_daily['A'].mean(), color=self.config.COLOR_A, 
-                       linestyle='--', alpha=0.5, linewidth=1)
-            ax7.axhline(y=df_daily['B'].mean(), color=self.config.COLOR_B, 
-                       linestyle='--', alpha=0.5, linewidth=1)
+            for i, arm in enumerate(arms):
+                ax7.axhline(y=np.nanmean(df_daily[arm]), color=self._arm_color(arm, i), 
+                           linestyle='--', alpha=0.5, linewidth=1)
             
             ax7.set_xlabel('Дата', fontsize=12, fontweight='bold')
             ax7.set_ylabel('Количество заявок', fontsize=12, fontweight='bold')
@@ -482,11 +685,327 @@ class ABTestVisualizer:
         
         # Сохраняем с высоким разрешением
         if save:
-            plt.savefig(self.figures_dir / '05_dashboard.png', 
-                       dpi=300, bbox_inches='tight', pad_inches=0.5)
-            plt.savefig(self.figures_dir / '05_dashboard.pdf', 
-                       bbox_inches='tight', pad_inches=0.5)
-            print(f"  ✓ Сохранено: {self.figures_dir / '05_dashboard.png'}")
+            self._save('05_dashboard', pad_inches=0.5)
         
         plt.close()
-        return fig
\ No newline at end of file
+        return fig
+    
+    def create_segment_dashboards(self, segments, segment_results, subdir="segments", formats=None):
+        """ГРАФИК 6: Дашборды по сегментам через общий шаблон DashboardTemplate"""
+        
+        formats = formats or self.config.FIGURE_FORMATS
+        output_dir = self.figures_dir / subdir
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        print(f"🧩 Создаем дашборды по сегментам ({len(segment_results)})...")
+        
+        template = DashboardTemplate(self.config)
+        paths = []
+        for i, (name, results) in enumerate(segment_results.items(), start=1):
+            data = segments[name]
+            template.render(data['group_a'], data['group_b'], results,
+                            data['category_stats'], data['daily'],
+                            title=f'A/B-TEST DASHBOARD: {name}')
+            safe_name = re.sub(r'[^\w-]+', '_', str(name))[:60]
+            path_stem = output_dir / f"{i:03d}_{safe_name}"
+            template.save(path_stem, formats=formats, dpi=self.config.FIGURE_DPI)
+            paths.append(path_stem)
+        
+        print(f"  ✓ Сохранено в: {output_dir}")
+        return paths
+
+
+class DashboardTemplate:
+    """Шаблон дашборда для серийной отрисовки (например, по сегментам)
+    
+    Оси, подписи и оформление таблицы создаются один раз в __init__.
+    render() только обновляет данные уже существующих элементов
+    (set_height, set_data, set_text), а save() сохраняет фигуру с
+    фиксированной разметкой — без пересчета bbox_inches='tight'.
+    Фигура создается без pyplot, поэтому не попадает в глобальное
+    состояние matplotlib.
+    """
+    
+    def __init__(self, config, n_categories=6, figsize=(20, 14), dpi=100):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.patches import Rectangle
+        import matplotlib.dates as mdates
+        
+        self.config = config
+        self.n_categories = n_categories
+        self.dpi = dpi
+        colors = [config.COLOR_A, config.COLOR_B]
+        
+        self.fig = Figure(figsize=figsize)
+        FigureCanvasAgg(self.fig)
+        gs = self.fig.add_gridspec(3, 3, hspace=0.4, wspace=0.3,
+                                   left=0.05, right=0.95, top=0.90, bottom=0.08)
+        self.suptitle = self.fig.suptitle('', fontsize=18, fontweight='bold', y=0.97)
+        
+        # ===== 1. Сравнение групп =====
+        ax1 = self.fig.add_subplot(gs[0, 0])
+        self.bars = ax1.bar([0, 1], [0, 0], color=colors, edgecolor='black', linewidth=1.5, alpha=0.8)
+        self.err_lines = ax1.vlines([0, 1], [0, 0], [0, 0], colors='black', linewidth=2)
+        self.err_caps, = ax1.plot([], [], linestyle='none', marker='_', markersize=16,
+                                  markeredgewidth=2, color='black')
+        self.bar_labels = [ax1.text(x, 0, '', ha='center', va='bottom', fontweight='bold', fontsize=10)
+                           for x in (0, 1)]
+        ax1.set_xticks([0, 1])
+        ax1.set_xticklabels(['Группа A\n(контроль)', 'Группа B\n(тест)'], fontsize=11)
+        ax1.set_xlim(-0.6, 1.6)
+        ax1.set_ylabel('Среднее заявок на аудиторию', fontsize=12, fontweight='bold')
+        ax1.set_title('Сравнение групп', fontweight='bold', fontsize=14, pad=10)
+        ax1.grid(axis='y', alpha=0.3)
+        self.ax_bars = ax1
+        
+        # ===== 2. Ключевые метрики =====
+        ax2 = self.fig.add_subplot(gs[0, 1])
+        ax2.axis('off')
+        rows = ['Кол-во аудиторий', 'Всего заявок', 'Среднее заявок', 'p-значение', 'Статус']
+        cell_text = [['Метрика', 'Группа A', 'Группа B', 'Изменение']] + [[row, '', '', ''] for row in rows]
+        self.table = ax2.table(cellText=cell_text, loc='center', cellLoc='center',
+                               colWidths=[0.25, 0.2, 0.2, 0.25])
+        self.table.auto_set_font_size(False)
+        self.table.set_fontsize(10)
+        self.table.scale(1, 1.8)
+        for j in range(4):
+            self.table[(0, j)].set_facecolor('#4472C4')
+            self.table[(0, j)].set_text_props(weight='bold', color='white')
+        self.table[(3, 3)].set_text_props(weight='bold', color='green')
+        self.table[(5, 3)].set_text_props(weight='bold')
+        ax2.set_title('Ключевые метрики', fontweight='bold', fontsize=14, pad=10)
+        
+        # ===== 3. Топ изменений по категориям =====
+        ax3 = self.fig.add_subplot(gs[0, 2])
+        positions = np.arange(n_categories)
+        self.cat_bars = ax3.barh(positions, np.zeros(n_categories), height=0.6, alpha=0.7)
+        ax3.set_yticks(positions)
+        ax3.set_ylim(-0.6, n_categories - 0.4)
+        ax3.axvline(x=0, color='black', linestyle='-', linewidth=1, alpha=0.5)
+        ax3.set_xlabel('Изменение %', fontsize=11)
+        ax3.set_title('Топ изменений', fontweight='bold', fontsize=14, pad=10)
+        ax3.grid(axis='x', alpha=0.3)
+        self.ax_categories = ax3
+        
+        # ===== 4. Box plot (коробки, медианы, усы, выбросы) =====
+        ax4 = self.fig.add_subplot(gs[1, 0])
+        self.boxes = [ax4.add_patch(Rectangle((x - 0.25, 0), 0.5, 0, facecolor=color, alpha=0.7,
+                                              edgecolor='black', linewidth=1.5))
+                      for x, color in zip((1, 2), colors)]
+        self.box_medians = [ax4.plot([], [], color='red', linewidth=2)[0] for _ in range(2)]
+        self.box_whiskers = [ax4.plot([], [], color='black', linewidth=1.2)[0] for _ in range(2)]
+        self.box_fliers = [ax4.plot([], [], 'o', color='gray', alpha=0.5)[0] for _ in range(2)]
+        ax4.set_xticks([1, 2])
+        ax4.set_xticklabels(['A', 'B'])
+        ax4.set_xlim(0.4, 2.6)
+        ax4.set_ylabel('Количество заявок', fontsize=11)
+        ax4.set_title('Распределение заявок', fontweight='bold', fontsize=14, pad=10)
+        ax4.grid(axis='y', alpha=0.3)
+        self.ax_box = ax4
+        
+        # ===== 5. Размер эффекта =====
+        ax5 = self.fig.add_subplot(gs[1, 1])
+        self.ci_span = ax5.add_patch(Rectangle((0, 0), 0, 1, transform=ax5.get_xaxis_transform(),
+                                               color='lightblue', alpha=0.2))
+        self.ci_line, = ax5.plot([], [], color='darkblue', linewidth=3)
+        self.ci_caps, = ax5.plot([], [], linestyle='none', marker='|', markersize=16,
+                                 markeredgewidth=2, color='darkblue')
+        self.effect_point, = ax5.plot([], [], 'o', color='darkblue', markersize=15,
+                                      markeredgecolor='white', markeredgewidth=2)
+        ax5.axvline(x=0, color='red', linestyle='--', alpha=0.7, linewidth=2)
+        ax5.set_xlabel('Разница средних (B - A)', fontsize=11, fontweight='bold')
+        ax5.set_yticks([])
+        ax5.set_ylim(-1, 1)
+        self.ax_effect = ax5
+        
+        # ===== 6. Статус теста =====
+        ax6 = self.fig.add_subplot(gs[1, 2])
+        ax6.axis('off')
+        self.status_text = ax6.text(0.5, 0.5, '', ha='center', va='center',
+                                    fontsize=16, fontweight='bold', transform=ax6.transAxes,
+                                    bbox=dict(boxstyle='round,pad=1', facecolor='white', alpha=0.8,
+                                              edgecolor='black', linewidth=2),
+                                    linespacing=1.5)
+        
+        # ===== 7. Динамика =====
+        ax7 = self.fig.add_subplot(gs[2, :])
+        self.daily_points = [ax7.scatter([], [], color=color, alpha=0.2, s=15, label=f'Группа {g} (ежедневно)')
+                             for g, color in zip('AB', colors)]
+        self.daily_trends = [ax7.plot([], [], color=color, linewidth=3, alpha=0.9, label=f'Группа {g} (тренд)')[0]
+                             for g, color in zip('AB', colors)]
+        self.daily_means = [ax7.axhline(y=0, color=color, linestyle='--', alpha=0.5, linewidth=1)
+                            for color in colors]
+        ax7.xaxis_date()
+        ax7.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=10))
+        ax7.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+        ax7.set_xlabel('Дата', fontsize=12, fontweight='bold')
+        ax7.set_ylabel('Количество заявок', fontsize=12, fontweight='bold')
+        ax7.set_title('Динамика заявок по дням', fontweight='bold', fontsize=14, pad=15)
+        ax7.legend(loc='upper right', fontsize=10, frameon=True, fancybox=True)
+        ax7.grid(True, alpha=0.3)
+        ax7.tick_params(axis='x', rotation=45, labelsize=9)
+        self.ax_daily = ax7
+        self._date2num = mdates.date2num
+    
+    @staticmethod
+    def _box_stats(values):
+        """Квартили, усы (1.5 IQR) и выбросы — как в Axes.boxplot"""
+        x = np.asarray(values, dtype=float)
+        q1, median, q3 = np.percentile(x, [25, 50, 75])
+        iqr = q3 - q1
+        inside = x[(x >= q1 - 1.5 * iqr) & (x <= q3 + 1.5 * iqr)]
+        low, high = (inside.min(), inside.max()) if len(inside) else (q1, q3)
+        fliers = x[(x < low) | (x > high)]
+        return q1, median, q3, low, high, fliers
+    
+    def _update_bars(self, group_a, group_b):
+        means = [np.mean(group_a), np.mean(group_b)]
+        errors = [stats.sem(group_a), stats.sem(group_b)]
+        
+        for bar, mean in zip(self.bars, means):
+            bar.set_height(mean)
+        self.err_lines.set_segments([[(x, m - e), (x, m + e)] for x, m, e in zip((0, 1), means, errors)])
+        self.err_caps.set_data([0, 0, 1, 1], [means[0] - errors[0], means[0] + errors[0],
+                                              means[1] - errors[1], means[1] + errors[1]])
+        for label, x, mean, err in zip(self.bar_labels, (0, 1), means, errors):
+            label.set_position((x, mean + err + 0.1))
+            label.set_text(f'{mean:.1f} ± {err:.1f}')
+        
+        self.ax_bars.set_ylim(0, max(m + e for m, e in zip(means, errors)) * 1.25 + 0.5)
+        return means
+    
+    def _update_table(self, group_a, group_b, means, results):
+        p_value = results['ttest']['p_value']
+        total_a, total_b = sum(group_a), sum(group_b)
+        significant = p_value < self.config.ALPHA
+        
+        values = [
+            (f'{len(group_a)}', f'{len(group_b)}', '—'),
+            (f'{total_a}', f'{total_b}', f'{(total_b - total_a) / total_a * 100:.1f}%' if total_a else '—'),
+            (f'{means[0]:.2f}', f'{means[1]:.2f}', f'{(means[1] - means[0]) / means[0] * 100:.1f}%' if means[0] else '—'),
+            ('—', '—', f'{p_value:.4f}'),
+            ('—', '—', '✅ ЗНАЧИМО' if significant else '❌ НЕ ЗНАЧИМО')
+        ]
+        for i, row in enumerate(values, start=1):
+            for j, text in enumerate(row, start=1):
+                self.table[(i, j)].get_text().set_text(text)
+        
+        status_cell = self.table[(5, 3)]
+        status_cell.set_facecolor('#C6EFCE' if significant else '#FFC7CE')
+        status_cell.get_text().set_color('#006100' if significant else '#9C0006')
+    
+    def _update_categories(self, category_stats):
+        labels = [''] * self.n_categories
+        widths = np.zeros(self.n_categories)
+        
+        if category_stats is not None and 'change_percent' in category_stats.columns:
+            cat_stats = category_stats[category_stats['A'] + category_stats['B'] > 0]
+            change = cat_stats['change_percent'].replace([np.inf, -np.inf], 100.0).fillna(0)
+            change = change.sort_values()
+            half = self.n_categories // 2
+            top = pd.concat([change.head(half), change.tail(self.n_categories - half)]) \
+                if len(change) > self.n_categories else change
+            widths[:len(top)] = top.values
+            labels[:len(top)] = [str(idx)[:20] + '...' if len(str(idx)) > 20 else str(idx) for idx in top.index]
+        
+        for bar, width in zip(self.cat_bars, widths):
+            bar.set_width(width)
+            bar.set_color('green' if width < 0 else 'red')
+        self.ax_categories.set_yticklabels(labels, fontsize=9)
+        
+        limit = max(np.abs(widths).max(), 10) * 1.1
+        self.ax_categories.set_xlim(-limit, limit)
+    
+    def _update_box(self, group_a, group_b):
+        top = 0
+        for i, (x, values) in enumerate(zip((1, 2), (group_a, group_b))):
+            q1, median, q3, low, high, fliers = self._box_stats(values)
+            self.boxes[i].set_y(q1)
+            self.boxes[i].set_height(q3 - q1)
+            self.box_medians[i].set_data([x - 0.25, x + 0.25], [median, median])
+            self.box_whiskers[i].set_data(
+                [x, x, np.nan, x, x, np.nan, x - 0.12, x + 0.12, np.nan, x - 0.12, x + 0.12],
+                [q1, low, np.nan, q3, high, np.nan, low, low, np.nan, high, high])
+            self.box_fliers[i].set_data(np.full(len(fliers), x), fliers)
+            top = max(top, np.max(values))
+        self.ax_box.set_ylim(0, top * 1.1 + 1)
+    
+    def _update_effect(self, results):
+        diff = results['ttest']['mean_diff']
+        ci_lower, ci_upper = results['ttest']['confidence_interval']
+        
+        self.ci_span.set_x(ci_lower)
+        self.ci_span.set_width(ci_upper - ci_lower)
+        self.ci_line.set_data([ci_lower, ci_upper], [0, 0])
+        self.ci_caps.set_data([ci_lower, ci_upper], [0, 0])
+        self.effect_point.set_data([diff], [0])
+        
+        low, high = min(ci_lower, 0), max(ci_upper, 0)
+        pad = (high - low) * 0.15 or 1
+        self.ax_effect.set_xlim(low - pad, high + pad)
+        self.ax_effect.set_title(f'Эффект: {diff:.2f} заявок\n95% ДИ: [{ci_lower:.2f}, {ci_upper:.2f}]',
+                                 fontweight='bold', fontsize=12, pad=10)
+    
+    def _update_status(self, results):
+        p_value = results['ttest']['p_value']
+        relative = results['descriptive_stats']['effect']['relative_diff']
+        
+        if p_value < self.config.ALPHA:
+            text = f"✅ ТЕСТ ПРОЙДЕН\n\nСнижение: {relative:.1f}%\np = {p_value:.4f}"
+            color, border_color = '#C6EFCE', '#006100'
+        else:
+            text = f"❌ ТЕСТ НЕ ПРОЙДЕН\n\nЭффект: {relative:.1f}%\np = {p_value:.4f}"
+            color, border_color = '#FFC7CE', '#9C0006'
+        
+        self.status_text.set_text(text)
+        self.status_text.get_bbox_patch().set_facecolor(color)
+        self.status_text.get_bbox_patch().set_edgecolor(border_color)
+    
+    def _update_daily(self, df_daily):
+        visible = df_daily is not None and len(df_daily) > 0
+        self.ax_daily.set_visible(visible)
+        if not visible:
+            return
+        
+        from src.trends import compute_trends, downsample
+        
+        trends = compute_trends(df_daily, window=self.config.TREND_WINDOW,
+                                method=self.config.TREND_METHOD, arms=['A', 'B'])
+        x = self._date2num(pd.to_datetime(trends['Дата']))
+        max_points = self.config.TREND_MAX_POINTS
+        top = 0
+        for i, group in enumerate('AB'):
+            y = trends[group].to_numpy(dtype=float)
+            smooth = trends[f'{group}_trend'].to_numpy() \
+                if f'{group}_trend' in trends.columns else np.full(len(y), np.nan)
+            idx = downsample(x, y, max_points, method='minmax')
+            self.daily_points[i].set_offsets(np.column_stack([x[idx], y[idx]]))
+            idx = downsample(x, smooth, max_points, method='lttb')
+            self.daily_trends[i].set_data(x[idx], smooth[idx])
+            self.daily_means[i].set_ydata([np.nanmean(y), np.nanmean(y)])
+            top = max(top, np.nanmax(y))
+        
+        self.ax_daily.set_xlim(x.min() - 0.5, x.max() + 0.5)
+        self.ax_daily.set_ylim(0, top * 1.15 + 0.5)
+    
+    def render(self, group_a, group_b, results, category_stats=None, df_daily=None,
+               title='A/B-TEST DASHBOARD: Эффективность новой инструкции'):
+        """Подставить данные в шаблон"""
+        
+        self.suptitle.set_text(title)
+        means = self._update_bars(group_a, group_b)
+        self._update_table(group_a, group_b, means, results)
+        self._update_categories(category_stats)
+        self._update_box(group_a, group_b)
+        self._update_effect(results)
+        self._update_status(results)
+        self._update_daily(df_daily)
+        return self.fig
+    
+    def save(self, path_stem, formats=('png',), dpi=None):
+        """Сохранить с фиксированной разметкой (без bbox_inches='tight')"""
+        
+        path_stem = Path(path_stem)
+        for fmt in formats:
+            self.fig.savefig(path_stem.with_suffix(f'.{fmt}'), dpi=dpi or self.dpi)
\ No newline at end of file